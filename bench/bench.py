@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# Times the Python side of script.py on synthetic libraries of any size. Each library is made by
+# copying the cells in the repository under new variant names (nand2_0, nand2_1, ...) together with
+# an all.mag that places every cell in rows, and is characterized with the stand-in tools in tools/
+# so that the tools take only as long as STAND_IN_LATENCY says. The time spent in each stage is read
+# from the run's trace and appended to a results file with the commit it was measured at
+import argparse, json, os, shutil, subprocess, sys, tempfile, time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+script = os.path.join(repository, "script.py")
+
+sys.path.insert(0, os.path.join(repository, "tools"))
+from _common import get_bounding_box
+
+# Spans of the trace that make up each stage
+stages = {
+    "parse": ("MagFile.parse", "Lint.check"),
+    "schedule": ("Cell.schedule",),
+    "ingest": ("Measurements.read", "Cell.get_results"),
+    "render": ("Cell.render", "Databook.write"),
+    "tools": ("magic", "check_magic_leaf_cell", "ext2sp", "hspice"),
+}
+# Cells that go at the start and end of every row
+row_ends = ("leftbuf", "rightend")
+
+
+def generate_library(directory: str, size: int, row_length: int) -> List[str]:
+    cells = sorted(filename[:-4] for filename in os.listdir(repository) if filename.endswith(".mag") and filename != "all.mag")
+    boxes = {cell: get_bounding_box(os.path.join(repository, f"{cell}.mag")) for cell in cells}
+    names: List[str] = []
+    for i in range(size):
+        cell = cells[i % len(cells)]
+        name = f"{cell}_{i // len(cells)}"
+        shutil.copy(os.path.join(repository, f"{cell}.mag"), os.path.join(directory, f"{name}.mag"))
+        names.append(name)
+    write_rows(os.path.join(directory, "all.mag"), names, boxes, row_length)
+    return names
+
+
+# Places the cells in rows of row_length between the row ends, flipping every other row so that
+# neighbouring rows share their supply rails like a real placement
+def write_rows(filename: str, names: List[str], boxes: Dict[str, Tuple[int, int, int, int]], row_length: int) -> None:
+    ends = {end: [name for name in names if name.split("_")[0] == end] for end in row_ends}
+    middle = [name for name in names if name.split("_")[0] not in row_ends]
+    height = max(ury - lly for _, lly, _, ury in boxes.values())
+    lines = ["magic", "tech tsmc180", "timestamp 0"]
+    for row, start in enumerate(range(0, max(len(middle), 1), row_length)):
+        row_cells = middle[start:start + row_length]
+        if all(len(ends[end]) > 0 for end in row_ends):
+            row_cells = [ends["leftbuf"][row % len(ends["leftbuf"])]] + row_cells + [ends["rightend"][row % len(ends["rightend"])]]
+        x = 0
+        for name in row_cells:
+            llx, lly, urx, ury = boxes[name.split("_")[0]]
+            transform = f"1 0 {x - llx} 0 1 {row * height - lly}" if row % 2 == 0 else f"1 0 {x - llx} 0 -1 {(row + 1) * height + lly}"
+            lines += [f"use {name}  {name}_0", "timestamp 0", f"transform {transform}", f"box {llx} {lly} {urx} {ury}"]
+            x += urx - llx
+    lines.append("<< end >>")
+    with open(filename, "w") as layout_file:
+        layout_file.write("\n".join(lines) + "\n")
+
+
+def read_trace(filename: str) -> Dict[str, float]:
+    with open(filename, "r") as trace_file:
+        events = json.load(trace_file)["traceEvents"]
+    totals: Dict[str, float] = {}
+    for event in events:
+        if event.get("ph") == "X":
+            totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1000
+    return {stage: round(sum(totals.get(name, 0.0) for name in names), 1) for stage, names in stages.items()}
+
+
+def run(arguments: List[str], directory: str, environment: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    # script.py exits with 1 when it has logged warnings, which synthetic libraries may well cause
+    process = subprocess.run([sys.executable, script, *arguments], cwd=directory, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if process.returncode not in (0, 1):
+        raise RuntimeError(f"script.py {' '.join(arguments)} failed:\n{process.stderr}")
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def get_commit() -> Tuple[str, bool]:
+    def git(*arguments: str) -> str:
+        return subprocess.run(["git", *arguments], cwd=repository, capture_output=True, text=True).stdout.strip()
+    return git("rev-parse", "--short", "HEAD") or "unknown", git("status", "--porcelain", "--untracked-files=no") != ""
+
+
+def benchmark(size: int, arguments: argparse.Namespace) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    try:
+        generate_library(directory, size, arguments.row_length)
+        environment = dict(os.environ)
+        environment["PATH"] = os.path.join(repository, "tools") + os.pathsep + environment.get("PATH", "")
+        environment["STAND_IN_LATENCY"] = str(arguments.latency)
+        result: Dict[str, Any] = {"cells": size}
+        result["total"] = run(["--no-cache", "--jobs", str(arguments.jobs), "--simulator", arguments.simulator, "--trace", "trace.json"], directory, environment)
+        result.update(read_trace(os.path.join(directory, "trace.json")))
+        result["rows"] = run(["lint", "--rows"], directory, environment)
+        return result
+    finally:
+        if arguments.keep:
+            print(f"Kept the library with {size} cells in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def read_results(filename: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(filename):
+        return []
+    with open(filename, "r") as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+
+# The last result measured with the same settings at another commit, to compare against
+def get_previous(results: List[Dict[str, Any]], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    settings = ("cells", "jobs", "latency", "simulator")
+    for previous in reversed(results):
+        if previous["commit"] != result["commit"] and all(previous.get(setting) == result.get(setting) for setting in settings):
+            return previous
+    return None
+
+
+def print_results(results: List[Dict[str, Any]], previous_results: List[Dict[str, Any]]) -> None:
+    columns = ["total", *stages, "rows"]
+    print(f"{'Cells':>6}" + "".join(f"{column + ' [ms]':>18}" for column in columns))
+    for result in results:
+        previous = get_previous(previous_results, result)
+        line = f"{result['cells']:>6}"
+        for column in columns:
+            change = f" ({100 * (result[column] / previous[column] - 1):+.0f}%)" if previous is not None and previous.get(column) else ""
+            line += f"{str(result[column]) + change:>18}"
+        print(line)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time script.py on synthetic libraries with the stand-in tools")
+    parser.add_argument("sizes", type=int, nargs="*", default=[10, 100, 1000], help="numbers of cells to benchmark (default: 10 100 1000)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="jobs to run script.py with")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SECONDS", help="time each stand-in tool takes (default: %(default)s)")
+    parser.add_argument("--simulator", default="hspice", help="simulator to run script.py with (default: %(default)s, the stand-in)")
+    parser.add_argument("--row-length", type=int, default=20, metavar="CELLS", help="cells in each row of all.mag (default: %(default)s)")
+    parser.add_argument("--results", default=os.path.join(repository, "bench", "results.jsonl"), metavar="FILE", help="file to append the results to (default: bench/results.jsonl)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated libraries")
+    return parser.parse_args()
+
+
+def main() -> None:
+    arguments = parse_arguments()
+    commit, dirty = get_commit()
+    previous_results = read_results(arguments.results)
+    results: List[Dict[str, Any]] = []
+    for size in arguments.sizes:
+        result = {
+            "commit": commit,
+            "dirty": dirty,
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "jobs": arguments.jobs,
+            "latency": arguments.latency,
+            "simulator": arguments.simulator,
+            **benchmark(size, arguments),
+        }
+        results.append(result)
+        with open(arguments.results, "a") as results_file:
+            results_file.write(json.dumps(result) + "\n")
+    print(f"Commit {commit}{' (with uncommitted changes)' if dirty else ''}, {arguments.jobs} jobs, {arguments.latency} s tool latency")
+    print_results(results, previous_results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+# Characterizes the tsmc180 cell library and writes its data book. Importing the package runs and
+# creates nothing: the log, the tools and the library directory are only set up once they are used
+from .errors import FatalError, CharacterizationError, ToolError
+from .log import Log, Tracer, log, tracer
+from .tools import Runner, Workspace, runner, workspace
+from .magic import Library, Magic, MagFile, Coordinate, library
+from .lint import Lint
+from .spice import Measurements, Waveforms, Simulator, HSpice, NgSpice, FakeSimulator, Stimulus, Tier, Corner, simulators, tiers, corners
+from .scheduler import Job, Scheduler, Cache, Journal
+from .cell import Port, Netlist, Footprint, Cell
+from .book import Databook
+from .layout import Layout, StaticTiming
+from .watch import Watcher
+from .liberty import Liberty
+
+__all__ = [
+    "FatalError", "CharacterizationError", "ToolError",
+    "Log", "Tracer", "log", "tracer",
+    "Runner", "Workspace", "runner", "workspace",
+    "Library", "Magic", "MagFile", "Coordinate", "library",
+    "Lint",
+    "Measurements", "Waveforms", "Simulator", "HSpice", "NgSpice", "FakeSimulator", "Stimulus", "Tier", "Corner", "simulators", "tiers", "corners",
+    "Job", "Scheduler", "Cache", "Journal",
+    "Port", "Netlist", "Footprint", "Cell",
+    "Databook",
+    "Layout", "StaticTiming",
+    "Watcher",
+    "Liberty",
+]
@@ -0,0 +1,201 @@
+import os, threading
+from functools import partial
+from typing import List, IO, Optional
+
+from .errors import CharacterizationError
+from .log import log, tracer
+from .tools import workspace
+from .magic import MagFile, Magic, library
+from .lint import Lint
+from .spice import Corner, Simulator, Tier, corners, tiers
+from .scheduler import Cache, Journal, Scheduler
+from .cell import Cell, Netlist
+
+
+class Databook:
+    header = (
+        "<!DOCTYPE html>\n"
+        "<html>\n"
+        "<head><meta charset='UTF-8'><title>Databook</title></head>\n"
+        "<body>\n"
+        "\t<h1>Databook</h1>\n"
+    )
+    footer = (
+        "</body>\n"
+        "</html>"
+    )
+    
+    def __init__(
+        self,
+        jobs: int,
+        cache: Cache,
+        simulator: Simulator,
+        input_slews: Optional[List[float]] = None,
+        tolerance: Optional[float] = None,
+        tier: Tier = tiers["signoff"],
+        journal: Optional[Journal] = None,
+        retries: int = 0,
+        characterization_corners: Optional[List[Corner]] = None,
+        archive: Optional[str] = None,
+        reduction: Optional[Netlist.Reduction] = None,
+        directory: str = ".",
+        simulate: bool = True,
+    ) -> None:
+        self.jobs = jobs
+        self.cache = cache
+        self.journal = journal if journal is not None else Journal(enabled=False)
+        self.retries = retries
+        self.simulator = simulator
+        self.tolerance = tolerance
+        self.tier = tier
+        self.input_slews = input_slews if input_slews is not None else [Cell.input_slew]
+        self.corners = characterization_corners if characterization_corners is not None else [corners["nominal"]]
+        self.archive = archive
+        self.reduction = reduction
+        self.filename = os.path.join(directory, "databook.html")
+        # Otherwise cells are only rendered from their cached results
+        self.simulate = simulate
+        self.lock = threading.Lock()
+        self.cells: List[Cell] = []
+        self.failed: List[str] = []
+        self.file: Optional[IO[bytes]] = None
+        
+    # Characterizes the cells, writing the databook as they finish unless it is not wanted
+    def get_cells(self, cell_names: List[str], write: bool = True) -> None:
+        self.cells = []
+        self.failed = []
+        if write:
+            self.start()
+        try:
+            self.run(cell_names)
+        finally:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        if len(self.failed) > 0:
+            retry = ", rerun with --resume to retry them" if self.simulate else ""
+            log.warning(f"{len(self.failed)} cells failed{retry}: {', '.join(sorted(self.failed))}")
+        if len(self.cells) == 0:
+            log.error("No cells were characterized")
+        self.cells = sorted(self.cells, key=lambda cell: cell.name)
+        
+    # Cells that pass lint, and None for the others, which have failed
+    def get_cell(self, name: str, lint: Lint) -> Optional[Cell]:
+        if name in lint.errors:
+            self.fail_cell(name, None, CharacterizationError(f"Cell '{name}' failed lint: {'; '.join(lint.errors[name])}"))
+            return None
+        try:
+            return Cell(name, self.input_slews, self.simulator, self.tolerance, self.tier, self.corners, self.archive, self.reduction)
+        except Exception as error:
+            self.fail_cell(name, None, error)
+            return None
+        
+    def run(self, cell_names: List[str]) -> None:
+        scheduler = Scheduler(self.jobs, self.retries)
+        magic = Magic()
+        magic_job = scheduler.add("magic", magic.run)
+        lint = Lint(cell_names)
+        lint.check()
+        for name in cell_names:
+            cell = self.get_cell(name, lint)
+            if cell is None:
+                continue
+            try:
+                cell.schedule(scheduler, self.add_cell, self.fail_cell, self.cache, self.journal, magic, magic_job, self.simulate)
+            except CharacterizationError as error:
+                self.fail_cell(name, None, error)
+        magic_job.cost = float(len(magic.cells))
+        scheduler.run()
+        workspace.close()
+        
+    # Only extracts the cells, writing the netlist that would be simulated for each to directory
+    def extract(self, cell_names: List[str], directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.failed = []
+        scheduler = Scheduler(self.jobs, self.retries)
+        magic = Magic()
+        magic_job = scheduler.add("magic", magic.run)
+        lint = Lint(cell_names)
+        lint.check()
+        extracted: List[str] = []
+        for name in cell_names:
+            cell = self.get_cell(name, lint)
+            if cell is None:
+                continue
+            netlist = cell.schedule_netlist(scheduler, magic, magic_job)
+            scheduler.add(f"{name}/save", partial(cell.save_netlist, directory), [netlist], on_failure=partial(self.fail_cell, name, None))
+            extracted.append(name)
+        magic_job.cost = float(len(magic.cells))
+        scheduler.run()
+        workspace.close()
+        if len(self.failed) > 0:
+            log.warning(f"{len(self.failed)} cells failed: {', '.join(sorted(self.failed))}")
+        log.info(f"Wrote the netlists of {len([name for name in extracted if name not in self.failed])} cells to {directory}")
+        
+    # Re-characterizes cells whose .mag files have changed and swaps them into the databook. The
+    # other cells keep their rendered HTML, so only the changed cells are rendered again
+    def update(self, cell_names: List[str]) -> List[str]:
+        with tracer.span("Databook.update"):
+            cells = {cell.name: cell for cell in self.cells}
+            changed: List[str] = []
+            for name in cell_names:
+                if not os.path.exists(library.path(name)):
+                    if name in cells or name in self.failed:
+                        log.info(f"Removed cell {name}")
+                        changed.append(name)
+                # Saved without any changes
+                elif name not in cells or MagFile(library.path(name)).digest != cells[name].magic_data.digest:
+                    changed.append(name)
+            if len(changed) == 0:
+                return changed
+            self.cells = [cell for cell in self.cells if cell.name not in changed]
+            self.failed = [name for name in self.failed if name not in changed]
+            self.run([name for name in changed if os.path.exists(library.path(name))])
+            self.cells = sorted(self.cells, key=lambda cell: cell.name)
+            self.write()
+            return changed
+        
+    def close(self) -> None:
+        self.journal.close()
+        
+    def get_header(self) -> str:
+        header = self.header + f"\t<p>Characterization tier: {self.tier.name}</p>\n"
+        return header + f"\t<p>Characterization corners: {'; '.join(str(corner) for corner in self.corners)}</p>\n"
+        
+    def start(self) -> None:
+        self.file = open(self.filename, "wb")
+        self.file.write(self.get_header().encode())
+        self.end = self.file.tell()
+        self.file.write(self.footer.encode())
+        self.file.flush()
+        
+    # Cells are appended in the order they finish, rewriting only the footer after each one so the
+    # databook can be viewed during a run
+    def add_cell(self, cell: Cell) -> None:
+        html = cell.render().encode()
+        if not cell.journaled:
+            self.journal.record(cell.name, cell.cache_key, "done", results=cell.to_dict())
+        with self.lock:
+            self.cells.append(cell)
+            # Updates only rewrite the databook once they are finished
+            if self.file is None:
+                return
+            self.file.seek(self.end)
+            self.file.write(html)
+            self.end = self.file.tell()
+            self.file.write(self.footer.encode())
+            self.file.truncate()
+            self.file.flush()
+
+    def fail_cell(self, cell_name: str, key: Optional[str], error: Exception) -> None:
+        reason = str(error) if isinstance(error, CharacterizationError) else f"{type(error).__name__}: {error}"
+        log.warning(f"Failed to characterize cell '{cell_name}': {reason}")
+        self.journal.record(cell_name, key, "failed", reason=reason)
+        with self.lock:
+            self.failed.append(cell_name)
+            
+    def write(self) -> None:
+        with tracer.span("Databook.write"):
+            with open(f"{self.filename}.tmp", "w") as file:
+                file.write("".join([self.get_header(), *(cell.render() for cell in self.cells), self.footer]))
+            os.replace(f"{self.filename}.tmp", self.filename)
@@ -0,0 +1,1199 @@
+import os, shutil
+from collections import defaultdict
+from functools import partial
+from typing import List, Dict, Tuple, Set, Union, Any, Callable, Optional
+import numpy as np
+
+from .errors import CharacterizationError
+from .log import log, tracer
+from .tools import run_command, workspace
+from .magic import Coordinate, MagFile, Magic, library
+from .spice import Corner, HSpice, Measurements, Simulator, Tier, corners, spice_number, spice_time, tiers
+from .scheduler import Cache, Job, Journal, Scheduler
+
+
+def round_array(values: np.ndarray, decimals: int) -> np.ndarray:
+    # np.round scales by 10**decimals before rounding, so unlike round() it can go the wrong way on
+    # values that print as an exact half
+    return np.array([round(float(value), decimals) for value in values.flat]).reshape(values.shape)
+
+
+class Port:
+    directions = {
+        "rdtype": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Test"),
+            "Input": ("D", "Clock", "nReset"),
+            "Inout": None,
+            "Output": ("Q", "nQ"),
+        },
+        "smux": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Clock", "nReset"),
+            "Input": ("D", "Load", "Q", "Test", "SDI"),
+            "Inout": None,
+            "Output": ("M"),
+        },
+        "fulladder": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B", "Cin"),
+            "Inout": None,
+            "Output": ("S", "Cout"),
+        },
+        "halfadder": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B"),
+            "Inout": None,
+            "Output": ("S", "C"),
+        },
+        "xor": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "mux" : {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("I0", "I1", "S"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "leftbuf": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": None,
+            "Input": ("Test", "Clock", "nReset", "nSDO"),
+            "Inout": ("SDI"),
+            "Output": ("TestOut", "ClockOut", "nResetOut", "SDO"),
+        },
+        "rightend": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": None,
+            "Input": ("Scan"),
+            "Inout": None,
+            "Output": ("nScan"),
+        },
+        "scandtype": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn"),
+            "Input": ("D", "SDI", "Clock", "nReset", "Test"),
+            "Inout": None,
+            "Output": ("Q", "nQ"),
+        },
+        "scanreg": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn"),
+            "Input": ("D", "SDI", "Clock", "nReset", "Load", "Test"),
+            "Inout": None,
+            "Output": ("Q", "nQ"),
+        },
+        "trisbuf": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "Enable"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "tiehigh": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": None,
+            "Inout": None,
+            "Output": ("High"),
+        },
+        "tielow": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": None,
+            "Inout": None,
+            "Output": ("Low"),
+        },
+        "rowcrosser": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": None,
+            "Inout": ("Cross"),
+            "Output": None,
+        },
+        "inv": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "buffer": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "nand": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B", "C", "D"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "nor": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B", "C", "D"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "and": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B", "C", "D"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+        "or": {
+            "Power": ("Vdd!", "GND!"),
+            "Not connected": ("ScanReturn", "Scan", "Test", "Clock", "nReset"),
+            "Input": ("A", "B", "C", "D"),
+            "Inout": None,
+            "Output": ("Y"),
+        },
+    }
+    
+    
+    class PropagationDelay:
+        def __init__(
+            self,
+            load_capacitance: float = 0.0,
+            rise_delay: float = 0.0,
+            fall_delay: float = 0.0,
+            average_delay: float = 0.0,
+            simulated: bool = True,
+            rise_energy: Optional[float] = None,
+            fall_energy: Optional[float] = None,
+        ):
+            self.load_capacitance = load_capacitance
+            self.rise_delay = rise_delay
+            self.fall_delay = fall_delay
+            self.average_delay = average_delay
+            # False if interpolated between simulated loads by an adaptive sweep
+            self.simulated = simulated
+            # Switching energy [fJ] drawn from the supply when the input rises and falls, or None if
+            # it was not measured
+            self.rise_energy = rise_energy
+            self.fall_energy = fall_energy
+            
+            
+    # Least squares fit of the delays to intrinsic delay [ps] + drive resistance [kΩ] x load [fF],
+    # with the loads that were actually simulated
+    class DelayModel:
+        def __init__(
+            self,
+            intrinsic_rise_delay: float,
+            rise_resistance: float,
+            intrinsic_fall_delay: float,
+            fall_resistance: float,
+            simulated_loads: List[float],
+        ) -> None:
+            self.intrinsic_rise_delay = intrinsic_rise_delay
+            self.rise_resistance = rise_resistance
+            self.intrinsic_fall_delay = intrinsic_fall_delay
+            self.fall_resistance = fall_resistance
+            self.simulated_loads = simulated_loads
+            
+            
+    # Delay and output transition tables [ns] of one input to output arc, indexed by input slew [ns]
+    # then load capacitance [fF]
+    class Timing:
+        def __init__(
+            self,
+            related_port: str,
+            input_slews: List[float],
+            load_capacitances: List[float],
+        ) -> None:
+            self.related_port = related_port
+            self.input_slews = input_slews
+            self.load_capacitances = load_capacitances
+            self.cell_rise: List[List[float]] = []
+            self.cell_fall: List[List[float]] = []
+            self.rise_transition: List[List[float]] = []
+            self.fall_transition: List[List[float]] = []
+            
+        def to_dict(self) -> Dict[str, Any]:
+            return dict(vars(self))
+        
+        @staticmethod
+        def from_dict(data: Dict[str, Any]) -> "Port.Timing":
+            timing = Port.Timing(data["related_port"], data["input_slews"], data["load_capacitances"])
+            timing.cell_rise = data["cell_rise"]
+            timing.cell_fall = data["cell_fall"]
+            timing.rise_transition = data["rise_transition"]
+            timing.fall_transition = data["fall_transition"]
+            return timing
+        
+        
+    # Rise and fall delays [ps] of one input to output arc at the nominal input slew, at the loads [fF]
+    # where the output switched both ways
+    class Arc:
+        def __init__(
+            self,
+            related_port: str,
+            load_capacitances: List[float],
+            rise_delays: List[float],
+            fall_delays: List[float],
+        ) -> None:
+            self.related_port = related_port
+            self.load_capacitances = load_capacitances
+            self.rise_delays = rise_delays
+            self.fall_delays = fall_delays
+            
+            
+    # What was characterized at one corner
+    class Results:
+        def __init__(self) -> None:
+            self.capacitance: Union[str, float] = "N/A"
+            self.propagation_delays: List[Port.PropagationDelay] = []
+            self.delay_model: Optional[Port.DelayModel] = None
+            self.timings: List[Port.Timing] = []
+            # Leakage power [nW] with the input low and high
+            self.leakage: Dict[str, float] = {}
+            # Of an output port, each arc driving it that was measured to switch
+            self.arcs: List[Port.Arc] = []
+    
+    
+    def __init__(
+        self,
+        name: str,
+        cell_name: str,
+        position: Coordinate,
+    ) -> None:
+        self.name = name
+        cell_name = Cell.base_name(cell_name)
+        if cell_name[-1].isdigit():
+            cell_name = cell_name[:-1]
+        port_found = False
+        for direction, ports in self.directions.get(cell_name, {}).items():
+            if ports is None:
+                continue
+            elif name in ports:
+                self.direction = direction
+                port_found = True
+                break
+        if not port_found:
+            raise CharacterizationError(f"Unrecognised port name '{name}' in cell '{cell_name}'")
+        self.positions = [position]
+        # By corner name
+        self.results: Dict[str, Port.Results] = defaultdict(Port.Results)
+
+
+# The subcircuit of a cell as ext2sp writes it, parsed once into its elements so that every deck of
+# the cell can .include the same file. Reducing it grounds the coupling capacitors below a threshold,
+# adds up the capacitors between the same nodes and shorts the nodes joined by resistors below a
+# threshold, which leaves fewer nodes for the simulator to solve on every time step
+class Netlist:
+    supplies = ("Vdd", "GND")
+    # Nodes of each kind of element, the rest of the line being its model, value and parameters
+    num_nodes = {"m": 4, "q": 3, "c": 2, "r": 2, "l": 2, "d": 2}
+    
+    
+    class Element:
+        def __init__(self, name: str, nodes: List[str], rest: List[str]) -> None:
+            self.name = name
+            self.nodes = nodes
+            self.rest = rest
+            
+        def __str__(self) -> str:
+            return " ".join([self.name, *self.nodes, *self.rest])
+        
+        
+    # Coupling capacitors smaller than capacitance [fF] are grounded and resistors smaller than
+    # resistance [Ω] are shorted
+    class Reduction:
+        def __init__(self, capacitance: float, resistance: float) -> None:
+            self.capacitance = capacitance
+            self.resistance = resistance
+            
+        def __str__(self) -> str:
+            return f"capacitance: {self.capacitance} fF, resistance: {self.resistance} Ω"
+    
+    
+    def __init__(self, elements: List["Netlist.Element"]) -> None:
+        self.elements = elements
+        
+    @staticmethod
+    def read(filename: str) -> "Netlist":
+        lines: List[str] = []
+        with open(filename, "r") as spice_file:
+            for line in spice_file:
+                if line.startswith("+") and len(lines) > 0:
+                    lines[-1] += " " + line[1:].strip()
+                elif line.strip() != "":
+                    lines.append(line.strip())
+        elements: List[Netlist.Element] = []
+        for line in lines:
+            tokens = line.split()
+            kind = tokens[0][0].lower()
+            # Comments, and statements such as .option scale that every deck sets itself
+            if kind in "*.":
+                continue
+            if kind == "x":
+                # Nodes, then the subcircuit, then its parameters
+                arguments = [token for token in tokens[1:] if "=" not in token]
+                elements.append(Netlist.Element(tokens[0], arguments[:-1], tokens[len(arguments):]))
+            elif kind in Netlist.num_nodes:
+                elements.append(Netlist.Element(tokens[0], tokens[1:1 + Netlist.num_nodes[kind]], tokens[1 + Netlist.num_nodes[kind]:]))
+            else:
+                raise ValueError(f"Unsupported element '{tokens[0]}' in {filename}")
+        return Netlist(elements)
+    
+    def nodes(self) -> Set[str]:
+        return {node for element in self.elements for node in element.nodes}
+    
+    def reduce(self, reduction: "Netlist.Reduction", ports: List[str]) -> "Netlist":
+        # Nodes that are shorted together are named after a port or supply if any of them is one
+        keep = set(ports) | set(self.supplies)
+        parent: Dict[str, str] = {}
+        def find(node: str) -> str:
+            return node if parent.get(node, node) == node else find(parent[node])
+        elements: List[Netlist.Element] = []
+        for element in self.elements:
+            a, b = sorted((find(element.nodes[0]), find(element.nodes[-1])), key=lambda node: node not in keep)
+            # Two ports are never shorted into one
+            if element.name[0].lower() == "r" and abs(spice_number(element.rest[0])) < reduction.resistance and b not in keep:
+                if a != b:
+                    parent[b] = a
+            else:
+                elements.append(element)
+        # Capacitance [fF] between each pair of nodes, with coupling to a supply counting as grounded,
+        # then the coupling capacitors that are too small grounded at both ends
+        capacitances: Dict[Tuple[str, str], float] = defaultdict(float)
+        reduced: List[Netlist.Element] = []
+        for element in elements:
+            nodes = [find(node) for node in element.nodes]
+            if element.name[0].lower() != "c":
+                reduced.append(Netlist.Element(element.name, nodes, element.rest))
+                continue
+            a, b = sorted(nodes, key=lambda node: node in self.supplies)
+            if a != b and a not in self.supplies:
+                capacitances[(a, "GND") if b in self.supplies else (min(a, b), max(a, b))] += spice_number(element.rest[0]) * 1e15
+        for (a, b), capacitance in list(capacitances.items()):
+            if b != "GND" and capacitance < reduction.capacitance:
+                del capacitances[(a, b)]
+                capacitances[(a, "GND")] += capacitance
+                capacitances[(b, "GND")] += capacitance
+        for i, ((a, b), capacitance) in enumerate(sorted(capacitances.items())):
+            reduced.append(Netlist.Element(f"C{i}", [a, b], [f"{capacitance:.6g}fF"]))
+        return Netlist(reduced)
+    
+    def write(self, filename: str, name: str, ports: List[str]) -> None:
+        with open(filename, "w") as spice_file:
+            spice_file.write(f".subckt {name} {' '.join(ports)}\n")
+            spice_file.write("".join(f"\t{element}\n" for element in self.elements))
+            spice_file.write(".ends\n")
+
+
+# The layout side of a cell: its size and ports, read from its .mag file alone, which is all that
+# checking a layout that places the cell needs
+class Footprint:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.get_magic_data()
+        self.get_area()
+        self.get_ports()
+        
+    # Variants of a cell, such as other drive strengths, are named <cell>_<variant> and share the
+    # function and ports of <cell>
+    @staticmethod
+    def base_name(name: str) -> str:
+        return name.split("_")[0]
+        
+    def get_magic_data(self) -> None:
+        self.magic_data = MagFile(library.path(self.name))
+        
+    def get_ports(self) -> None:
+        self.ports: List[Port] = []
+        for name, labels in self.magic_data.labels.items():
+            positions = [Coordinate(float(label.box[0]), float(label.box[1])) / 50 for label in labels]
+            port = Port(name, self.name, positions[0])
+            port.positions = positions
+            self.ports.append(port)
+        self.ports = sorted(self.ports, key=lambda port: f"{port.direction} {port.name}")
+        self.input_ports = list(filter(lambda port: port.direction == "Input", self.ports))
+        self.output_ports = list(filter(lambda port: port.direction == "Output", self.ports))
+        
+    # Every port has one direction, so no arc runs from a port to itself
+    def arcs(self) -> List[Tuple[Port, Port]]:
+        return [(input_port, output_port) for input_port in self.input_ports for output_port in self.output_ports]
+        
+    def get_area(self) -> None:
+        with tracer.span("Cell.get_area", cell=self.name):
+            if self.magic_data.bounding_box is None:
+                raise CharacterizationError(f"Cell '{self.name}' is empty")
+            llx, lly, urx, ury = self.magic_data.bounding_box
+            # Rounded as Magic's box command prints them, at 50 internal units per µm
+            self.width = round((urx - llx) / 50, 2)
+            self.height = round((ury - lly) / 50, 2)
+            self.area = round((urx - llx) * (ury - lly) / 2500, 2)
+
+
+class Cell(Footprint):
+    functions = {
+        "rdtype": "Raw D-Type Flip-Flop",
+        "smux": "Scan Multiplexer",
+        "fulladder": "Full Adder",
+        "halfadder": "Half Adder",
+        "xor": "XOR Gate",
+        "mux": "Standard Multiplexer",
+        "leftbuf": "Left End of Row Buffer",
+        "rightend": "Right End of Row Cell",
+        "scandtype": "Scannable D-Type Flip-Flop",
+        "scanreg": "Scannable Register",
+        "inv": "Inverter",
+        "buffer": "Buffer",
+        "nand": "NAND Gate",
+        "trisbuf": "Tri-State Buffer",
+        "tiehigh": "Tie High",
+        "tielow": "Tie Low",
+        "rowcrosser": "Row Crosser",
+        "nor": "NOR Gate",
+        "and": "AND Gate",
+        "or": "OR Gate",
+    }
+    
+    # Boolean function of each output in Liberty syntax, where {and} and {or} stand for the cell's
+    # input ports joined by that operator
+    logic_functions = {
+        "inv": {"Y": "!A"},
+        "buffer": {"Y": "A"},
+        "nand": {"Y": "!({and})"},
+        "and": {"Y": "({and})"},
+        "nor": {"Y": "!({or})"},
+        "or": {"Y": "({or})"},
+        "xor": {"Y": "(A^B)"},
+        "mux": {"Y": "(I0&!S)|(I1&S)"},
+        "halfadder": {"S": "(A^B)", "C": "(A&B)"},
+        "fulladder": {"S": "(A^B^Cin)", "Cout": "(A&B)|(A&Cin)|(B&Cin)"},
+        "trisbuf": {"Y": "A"},
+        "tiehigh": {"High": "1"},
+        "tielow": {"Low": "0"},
+        "rightend": {"nScan": "!Scan"},
+    }
+    
+    three_state_functions = {
+        "trisbuf": {"Y": "!Enable"},
+    }
+    
+    # Cell types whose outputs hold state, so have no logic function
+    sequential = {"rdtype", "scandtype", "scanreg"}
+    
+    n_inputs = {
+        2: "Two Input",
+        3: "Three Input",
+        4: "Four Input",
+    }
+    
+    load_capacitances = [0.01, 0.1, 1, 10, 50]
+    input_slew = 0.25
+    
+    def __init__(
+        self,
+        name: str,
+        input_slews: Optional[List[float]] = None,
+        simulator: Optional[Simulator] = None,
+        tolerance: Optional[float] = None,
+        tier: Tier = tiers["signoff"],
+        characterization_corners: Optional[List[Corner]] = None,
+        archive: Optional[str] = None,
+        reduction: Optional[Netlist.Reduction] = None,
+    ) -> None:
+        log.info(f"Processing cell {name}")
+        self.name = name
+        self.input_slews = sorted(set(input_slews or []) | {self.input_slew})
+        self.simulator = simulator if simulator is not None else HSpice()
+        # Largest error [ps] allowed when interpolating delays between loads, or None to simulate every load
+        self.tolerance = tolerance
+        self.tier = tier
+        self.corners = characterization_corners if characterization_corners is not None else [corners["nominal"]]
+        # Directory to archive the waveforms of the delay decks under, or None to only measure
+        self.archive = archive
+        # How to reduce the extracted netlist, or None to simulate it as extracted
+        self.reduction = reduction
+        self.get_function()
+        super().__init__(name)
+        self.stimulus = tier.stimulus(self.estimate_delay())
+        # By corner name, input port and output port
+        self.capacitances: Dict[Tuple[str, str, str], float] = {}
+        # Rise-rise, fall-rise, rise-fall and fall-fall delays [s] of each arc by load capacitance
+        self.delays: Dict[Tuple[str, str, str], np.ma.MaskedArray] = {}
+        # Switching energy of the rising and falling input [J] of each arc by load capacitance
+        self.energies: Dict[Tuple[str, str, str], np.ma.MaskedArray] = {}
+        # Leakage power with the input low and high [W], by corner name and input port
+        self.leakages: Dict[Tuple[str, str], np.ma.MaskedArray] = {}
+        self.timings: Dict[Tuple[str, str, str], Port.Timing] = {}
+        self.simulated_loads: Dict[str, List[float]] = {}
+        self.html: Optional[str] = None
+        
+    def schedule(
+        self,
+        scheduler: Scheduler,
+        render: Callable[["Cell"], None],
+        fail: Callable[[str, Optional[str], Exception], None],
+        cache: Cache,
+        journal: Journal,
+        magic: Magic,
+        magic_job: Job,
+        simulate: bool = True,
+    ) -> Job:
+        with tracer.span("Cell.schedule", cell=self.name):
+            # Rough relative runtimes, used to start the longest jobs first
+            size = float(self.magic_data.get_size())
+            # Without simulating, the cell is only rendered from its cached results and no tools run
+            checks = [scheduler.add(f"{self.name}/check", self.check_cell, cost=size / 10)] if simulate else []
+            self.cache = cache
+            self.cache_key = cache.key(
+                self.simulator.name,
+                f"tolerance: {self.tolerance}",
+                f"reduction: {self.reduction}",
+                self.magic_data.digest,
+                *(self.input_capacitance_deck(input_port, output_port, "") for input_port, output_port in self.arcs()),
+                *(self.propagation_delay_deck(input_port, "") for input_port in self.input_ports),
+            )
+            on_failure = partial(fail, self.name, self.cache_key)
+            self.journaled = False
+            cached_results = journal.load(self.name, self.cache_key)
+            if cached_results is not None:
+                log.info(f"Resuming cell {self.name} from the journal")
+                self.journaled = True
+            else:
+                cached_results = cache.load(self.name, self.cache_key)
+                if cached_results is not None:
+                    log.info(f"Using cached results for cell {self.name}")
+            if cached_results is not None:
+                results = scheduler.add(f"{self.name}/results", partial(self.load_results, cached_results), cost=size / 100)
+                return scheduler.add(f"{self.name}/render", partial(render, self), [*checks, results], cost=size / 100, on_failure=on_failure)
+            if not simulate:
+                raise CharacterizationError(f"Cell '{self.name}' has no cached results, characterize it first")
+            netlist = self.schedule_netlist(scheduler, magic, magic_job)
+            decks: List[Job] = []
+            for input_port, output_port in self.arcs() if self.simulator.supports_optimization else []:
+                decks.append(scheduler.add(
+                    f"{self.name}/capacitance/{input_port.name}/{output_port.name}",
+                    partial(self.simulate_input_capacitance, input_port, output_port),
+                    [netlist],
+                    cost=size * 10,
+                ))
+            for input_port in self.input_ports:
+                num_output_ports = len([output_port for _, output_port in self.arcs() if _ is input_port])
+                if num_output_ports == 0:
+                    continue
+                decks.append(scheduler.add(
+                    f"{self.name}/delay/{input_port.name}",
+                    partial(self.simulate_propagation_delays, input_port),
+                    [netlist],
+                    cost=size * num_output_ports * len(self.load_capacitances),
+                ))
+            results = scheduler.add(f"{self.name}/results", self.get_results, [netlist, *decks], cost=size / 100)
+            return scheduler.add(f"{self.name}/render", partial(render, self), [*checks, results], cost=size / 100, on_failure=on_failure)
+        
+    # Extracts the cell together with the rest of the library and writes its netlist
+    def schedule_netlist(self, scheduler: Scheduler, magic: Magic, magic_job: Job) -> Job:
+        size = float(self.magic_data.get_size())
+        self.magic = magic
+        magic.add(self.name)
+        extract = scheduler.add(f"{self.name}/extract", self.extract_cell, [magic_job], cost=size / 100)
+        return scheduler.add(f"{self.name}/ext2sp", self.get_netlist, [extract], cost=size / 100)
+        
+    def estimate_delay(self) -> float:
+        # Pessimistic guess [s] at the slowest arc, taking each 0.66 µm track of width as another
+        # 20 ps stage and a 5 kΩ driver for the largest load and slowest input slew
+        return 20e-12 * self.width / 0.66 + 5e3 * max(self.load_capacitances) * 1e-15 + max(self.input_slews) * 1e-9
+        
+    def get_function(self) -> None:
+        name = self.base_name(self.name)
+        try:
+            if name[-1].isdigit():
+                self.function = f"{self.n_inputs[int(name[-1])]} {self.functions[name[:-1]]}"
+            else:
+                self.function = self.functions[name]
+        except (KeyError, ValueError, IndexError):
+            raise CharacterizationError(f"Unrecognised cell name '{self.name}'")
+        
+    def get_logic_function(self, output_port: Port, functions: Dict[str, Dict[str, str]]) -> Optional[str]:
+        name = self.base_name(self.name)
+        cell_type = name[:-1] if name[-1].isdigit() else name
+        function = functions.get(cell_type, {}).get(output_port.name)
+        if function is None:
+            return None
+        return function.format(
+            **{"and": "&".join(port.name for port in self.input_ports), "or": "|".join(port.name for port in self.input_ports)}
+        )
+        
+    def check_cell(self) -> None:
+        with tracer.span("Cell.check_cell", cell=self.name):
+            run_command(
+                ["check_magic_leaf_cell", "-T", "tsmc180", self.name],
+                f"Cell '{self.name}' failed check_magic_leaf_cell",
+                warn_only=True,
+                cwd=library.directory,
+                log_filename=f"{workspace.directory('check')}/{self.name}.log",
+            )
+        
+    def extract_cell(self) -> None:
+        with tracer.span("Cell.extract_cell", cell=self.name):
+            directory = workspace.directory(self.name, "extract")
+            shutil.move(self.magic.get_extracted(self.name), f"{directory}/{self.name}.ext")
+            
+    # Converts the extracted cell once and writes the subcircuit that every deck includes
+    def get_netlist(self) -> None:
+        with tracer.span("Cell.get_netlist", cell=self.name):
+            directory = workspace.directory(self.name, "extract")
+            run_command(["ext2sp", "-f", self.name], f"Failed to convert extracted cell '{self.name}' to SPICE", cwd=directory)
+            try:
+                netlist = Netlist.read(f"{directory}/{self.name}.spice")
+            except (ValueError, IndexError) as error:
+                raise CharacterizationError(f"Failed to read the netlist of cell '{self.name}': {error}")
+            ports = [port.name for port in self.input_ports + self.output_ports] + list(Netlist.supplies)
+            if self.reduction is not None:
+                reduced = netlist.reduce(self.reduction, ports)
+                log.info(
+                    f"Reduced the netlist of cell {self.name} from {len(netlist.elements)} to {len(reduced.elements)} elements "
+                    f"and {len(netlist.nodes())} to {len(reduced.nodes())} nodes"
+                )
+                netlist = reduced
+            self.netlist_filename = f"{directory}/{self.name}.inc"
+            netlist.write(self.netlist_filename, self.name, ports)
+            
+    def save_netlist(self, directory: str) -> None:
+        shutil.copy(self.netlist_filename, os.path.join(directory, f"{self.name}.inc"))
+        
+    # A line instantiating the cell with some of its ports on the given nodes, every other input on the
+    # node named after it and every other output on a node of the instance's own
+    def instance(self, suffix: str, nodes: Dict[str, str], supply: str = "Vdd") -> str:
+        connections = [nodes.get(port.name, port.name) for port in self.input_ports]
+        connections += [nodes.get(port.name, f"{port.name}_{suffix}") for port in self.output_ports]
+        return f"X{self.name}_{suffix} {' '.join(connections)} {supply} GND {self.name}\n"
+        
+    def input_capacitance_deck(self, input_port: Port, output_port: Port, netlist_filename: str) -> str:
+        spice = "\n"
+        spice += self.corners[0].statements()
+        spice += ".param CLOAD=OPTC(0.01fF, 0.01fF, 50fF)\n"
+        spice += "Vsupply Vdd GND DC vd\n"
+        spice += f"Vin in GND {self.stimulus.pulse('0.25ns')}\n"
+        for other_input_port in self.input_ports:
+            if other_input_port.name == input_port.name:
+                continue
+            spice += f"V{other_input_port.name} {other_input_port.name} GND 0.5*vd\n"
+        spice += self.instance("driver0", {output_port.name: "mid0", input_port.name: "in"})
+        spice += self.instance("load", {output_port.name: "out", input_port.name: "mid0"})
+        spice += self.instance("driver1", {output_port.name: "mid1", input_port.name: "in"})
+        spice += "Cload mid1 GND CLOAD \n"
+        spice += ".measure TRAN tdr   TRIG v(in) VAL='vd*0.5' FALL=1 TARG v(mid0) VAL='vd*0.5' RISE=1\n"
+        spice += ".measure TRAN tdf   TRIG v(in) VAL='vd*0.5' RISE=1 TARG v(mid0) VAL='vd*0.5' FALL=1\n"
+        spice += ".measure TRAN tdavg PARAM='(tdr+tdf)/2'\n"
+        spice += ".measure TRAN tdrc   TRIG v(in) VAL='vd*0.5' FALL=1 TARG v(mid1) VAL='vd*0.5' RISE=1\n"
+        spice += ".measure TRAN tdfc   TRIG v(in) VAL='vd*0.5' RISE=1 TARG v(mid1) VAL='vd*0.5' FALL=1\n"
+        spice += ".measure TRAN tdavgc PARAM='(tdrc+tdfc)/2' GOAL=tdavg\n"
+        spice += f"{self.tier.optimizer}\n"
+        spice += f"{self.stimulus.transient()} SWEEP OPTIMIZE=optc RESULTS=tdavgc MODEL=OPT1\n"
+        spice += ".option scale=0.02u\n"
+        spice += f".include '{netlist_filename}'\n"
+        spice += Corner.alters(self.corners)
+        spice += ".end\n"
+        return spice
+        
+    def simulate_input_capacitance(self, input_port: Port, output_port: Port) -> None:
+        with tracer.span("Cell.simulate_input_capacitance", cell=self.name, arc=f"{input_port.name}->{output_port.name}"):
+            path = (self.name, "capacitance", input_port.name, output_port.name)
+            directory = workspace.directory(*path)
+            with open(f"{directory}/{self.name}.sp", "w") as spice_file:
+                spice_file.write(self.input_capacitance_deck(input_port, output_port, self.netlist_filename))
+            self.simulator.simulate(directory, self.name, f"Failed to simulate input capacitance of cell '{self.name}'")
+            for i, corner in enumerate(self.corners):
+                # The optimized load that matches the delay of the cell driving another of itself
+                capacitance = Measurements.read(f"{directory}/{self.name}.mt{i}")["cload"][0]
+                if capacitance is np.ma.masked:
+                    at = f" at corner {corner.name}" if len(self.corners) > 1 else ""
+                    log.warning(f"Failed to measure input capacitance of port {input_port.name} to {output_port.name} in cell '{self.name}'{at}")
+                else:
+                    self.capacitances[(corner.name, input_port.name, output_port.name)] = float(capacitance) * 1e15
+            workspace.remove(*path)
+        
+    # Windows [s] of the supply measures: the charge drawn after the input rises until it falls and
+    # after it falls until the end, and the quiescent current over the second half of the input
+    # being low before the first edge and high before the second
+    def power_windows(self) -> List[Tuple[str, float, float]]:
+        delay, width, stop = self.stimulus.delay, self.stimulus.width, self.stimulus.stop
+        return [
+            ("rise_charge", delay, delay + width),
+            ("fall_charge", delay + width, stop),
+            ("low_current", delay / 2, delay),
+            ("high_current", delay + width / 2, delay + width),
+        ]
+        
+    def propagation_delay_deck(self, input_port: Port, netlist_filename: str, load_capacitances: Optional[List[float]] = None) -> str:
+        # One instance of the cell per output port so each output is loaded on its own, as if it were
+        # simulated alone, while every input slew and load capacitance is swept in the same run. Each
+        # instance has a supply of its own so the power of every arc is measured in the same run too
+        output_ports = [output_port for _, output_port in self.arcs() if _ is input_port]
+        spice = "\n"
+        spice += self.corners[0].statements()
+        spice += f".param slew={self.input_slew}e-9\n"
+        spice += f".param load={self.load_capacitances[0]}e-15\n"
+        spice += ".data loads slew load\n"
+        for input_slew in self.input_slews:
+            for load_capacitance in load_capacitances or self.load_capacitances:
+                spice += f"{input_slew}e-9 {load_capacitance}e-15\n"
+        spice += ".enddata\n"
+        for i, _ in enumerate(output_ports):
+            spice += f"Vsupply{i} Vdd{i} GND vd\n"
+        spice += f"V{input_port.name} {input_port.name} GND {self.stimulus.pulse('slew')}\n"
+        # The other inputs are held where the input switches an output, so the quiescent currents
+        # before each edge are the leakage of the cell, or at half the supply without a logic function
+        levels = self.side_levels(input_port)
+        for other_input_port in self.input_ports:
+            if other_input_port.name == input_port.name:
+                continue
+            level = f"{levels[other_input_port.name]}*vd" if levels is not None else "0.5*vd"
+            spice += f"V{other_input_port.name} {other_input_port.name} GND {level}\n"
+        for i, output_port in enumerate(output_ports):
+            spice += self.instance(str(i), {output_port.name: output_port.name}, f"Vdd{i}")
+            spice += f"Cload{i} {output_port.name} GND load\n"
+        spice += f"{self.stimulus.transient()} SWEEP DATA=loads\n"
+        for i, output_port in enumerate(output_ports):
+            spice += f".measure tran rise_rise_delay{i} TRIG v({input_port.name}) VAL='vd*0.5' RISE=1 TARG  v({output_port.name}) VAL='vd*0.5' RISE=1\n"
+            spice += f".measure tran fall_rise_delay{i} TRIG v({input_port.name}) VAL='vd*0.5' FALL=1 TARG  v({output_port.name}) VAL='vd*0.5' RISE=1\n"
+            spice += f".measure tran rise_fall_delay{i} TRIG v({input_port.name}) VAL='vd*0.5' RISE=1 TARG  v({output_port.name}) VAL='vd*0.5' FALL=1\n"
+            spice += f".measure tran fall_fall_delay{i} TRIG v({input_port.name}) VAL='vd*0.5' FALL=1 TARG  v({output_port.name}) VAL='vd*0.5' FALL=1\n"
+            if len(self.input_slews) > 1:
+                spice += f".measure tran rise_transition{i} TRIG v({output_port.name}) VAL='vd*0.1' RISE=1 TARG  v({output_port.name}) VAL='vd*0.9' RISE=1\n"
+                spice += f".measure tran fall_transition{i} TRIG v({output_port.name}) VAL='vd*0.9' FALL=1 TARG  v({output_port.name}) VAL='vd*0.1' FALL=1\n"
+            for name, start, end in self.power_windows():
+                measure = "INTEG" if name.endswith("charge") else "AVG"
+                spice += f".measure tran {name}{i} {measure} i(Vsupply{i}) FROM={spice_time(start)} TO={spice_time(end)}\n"
+        if self.archive is not None:
+            # ASCII waveforms of just the input, the outputs and the supply currents
+            spice += ".options POST=2 PROBE\n"
+            spice += f".probe tran v({input_port.name}) {' '.join(f'v({output_port.name})' for output_port in output_ports)} {' '.join(f'i(Vsupply{i})' for i in range(len(output_ports)))}\n"
+        spice += ".options GMINDC=1n\n"
+        spice += ".option scale=0.02u\n"
+        spice += f".include '{netlist_filename}'\n"
+        spice += Corner.alters(self.corners)
+        spice += ".end\n"
+        return spice
+        
+    def simulate_propagation_delays(self, input_port: Port) -> None:
+        with tracer.span("Cell.simulate_propagation_delays", cell=self.name, arc=input_port.name):
+            path = (self.name, "delay", input_port.name)
+            directory = workspace.directory(*path)
+            if self.archive is not None:
+                shutil.rmtree(os.path.join(self.archive, self.name, input_port.name), ignore_errors=True)
+            if self.tolerance is None:
+                corner_measurements = self.run_propagation_delays(input_port, directory, self.load_capacitances)
+            else:
+                corner_measurements = self.sweep_loads(input_port, directory, self.tolerance)
+            output_ports = [output_port for _, output_port in self.arcs() if _ is input_port]
+            # Rows are ordered by input slew then load capacitance
+            start = self.input_slews.index(self.input_slew) * len(self.load_capacitances)
+            rows = slice(start, start + len(self.load_capacitances))
+            for corner, measurements in zip(self.corners, corner_measurements):
+                for i, output_port in enumerate(output_ports):
+                    self.delays[(corner.name, input_port.name, output_port.name)] = np.ma.stack([
+                        measurements[f"{edges}_delay{i}"][rows] for edges in ("rise_rise", "fall_rise", "rise_fall", "fall_fall")
+                    ])
+                    self.energies[(corner.name, input_port.name, output_port.name)] = self.get_energies(corner, measurements, i, rows)
+                if self.side_levels(input_port) is not None:
+                    self.leakages[(corner.name, input_port.name)] = self.get_leakages(corner, measurements, len(output_ports), rows)
+                if len(self.input_slews) > 1:
+                    for i, output_port in enumerate(output_ports):
+                        timing = self.get_timing(input_port, measurements, i)
+                        if timing is not None:
+                            self.timings[(corner.name, input_port.name, output_port.name)] = timing
+            workspace.remove(*path)
+        
+    # The measurements of each corner
+    def run_propagation_delays(self, input_port: Port, directory: str, load_capacitances: List[float]) -> List[Measurements]:
+        with tracer.span("Cell.run_propagation_delays", loads=load_capacitances):
+            with open(f"{directory}/{self.name}.sp", "w") as spice_file:
+                spice_file.write(self.propagation_delay_deck(input_port, self.netlist_filename, load_capacitances))
+            self.simulator.simulate(directory, self.name, f"Failed to simulate propagation delays of cell '{self.name}'")
+            if self.archive is not None:
+                self.archive_waveforms(input_port, directory, self.archive, load_capacitances)
+            return [Measurements.read(f"{directory}/{self.name}.mt{i}") for i in range(len(self.corners))]
+        
+    # Under {archive}/{cell}/{input}/{corner}, each row being an input slew [ns] and load capacitance [fF]
+    def archive_waveforms(self, input_port: Port, directory: str, archive: str, load_capacitances: List[float]) -> None:
+        with tracer.span("Cell.archive_waveforms", cell=self.name, arc=input_port.name):
+            for i, corner in enumerate(self.corners):
+                try:
+                    waveforms = self.simulator.read_waveforms(directory, self.name, i)
+                except (OSError, ValueError, AttributeError, IndexError) as error:
+                    log.warning(f"Failed to archive the waveforms of input {input_port.name} of cell '{self.name}' at corner {corner.name}: {error}")
+                    continue
+                waveforms.rows = [[input_slew, load_capacitance] for input_slew in self.input_slews for load_capacitance in load_capacitances]
+                waveforms.save(os.path.join(archive, self.name, input_port.name, corner.name))
+    
+    def sweep_loads(self, input_port: Port, directory: str, tolerance: float) -> List[Measurements]:
+        # Simulates the lightest and heaviest loads first, then keeps simulating the middle load of
+        # any stretch of the load grid that its ends do not predict to within the tolerance at every
+        # corner. Loads that are never simulated are interpolated between their simulated neighbours
+        loads = self.load_capacitances
+        rows: Dict[int, np.ma.MaskedArray] = {}
+        names: List[str] = []
+        timed: List[int] = []
+        pending = [0, len(loads) - 1]
+        intervals = [(0, len(loads) - 1)]
+        while len(pending) > 0:
+            pending = sorted(set(pending))
+            corner_measurements = self.run_propagation_delays(input_port, directory, [loads[k] for k in pending])
+            names = corner_measurements[0].names
+            # Only the delays and transitions [s] are held to the tolerance. The supply charges and
+            # currents are interpolated along with them, and the rest do not depend on the load
+            timed = [j for j, name in enumerate(names) if "_delay" in name or "_transition" in name]
+            # Corners x input slews x loads x measurements
+            values = np.ma.stack([measurements.values for measurements in corner_measurements]).reshape(len(self.corners), len(self.input_slews), len(pending), -1)
+            for j, k in enumerate(pending):
+                rows[k] = values[:, :, j]
+            pending: List[int] = []
+            unresolved: List[Tuple[int, int]] = []
+            while len(intervals) > 0:
+                start, end = intervals.pop()
+                middle = (start + end) // 2
+                if middle == start:
+                    continue
+                if middle not in rows:
+                    pending.append(middle)
+                    unresolved.append((start, end))
+                elif self.prediction_error(rows, start, middle, end, timed) > tolerance:
+                    intervals += [(start, middle), (middle, end)]
+            intervals = unresolved
+        simulated = sorted(rows)
+        for k in range(len(loads)):
+            if k not in rows:
+                rows[k] = self.interpolate(rows, max(i for i in simulated if i < k), k, min(i for i in simulated if i > k))
+        self.simulated_loads[input_port.name] = [loads[k] for k in simulated]
+        log.info(f"Simulated {len(simulated)} of {len(loads)} loads for input {input_port.name} of cell {self.name}")
+        values = np.ma.stack([rows[k] for k in range(len(loads))], axis=2)
+        return [Measurements(names, corner_values.reshape(-1, len(names))) for corner_values in values]
+    
+    def interpolate(self, rows: Dict[int, np.ma.MaskedArray], start: int, k: int, end: int) -> np.ma.MaskedArray:
+        loads = self.load_capacitances
+        return rows[start] + (rows[end] - rows[start]) * ((loads[k] - loads[start]) / (loads[end] - loads[start]))
+    
+    # Largest error [ps] of the given measurement columns
+    def prediction_error(self, rows: Dict[int, np.ma.MaskedArray], start: int, middle: int, end: int, columns: List[int]) -> float:
+        predicted = self.interpolate(rows, start, middle, end)[..., columns]
+        simulated = rows[middle][..., columns]
+        # A measurement failing at some loads but not others is anything but linear
+        if (np.ma.getmaskarray(predicted) != np.ma.getmaskarray(simulated)).any():
+            return np.inf
+        error = np.ma.max(np.abs(simulated - predicted))
+        return 0.0 if error is np.ma.masked else float(error) * 1e12
+        
+    # The supply current flows into the positive terminal of its source so it measures negative. The
+    # quiescent current of the state an edge settles into is taken out of the charge of its window
+    # so that only the switching is left
+    def get_energies(self, corner: Corner, measurements: Measurements, i: int, rows: slice) -> np.ma.MaskedArray:
+        (_, rise_start, rise_end), (_, fall_start, fall_end), _, _ = self.power_windows()
+        low_current = measurements[f"low_current{i}"][rows]
+        high_current = measurements[f"high_current{i}"][rows]
+        return -corner.voltage * np.ma.stack([
+            measurements[f"rise_charge{i}"][rows] - high_current * (rise_end - rise_start),
+            measurements[f"fall_charge{i}"][rows] - low_current * (fall_end - fall_start),
+        ])
+        
+    # Every instance is a whole cell, so each draws the leakage of the cell with the input low and
+    # then high. The quiescent currents do not depend on the load, so they are averaged over all
+    def get_leakages(self, corner: Corner, measurements: Measurements, num_instances: int, rows: slice) -> np.ma.MaskedArray:
+        currents = np.ma.stack([
+            np.ma.stack([measurements[f"{name}{i}"][rows] for i in range(num_instances)])
+            for name in ("low_current", "high_current")
+        ])
+        return -corner.voltage * currents.reshape(2, -1).mean(axis=1)
+        
+    # Levels (0 or 1) of every input for measuring leakage: each input low and then high, with the
+    # others at the first levels under which it switches an output, or all low where none do. Only
+    # cells whose outputs all have a logic function have them. Sequential cells have none, and
+    # their state at DC could be anything, even metastable
+    def leakage_states(self) -> List[Tuple[Port, Dict[str, int]]]:
+        functions = [self.get_logic_function(output_port, self.logic_functions) for output_port in self.output_ports]
+        if len(functions) == 0 or None in functions:
+            return []
+        names = [port.name for port in self.input_ports]
+        states: List[Tuple[Port, Dict[str, int]]] = []
+        for input_port in self.input_ports:
+            others = [name for name in names if name != input_port.name]
+            assignments = [{name: (k >> j) & 1 for j, name in enumerate(others)} for k in range(2 ** len(others))]
+            switching = [levels for levels in assignments if self.get_outputs({**levels, input_port.name: 0}) != self.get_outputs({**levels, input_port.name: 1})]
+            levels = (switching or assignments)[0]
+            states += [(input_port, {**levels, input_port.name: 0}), (input_port, {**levels, input_port.name: 1})]
+        return states
+        
+    # Levels of the other inputs while the input switches, or None without a logic function
+    def side_levels(self, input_port: Port) -> Optional[Dict[str, int]]:
+        return next((levels for port, levels in self.leakage_states() if port is input_port), None)
+        
+    # Logic level of every output for the given input levels, or None for an output that is off
+    def get_outputs(self, levels: Dict[str, int]) -> List[Optional[int]]:
+        outputs: List[Optional[int]] = []
+        for output_port in self.output_ports:
+            function = self.get_logic_function(output_port, self.logic_functions)
+            three_state = self.get_logic_function(output_port, self.three_state_functions)
+            if three_state is not None and self.evaluate(three_state, levels):
+                outputs.append(None)
+            elif function is not None:
+                outputs.append(self.evaluate(function, levels))
+        return outputs
+        
+    # Liberty's ! binds tightest like Python's ~, which sets every higher bit, so only bit 0 counts
+    @staticmethod
+    def evaluate(function: str, levels: Dict[str, int]) -> int:
+        return int(eval(function.replace("!", "~"), {"__builtins__": {}}, dict(levels))) & 1
+        
+    def get_timing(self, input_port: Port, measurements: Measurements, i: int) -> Optional[Port.Timing]:
+        shape = (len(self.input_slews), len(self.load_capacitances))
+        rise_rise, fall_rise, rise_fall, fall_fall, rise_transition, fall_transition = [
+            measurements[f"{name}{i}"].reshape(shape)
+            for name in ("rise_rise_delay", "fall_rise_delay", "rise_fall_delay", "fall_fall_delay", "rise_transition", "fall_transition")
+        ]
+        if any(np.ma.is_masked(table) for table in (rise_rise, fall_rise, rise_fall, fall_fall, rise_transition, fall_transition)):
+            return None
+        table: Callable[[np.ndarray], List[List[float]]] = lambda values: round_array(np.maximum(values, 0) * 1e9, 5).tolist()
+        timing = Port.Timing(input_port.name, self.input_slews, self.load_capacitances)
+        timing.cell_rise = table(np.maximum(rise_rise.data, fall_rise.data))
+        timing.cell_fall = table(np.minimum(np.maximum(rise_fall.data, 0), np.maximum(fall_fall.data, 0)))
+        timing.rise_transition = table(rise_transition.data)
+        timing.fall_transition = table(fall_transition.data)
+        return timing
+        
+    def get_results(self) -> None:
+        with tracer.span("Cell.get_results", cell=self.name):
+            for corner in self.corners:
+                self.get_corner_results(corner)
+            workspace.remove(self.name)
+            if self.cache.enabled:
+                self.cache.store(self.cache_key, self.to_dict())
+        
+    def get_corner_results(self, corner: Corner) -> None:
+        for input_port in self.input_ports:
+            capacitances = [
+                self.capacitances[(corner.name, input_port.name, output_port.name)]
+                for _, output_port in self.arcs()
+                if _ is input_port and (corner.name, input_port.name, output_port.name) in self.capacitances
+            ]
+            if len(capacitances) == 0:
+                continue
+            input_port.results[corner.name].capacitance = round(sum(capacitances) / len(capacitances), 2)
+        for input_port in self.input_ports:
+            output_ports = [output_port for _, output_port in self.arcs() if _ is input_port]
+            if len(output_ports) == 0:
+                continue
+            results = input_port.results[corner.name]
+            # Each of output ports x load capacitances
+            rise_rise, fall_rise, rise_fall, fall_fall = np.ma.stack(
+                [self.delays[(corner.name, input_port.name, output_port.name)] for output_port in output_ports], axis=1
+            )
+            # The slower of the rising output delays but the faster of the falling ones, ignoring
+            # edges that were not measured and clamping negative delays to zero [ps]
+            rise = round_array(np.maximum(np.maximum(rise_rise.filled(0), fall_rise.filled(0)), 0) * 1e12, 2)
+            fall = round_array(np.minimum(np.maximum(rise_fall, 0).filled(np.inf), np.maximum(fall_fall, 0).filled(np.inf)) * 1e12, 2)
+            average = round_array((rise + fall) / 2, 2)
+            # A load is only reported if every output switched both ways
+            unmeasured = [np.ma.getmaskarray(delays) for delays in (rise_rise, fall_rise, rise_fall, fall_fall)]
+            failed = (unmeasured[0] & unmeasured[1]) | (unmeasured[2] & unmeasured[3])
+            simulated_loads = self.simulated_loads.get(input_port.name, self.load_capacitances)
+            # Rising and falling input x load capacitances [fJ], averaged over the output ports
+            energies = np.ma.stack([self.energies[(corner.name, input_port.name, output_port.name)] for output_port in output_ports]).mean(axis=0) * 1e15
+            for j in np.flatnonzero(~failed.any(axis=0)):
+                rise_energy, fall_energy = [None if energy is np.ma.masked else round(float(energy), 2) for energy in energies[:, j]]
+                results.propagation_delays.append(Port.PropagationDelay(
+                    self.load_capacitances[j],
+                    float(rise[:, j].sum() / len(output_ports)),
+                    float(fall[:, j].sum() / len(output_ports)),
+                    float(average[:, j].sum() / len(output_ports)),
+                    self.load_capacitances[j] in simulated_loads,
+                    rise_energy,
+                    fall_energy,
+                ))
+            # Each arc on its own, for static timing
+            for k, output_port in enumerate(output_ports):
+                switched = np.flatnonzero(~failed[k])
+                if len(switched) > 0:
+                    output_port.results[corner.name].arcs.append(Port.Arc(
+                        input_port.name,
+                        [self.load_capacitances[j] for j in switched],
+                        [float(rise[k, j]) for j in switched],
+                        [float(fall[k, j]) for j in switched],
+                    ))
+            if (corner.name, input_port.name) in self.leakages:
+                leakages = self.leakages[(corner.name, input_port.name)] * 1e9
+                results.leakage = {state: round(float(leakage), 3) for state, leakage in zip(("low", "high"), leakages) if leakage is not np.ma.masked}
+            if self.tolerance is not None:
+                results.delay_model = self.get_delay_model(results, simulated_loads)
+        for input_port, output_port in self.arcs():
+            if (corner.name, input_port.name, output_port.name) in self.timings:
+                output_port.results[corner.name].timings.append(self.timings[(corner.name, input_port.name, output_port.name)])
+        
+    def get_delay_model(self, results: Port.Results, simulated_loads: List[float]) -> Optional[Port.DelayModel]:
+        propagation_delays = [propagation_delay for propagation_delay in results.propagation_delays if propagation_delay.simulated]
+        if len(propagation_delays) < 2:
+            return None
+        loads = [propagation_delay.load_capacitance for propagation_delay in propagation_delays]
+        rise_resistance, intrinsic_rise_delay = np.polyfit(loads, [propagation_delay.rise_delay for propagation_delay in propagation_delays], 1)
+        fall_resistance, intrinsic_fall_delay = np.polyfit(loads, [propagation_delay.fall_delay for propagation_delay in propagation_delays], 1)
+        return Port.DelayModel(
+            round(float(intrinsic_rise_delay), 2),
+            round(float(rise_resistance), 3),
+            round(float(intrinsic_fall_delay), 2),
+            round(float(fall_resistance), 3),
+            simulated_loads,
+        )
+        
+    def load_results(self, data: Dict[str, Any]) -> None:
+        with tracer.span("Cell.load_results", cell=self.name):
+            self.width = data["width"]
+            self.height = data["height"]
+            self.area = data["area"]
+            self.html = data["html"]
+            for port, port_data in zip(self.ports, data["ports"]):
+                port.positions = [Coordinate(x, y) for x, y in port_data["positions"]]
+                for corner_name, corner_data in port_data["results"].items():
+                    results = port.results[corner_name]
+                    results.capacitance = corner_data["capacitance"]
+                    results.propagation_delays = [Port.PropagationDelay(*propagation_delay) for propagation_delay in corner_data["propagation_delays"]]
+                    results.delay_model = None if corner_data["delay_model"] is None else Port.DelayModel(**corner_data["delay_model"])
+                    results.timings = [Port.Timing.from_dict(timing) for timing in corner_data["timings"]]
+                    results.leakage = corner_data["leakage"]
+                    results.arcs = [Port.Arc(**arc) for arc in corner_data["arcs"]]
+            
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "html": self.render(),
+            "width": self.width,
+            "height": self.height,
+            "area": self.area,
+            "ports": [
+                {
+                    "name": port.name,
+                    "direction": port.direction,
+                    "positions": [(position.x, position.y) for position in port.positions],
+                    "results": {
+                        corner.name: {
+                            "capacitance": port.results[corner.name].capacitance,
+                            "propagation_delays": [
+                                (
+                                    propagation_delay.load_capacitance,
+                                    propagation_delay.rise_delay,
+                                    propagation_delay.fall_delay,
+                                    propagation_delay.average_delay,
+                                    propagation_delay.simulated,
+                                    propagation_delay.rise_energy,
+                                    propagation_delay.fall_energy,
+                                )
+                                for propagation_delay in port.results[corner.name].propagation_delays
+                            ],
+                            "delay_model": None if port.results[corner.name].delay_model is None else vars(port.results[corner.name].delay_model),
+                            "timings": [timing.to_dict() for timing in port.results[corner.name].timings],
+                            "leakage": port.results[corner.name].leakage,
+                            "arcs": [vars(arc) for arc in port.results[corner.name].arcs],
+                        }
+                        for corner in self.corners
+                    },
+                }
+                for port in self.ports
+            ],
+        }
+    
+    
+    def render(self) -> str:
+        with tracer.span("Cell.render", cell=self.name):
+            if self.html is not None:
+                return self.html
+            lines = [
+                "\t\t<hr>",
+                f"\t\t<h2>Cell Name: <code>{self.name}</code></h2>",
+                f"\t\t<h3>Function</h3>",
+                f"\t\t\t<p>{self.function}</p>",
+                "\t\t\t<h3>Ports</h3>",
+                "\t\t\t\t<table cellpadding='2' cellspacing='2' border='1'>",
+                "\t\t\t\t\t<tr><th>Name</th><th>Direction</th><th>Positions (x, y) [µm]</th></tr>",
+            ]
+            for port in self.ports:
+                lines.append(f"\t\t\t\t\t<tr><td>{port.name}</td><td>{port.direction}</td><td>" + ", ".join([str(position) for position in port.positions]) + "</td></tr>")
+            lines.append("\t\t\t\t</table>")
+            for corner in self.corners:
+                lines += self.render_results(corner)
+            lines.append(f"\t\t\t<h3>Dimensions</h3>")
+            lines.append(f"\t\t\t\t<p>Width:  {self.width} µm</p>")
+            lines.append(f"\t\t\t\t<p>Height: {self.height} µm</p>")
+            lines.append(f"\t\t\t<h3>Area</h3>")
+            lines.append(f"\t\t\t\t<p>{self.area} µm²</p>")
+            self.html = "\n".join(lines) + "\n"
+            return self.html
+        
+    # The tables of one corner, headed with the corner if there are several
+    def render_results(self, corner: Corner) -> List[str]:
+        at = f" ({corner})" if len(self.corners) > 1 else ""
+        lines: List[str] = []
+        if len(self.input_ports) > 0:
+            lines.append(f"\t\t\t<h3>Input Capacitances{at}</h3>")
+            lines.append("\t\t\t\t<table cellpadding='2' cellspacing='2' border='1'>")
+            lines.append("\t\t\t\t\t<tr><th>Port</th><th>Capacitance [fF]</th></tr>")
+            for port in self.input_ports:
+                lines.append(f"\t\t\t\t\t<tr><td>{port.name}</td><td>{port.results[corner.name].capacitance}</td></tr>")
+            lines.append("\t\t\t\t</table>")
+            lines.append(f"\t\t\t<h3>Propagation Delays{at}</h3>")
+            lines.append("\t\t\t\t<table cellpadding='2' cellspacing='2' border='1'>")
+            lines.append("\t\t\t\t\t<tr><th>Port</th><th>Load Capacitance [fF]</th><th>Rise Delay [ps]</th><th>Fall Delay [ps]</th><th>Average Delay [ps]</th></tr>")
+            for port in self.ports:
+                for propagation_delay in port.results[corner.name].propagation_delays:
+                    delays = [propagation_delay.rise_delay, propagation_delay.fall_delay, propagation_delay.average_delay]
+                    cells = "".join(f"<td>{delay}</td>" if propagation_delay.simulated else f"<td><i>{delay}</i></td>" for delay in delays)
+                    lines.append(f"\t\t\t\t\t<tr><td>{port.name}</td><td>{propagation_delay.load_capacitance}</td>{cells}</tr>")
+        lines.append("\t\t\t\t</table>")
+        if any(not propagation_delay.simulated for port in self.input_ports for propagation_delay in port.results[corner.name].propagation_delays):
+            lines.append("\t\t\t\t<p>Delays in italics are interpolated between simulated loads.</p>")
+        lines += self.render_power(corner, at)
+        if any(port.results[corner.name].delay_model is not None for port in self.input_ports):
+            lines.append(f"\t\t\t<h3>Delay Model{at}</h3>")
+            lines.append("\t\t\t\t<table cellpadding='2' cellspacing='2' border='1'>")
+            lines.append("\t\t\t\t\t<tr><th>Port</th><th>Intrinsic Rise Delay [ps]</th><th>Rise Resistance [kΩ]</th><th>Intrinsic Fall Delay [ps]</th><th>Fall Resistance [kΩ]</th><th>Simulated Loads [fF]</th></tr>")
+            for port in self.input_ports:
+                model = port.results[corner.name].delay_model
+                if model is not None:
+                    lines.append(f"\t\t\t\t\t<tr><td>{port.name}</td><td>{model.intrinsic_rise_delay}</td><td>{model.rise_resistance}</td><td>{model.intrinsic_fall_delay}</td><td>{model.fall_resistance}</td><td>{', '.join(str(load) for load in model.simulated_loads)}</td></tr>")
+            lines.append("\t\t\t\t</table>")
+        return lines
+        
+    def render_power(self, corner: Corner, at: str) -> List[str]:
+        lines: List[str] = []
+        propagation_delays = [
+            (port, propagation_delay)
+            for port in self.input_ports
+            for propagation_delay in port.results[corner.name].propagation_delays
+            if propagation_delay.rise_energy is not None or propagation_delay.fall_energy is not None
+        ]
+        if len(propagation_delays) > 0:
+            lines.append(f"\t\t\t<h3>Switching Energy{at}</h3>")
+            lines.append("\t\t\t\t<table cellpadding='2' cellspacing='2' border='1'>")
+            lines.append("\t\t\t\t\t<tr><th>Port</th><th>Load Capacitance [fF]</th><th>Input Rise Energy [fJ]</th><th>Input Fall Energy [fJ]</th></tr>")
+            for port, propagation_delay in propagation_delays:
+                energies = ["N/A" if energy is None else energy for energy in (propagation_delay.rise_energy, propagation_delay.fall_energy)]
+                cells = "".join(f"<td>{energy}</td>" if propagation_delay.simulated else f"<td><i>{energy}</i></td>" for energy in energies)
+                lines.append(f"\t\t\t\t\t<tr><td>{port.name}</td><td>{propagation_delay.load_capacitance}</td>{cells}</tr>")
+            lines.append("\t\t\t\t</table>")
+        ports = [port for port in self.input_ports if len(port.results[corner.name].leakage) > 0]
+        if len(ports) > 0:
+            lines.append(f"\t\t\t<h3>Leakage Power{at}</h3>")
+            lines.append("\t\t\t\t<table cellpadding='2' cellspacing='2' border='1'>")
+            lines.append("\t\t\t\t\t<tr><th>Port</th><th>Input Low [nW]</th><th>Input High [nW]</th></tr>")
+            for port in ports:
+                leakage = port.results[corner.name].leakage
+                lines.append(f"\t\t\t\t\t<tr><td>{port.name}</td><td>{leakage.get('low', 'N/A')}</td><td>{leakage.get('high', 'N/A')}</td></tr>")
+            lines.append("\t\t\t\t</table>")
+            lines.append("\t\t\t\t<p>Every other input is held at the logic levels under which the input switches an output.</p>")
+        return lines
+        
+    def __str__(self) -> str:
+        return self.render()
@@ -0,0 +1,320 @@
+import os, sys, re, argparse, time
+from typing import List, Dict, Set, Callable, Optional
+
+from .errors import FatalError
+from .log import log, tracer
+from .tools import runner, workspace
+from .magic import MagFile, library
+from .lint import Lint
+from .spice import Corner, corners, simulators, tiers
+from .scheduler import Cache, Journal
+from .cell import Cell, Netlist
+from .book import Databook
+from .layout import Layout, StaticTiming
+from .watch import Watcher
+from .liberty import Liberty
+
+
+def cleanup() -> None:
+    workspace.close()
+    log.close()
+
+
+def parse_corner(text: str) -> Corner:
+    if text in corners:
+        return corners[text]
+    match = re.fullmatch(r"(\w+)=(\w+),([-+\d.]+),([\d.]+)", text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"'{text}' is neither a known corner nor NAME=SECTION,TEMPERATURE,VOLTAGE")
+    try:
+        return Corner(match.group(1), match.group(2), float(match.group(3)), float(match.group(4)))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' has an invalid temperature or voltage")
+
+
+# Options of every command
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--cells", action="append", type=lambda text: text.split(","), metavar="CELLS", help="only work on CELLS, comma separated names or globs such as 'nand*' (can be repeated, default: every cell)")
+    parser.add_argument("--cell-dir", default=".", metavar="DIRECTORY", help="directory to read the .mag files from (default: the current directory)")
+    parser.add_argument("--out-dir", default=".", metavar="DIRECTORY", help="directory to write the data book, logs, cache and journal to, which relative output files are also written under (default: the current directory)")
+    parser.add_argument("--trace", metavar="FILE", help="write how long each stage took to FILE as a Chrome trace (for chrome://tracing or Perfetto) and log a summary")
+
+
+def add_job_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="number of extraction and simulation jobs to run in parallel")
+
+
+# Options of the commands that run the tools
+def add_tool_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--timeout", type=float, default=3600, metavar="SECONDS", help="kill any tool that runs for longer than SECONDS (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=0, metavar="N", help="rerun a failed or timed out tool up to N times (default: %(default)s)")
+    parser.add_argument("--scratch-dir", metavar="DIRECTORY", help="directory to write the intermediate files of each run under (default: /dev/shm if it exists, otherwise the system temporary directory)")
+    parser.add_argument("--keep-artifacts", action="store_true", help="keep the intermediate files (netlists, decks, listings and measurements) for debugging instead of removing them")
+
+
+def add_netlist_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--reduce-netlist", action="store_true", help="simplify each extracted netlist before simulating it, grounding small coupling capacitors and shorting small resistors")
+    parser.add_argument("--min-capacitance", type=float, default=0.01, metavar="FF", help="coupling capacitors that --reduce-netlist grounds (default: below %(default)s fF)")
+    parser.add_argument("--min-resistance", type=float, default=1.0, metavar="OHMS", help="resistors that --reduce-netlist shorts (default: below %(default)s Ω)")
+
+
+# Options that change the results, so rendering from the cache must be given the same ones as
+# characterizing was to find them
+def add_result_arguments(parser: argparse.ArgumentParser) -> None:
+    add_netlist_arguments(parser)
+    parser.add_argument("--simulator", choices=simulators, default="hspice", help="circuit simulator to characterize the cells with (default: %(default)s)")
+    parser.add_argument("--adaptive", action="store_true", help="only simulate the loads needed to interpolate the rest to within the tolerance")
+    parser.add_argument("--tolerance", type=float, default=1.0, metavar="PS", help="largest interpolation error allowed by --adaptive (default: %(default)s ps)")
+    parser.add_argument("--tier", choices=tiers, default="signoff", help="fast scales the simulated time and step to each cell, signoff simulates every cell exactly (default: %(default)s)")
+    parser.add_argument("--corner", type=parse_corner, action="append", metavar="CORNER", help=f"characterize the cells at CORNER, one of {', '.join(corners)} or NAME=SECTION,TEMPERATURE,VOLTAGE for the SECTION of the model library at TEMPERATURE [°C] and VOLTAGE [V] (can be repeated, default: nominal)")
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate an HTML data book for the tsmc180 cell library")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND", help="characterize (the default), lint, extract, render or export")
+    lint = subparsers.add_parser("lint", help="only check the geometry of the cells, without extracting or simulating them")
+    add_common_arguments(lint)
+    lint.add_argument("--rows", nargs="?", const="all.mag", metavar="LAYOUT", help="check the placement of the cells in LAYOUT (default: all.mag) instead")
+    extract = subparsers.add_parser("extract", help="only extract the cells, writing their SPICE netlists to the netlists directory")
+    add_common_arguments(extract)
+    add_job_arguments(extract)
+    add_tool_arguments(extract)
+    add_netlist_arguments(extract)
+    characterize = subparsers.add_parser("characterize", help="extract and simulate the cells and write the data book")
+    add_common_arguments(characterize)
+    add_job_arguments(characterize)
+    add_tool_arguments(characterize)
+    add_result_arguments(characterize)
+    characterize.add_argument("--no-cache", action="store_true", help="characterize every cell without reading or writing the results cache")
+    characterize.add_argument("--refresh", action="append", default=[], metavar="CELL", help="re-characterize CELL even if it has cached results (can be repeated)")
+    characterize.add_argument("--cache-size", type=int, default=100, metavar="MB", help="maximum size of the results cache (default: %(default)s MB)")
+    characterize.add_argument("--resume", action="store_true", help="keep the cells finished by the last run, as recorded in journal.jsonl, and characterize the rest")
+    characterize.add_argument("--waveforms", nargs="?", const="waveforms", metavar="DIRECTORY", help="archive the input, output and supply current waveforms of every delay simulation under DIRECTORY (default: waveforms), simulating every cell without the cache")
+    characterize.add_argument("--timing", nargs="?", const="all.mag", metavar="LAYOUT", help="after characterizing the cells, report the critical paths through LAYOUT (default: all.mag) from their delays")
+    characterize.add_argument("--liberty", metavar="FILE", help="also sweep input slews and write the library to FILE in Liberty format")
+    characterize.add_argument("--watch", action="store_true", help="keep running after characterizing the library, and characterize cells again whenever their .mag files change")
+    characterize.add_argument("--debounce", type=float, default=0.5, metavar="SECONDS", help="with --watch, wait until a file has not changed for SECONDS before characterizing it (default: %(default)s)")
+    render = subparsers.add_parser("render", help="write the data book from the cached results, without running any tools")
+    add_common_arguments(render)
+    add_job_arguments(render)
+    add_result_arguments(render)
+    render.add_argument("--timing", nargs="?", const="all.mag", metavar="LAYOUT", help="also report the critical paths through LAYOUT (default: all.mag) from the delays of the cells")
+    render.add_argument("--swept-slews", action="store_true", help="render the results of characterize --liberty, which sweeps input slews")
+    export = subparsers.add_parser("export", help="write the library in Liberty format from the cached results of characterize --liberty, without running any tools")
+    add_common_arguments(export)
+    add_job_arguments(export)
+    add_result_arguments(export)
+    export.add_argument("liberty", nargs="?", default="tsmc180.lib", metavar="FILE", help="file to write the library to (default: %(default)s)")
+    argv = sys.argv[1:] if argv is None else argv
+    # Characterizing is what script.py always did, so it needs no command
+    if len(argv) == 0 or (argv[0] not in subparsers.choices and argv[0] not in ("-h", "--help")):
+        argv = ["characterize", *argv]
+    arguments = parser.parse_args(argv)
+    arguments.cells = [pattern for patterns in arguments.cells for pattern in patterns] if arguments.cells else None
+    return arguments
+
+
+# Output files are written under the output directory and layouts are read from the cell
+# directory, unless they are given as absolute paths
+def output_path(arguments: argparse.Namespace, filename: str) -> str:
+    return os.path.join(arguments.out_dir, filename)
+
+
+def layout_path(filename: str) -> str:
+    return os.path.join(library.directory, filename)
+
+
+def configure(arguments: argparse.Namespace) -> None:
+    os.makedirs(arguments.out_dir, exist_ok=True)
+    log.directory = output_path(arguments, "logs")
+    if not os.path.isdir(arguments.cell_dir):
+        log.error(f"Cell directory '{arguments.cell_dir}' does not exist")
+    library.directory = arguments.cell_dir
+    library.patterns = arguments.cells
+    for pattern in library.unmatched():
+        log.warning(f"No cell matches '{pattern}'")
+    if "timeout" in arguments:
+        runner.timeout = arguments.timeout
+        workspace.base_directory = arguments.scratch_dir
+        workspace.keep = arguments.keep_artifacts
+    if "jobs" in arguments:
+        runner.limit = arguments.jobs
+
+
+# Rendering and exporting only read the cache, so they keep no journal
+def get_databook(arguments: argparse.Namespace, input_slews: List[float], simulate: bool = True, archive: Optional[str] = None) -> Databook:
+    simulator = simulators[arguments.simulator]()
+    if simulate and not simulator.supports_optimization:
+        log.warning(f"Input capacitance cannot be characterized with {simulator.name}")
+    if archive is not None and not simulator.supports_waveforms:
+        log.error(f"The {simulator.name} simulator writes no waveforms to archive")
+    characterization_corners: List[Corner] = arguments.corner or [corners["nominal"]]
+    if len({corner.name for corner in characterization_corners}) < len(characterization_corners):
+        log.error("Every corner must have a different name")
+    # An .alter can only swap one section of the model library for another
+    if len({corner.section is None for corner in characterization_corners}) > 1:
+        log.error("Either every corner or none of them must name a section of the model library")
+    if simulate:
+        # Cached cells are not simulated, so they would have no waveforms
+        cache = Cache(output_path(arguments, ".cache"), arguments.cache_size * 1024 * 1024, not arguments.no_cache and archive is None, arguments.refresh)
+        journal = Journal(arguments.resume, output_path(arguments, "journal.jsonl"))
+    else:
+        cache = Cache(output_path(arguments, ".cache"))
+        journal = Journal(enabled=False)
+    return Databook(
+        arguments.jobs,
+        cache,
+        simulator,
+        input_slews,
+        arguments.tolerance if arguments.adaptive else None,
+        tiers[arguments.tier],
+        journal,
+        getattr(arguments, "retries", 0),
+        characterization_corners,
+        archive,
+        get_reduction(arguments),
+        arguments.out_dir,
+        simulate,
+    )
+
+
+def get_reduction(arguments: argparse.Namespace) -> Optional[Netlist.Reduction]:
+    return Netlist.Reduction(arguments.min_capacitance, arguments.min_resistance) if arguments.reduce_netlist else None
+
+
+def lint(arguments: argparse.Namespace) -> None:
+    if arguments.rows is not None:
+        Layout(layout_path(arguments.rows)).check()
+        return
+    checks = Lint(library.cells())
+    checks.check()
+    checks.report()
+
+
+def extract(arguments: argparse.Namespace) -> None:
+    databook = Databook(arguments.jobs, Cache(enabled=False), simulators["hspice"](), retries=arguments.retries, journal=Journal(enabled=False), reduction=get_reduction(arguments), directory=arguments.out_dir)
+    databook.extract(library.cells(), output_path(arguments, "netlists"))
+
+
+def characterize(arguments: argparse.Namespace) -> None:
+    waveforms = output_path(arguments, arguments.waveforms) if arguments.waveforms is not None else None
+    databook = get_databook(arguments, Liberty.input_slews if arguments.liberty else [Cell.input_slew], archive=waveforms)
+    databook.get_cells(library.cells())
+    databook.write()
+    if arguments.liberty:
+        Liberty(databook.cells, databook.corners).write(output_path(arguments, arguments.liberty))
+    if arguments.timing is not None:
+        report_timing(layout_path(arguments.timing), databook)
+    if arguments.watch:
+        watch(databook, arguments)
+    databook.close()
+
+
+def render(arguments: argparse.Namespace) -> None:
+    databook = get_databook(arguments, Liberty.input_slews if arguments.swept_slews else [Cell.input_slew], simulate=False)
+    databook.get_cells(library.cells())
+    databook.write()
+    if arguments.timing is not None:
+        report_timing(layout_path(arguments.timing), databook)
+
+
+def export(arguments: argparse.Namespace) -> None:
+    databook = get_databook(arguments, Liberty.input_slews, simulate=False)
+    databook.get_cells(library.cells(), write=False)
+    Liberty(databook.cells, databook.corners).write(output_path(arguments, arguments.liberty))
+
+
+def report_timing(filename: str, databook: Databook) -> None:
+    timing = StaticTiming(Layout(filename, {cell.name: cell for cell in databook.cells}))
+    for corner in databook.corners:
+        timing.report(corner, f" at corner {corner.name}" if len(databook.corners) > 1 else "")
+
+
+def get_uses(cell_name: str) -> Set[str]:
+    try:
+        return {use.cell_name for use in MagFile(library.path(cell_name)).uses}
+    except OSError:
+        return set()
+
+
+# Keeps the databook up to date while cells are edited: changed cells are characterized again and
+# the layouts that use them, directly or through other layouts, are checked again. Everything else
+# (the cache and its tool hashes, the runner and the characterized cells) stays loaded in between
+def watch(databook: Databook, arguments: argparse.Namespace) -> None:
+    watcher = Watcher(library.directory, arguments.debounce)
+    # Cells used by each layout
+    layouts = {name: uses for name, uses in ((name, get_uses(name)) for name in watcher.modified) if len(uses) > 0}
+    write_trace(arguments)
+    log.info(f"Watching for changes to the cells using {watcher.method}, press Ctrl+C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            for name in changed:
+                layouts[name] = get_uses(name)
+                if len(layouts[name]) == 0:
+                    del layouts[name]
+            try:
+                updated = databook.update(sorted(name for name in changed if name not in layouts and library.selects(name)))
+                if arguments.liberty and len(updated) > 0:
+                    Liberty(databook.cells, databook.corners).write(output_path(arguments, arguments.liberty))
+                affected = {name for name in changed if name in layouts}
+                while True:
+                    users = {layout for layout, uses in layouts.items() if layout not in affected and len(uses & (set(updated) | affected)) > 0}
+                    if len(users) == 0:
+                        break
+                    affected |= users
+                cells = {cell.name: cell for cell in databook.cells}
+                for layout in sorted(affected):
+                    if os.path.exists(library.path(layout)):
+                        Layout(library.path(layout), cells).check()
+                        if arguments.timing is not None and os.path.abspath(layout_path(arguments.timing)) == os.path.abspath(library.path(layout)):
+                            report_timing(layout_path(arguments.timing), databook)
+            except FatalError:
+                # Already logged, and the next save may well fix it
+                continue
+            finally:
+                write_trace(arguments)
+            log.info(f"Updated {len(updated)} cells and checked {len(affected)} layouts in {round(time.perf_counter() - start, 2)} s")
+    except KeyboardInterrupt:
+        log.info("Stopped watching")
+    finally:
+        watcher.close()
+
+
+commands: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "lint": lint,
+    "extract": extract,
+    "characterize": characterize,
+    "render": render,
+    "export": export,
+}
+
+
+# Writes the spans of the run so far, if asked to, and forgets them. Watching writes the trace of
+# each update over the last one
+def write_trace(arguments: argparse.Namespace) -> None:
+    if arguments.trace is not None and len(tracer.spans) > 0:
+        tracer.write(output_path(arguments, arguments.trace))
+        tracer.summarize()
+    tracer.clear()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arguments = parse_arguments(argv)
+    configure(arguments)
+    commands[arguments.command](arguments)
+    write_trace(arguments)
+    exit(log.result())
+
+
+def run(argv: Optional[List[str]] = None) -> None:
+    # Fatal errors were logged where they were raised, so they end the script without a traceback
+    try:
+        main(argv)
+    except FatalError:
+        cleanup()
+        exit(1)
+    except Exception as exception:
+        cleanup()
+        raise exception
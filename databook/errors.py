@@ -0,0 +1,14 @@
+
+# Raised for anything that stops the whole run, once it has been logged
+class FatalError(Exception):
+    pass
+
+
+# Raised for anything that stops one cell from being characterized, without stopping the others
+class CharacterizationError(Exception):
+    pass
+
+
+# A tool failed or timed out, which may not happen again if it is rerun
+class ToolError(CharacterizationError):
+    pass
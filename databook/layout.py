@@ -0,0 +1,495 @@
+import time
+from typing import List, Dict, Mapping, Tuple, Callable, Optional
+from datetime import datetime
+import numpy as np
+
+from .errors import CharacterizationError
+from .log import log, tracer
+from .magic import MagFile, library
+from .spice import Corner
+from .cell import Cell, Footprint, Port
+
+
+# Flattens the placed rows of a layout into instances of leaf cells and checks their placement. The
+# instance boxes go into a uniform grid of about one instance per bin, so finding the neighbours of
+# an instance only looks at the few bins it covers however large the layout is
+class Layout:
+    # Magic's internal units per µm
+    scale = 50
+    pitch = 33
+    
+    
+    class Instance:
+        def __init__(
+            self,
+            cell_name: str,
+            path: str,
+            transform: Tuple[int, int, int, int, int, int],
+            cell_box: Tuple[int, int, int, int],
+        ) -> None:
+            self.cell_name = cell_name
+            self.path = path
+            self.transform = transform
+            # Bounding box of the cell in its own coordinates
+            self.cell_box = cell_box
+            
+            
+    # Every box is entered in each bin it covers or touches, so abutting boxes always share a bin
+    class GridIndex:
+        def __init__(self, boxes: np.ndarray, bin_width: int, bin_height: int) -> None:
+            self.bin_width = max(bin_width, 1)
+            self.bin_height = max(bin_height, 1)
+            x0, y0 = boxes[:, 0] // self.bin_width, boxes[:, 1] // self.bin_height
+            columns = boxes[:, 2] // self.bin_width - x0 + 1
+            rows = boxes[:, 3] // self.bin_height - y0 + 1
+            counts = columns * rows
+            items = np.repeat(np.arange(len(boxes)), counts)
+            # Position of each entry within its box's bins
+            offsets: np.ndarray = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            keys = self.key(x0[items] + offsets // rows[items], y0[items] + offsets % rows[items])
+            order = np.argsort(keys, kind="stable")
+            self.keys = keys[order]
+            self.items = items[order]
+            
+        @staticmethod
+        def key(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+            return (x << 32) + y
+        
+        def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+            # Every pair of boxes sharing a bin, each pair once with the lower index first
+            first: List[np.ndarray] = []
+            second: List[np.ndarray] = []
+            for distance in range(1, len(self.keys)):
+                same_bin = self.keys[distance:] == self.keys[:-distance]
+                if not same_bin.any():
+                    break
+                first.append(self.items[:-distance][same_bin])
+                second.append(self.items[distance:][same_bin])
+            if len(first) == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+            first_items, second_items = np.concatenate(first), np.concatenate(second)
+            count = int(self.items.max()) + 1
+            pairs = np.unique(np.minimum(first_items, second_items) * count + np.maximum(first_items, second_items))
+            first_items, second_items = pairs // count, pairs % count
+            distinct = first_items != second_items
+            return first_items[distinct], second_items[distinct]
+        
+        
+    def __init__(self, filename: str, cells: Optional[Mapping[str, Footprint]] = None) -> None:
+        self.filename = filename
+        self.cells = dict(cells or {})
+        self.mag_files: Dict[str, MagFile] = {}
+        self.instances: List[Layout.Instance] = []
+        # Name, layer and box of every label in the layouts, named by their path except global nets
+        self.labels: List[Tuple[str, str, Tuple[int, int, int, int]]] = []
+        self.mag_file = MagFile(filename)
+        self.flatten(self.mag_file, (1, 0, 0, 0, 1, 0), "")
+        self.transforms = np.array([instance.transform for instance in self.instances], dtype=np.int64).reshape(-1, 6)
+        # llx, lly, urx, ury of every instance, from the corners of its cell box
+        a, b, c, d, e, f = self.transforms.T
+        cell_boxes = np.array([instance.cell_box for instance in self.instances], dtype=np.int64).reshape(-1, 4)
+        xs = np.stack([a * cell_boxes[:, i] + b * cell_boxes[:, j] + c for i in (0, 2) for j in (1, 3)])
+        ys = np.stack([d * cell_boxes[:, i] + e * cell_boxes[:, j] + f for i in (0, 2) for j in (1, 3)])
+        self.boxes = np.stack([xs.min(axis=0), ys.min(axis=0), xs.max(axis=0), ys.max(axis=0)], axis=1)
+        
+    @staticmethod
+    def compose(outer: Tuple[int, int, int, int, int, int], inner: Tuple[int, int, int, int, int, int]) -> Tuple[int, int, int, int, int, int]:
+        a, b, c, d, e, f = outer
+        g, h, i, j, k, l = inner
+        return (a * g + b * j, a * h + b * k, a * i + b * l + c, d * g + e * j, d * h + e * k, d * i + e * l + f)
+    
+    def read(self, cell_name: str) -> MagFile:
+        if cell_name not in self.mag_files:
+            cell = self.cells.get(cell_name)
+            try:
+                self.mag_files[cell_name] = cell.magic_data if cell is not None else MagFile(library.path(cell_name))
+            except OSError as error:
+                log.error(f"Cannot read cell '{cell_name}' used in {self.filename}: {error}")
+        return self.mag_files[cell_name]
+        
+    @staticmethod
+    def transform_box(transform: Tuple[int, int, int, int, int, int], box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        a, b, c, d, e, f = transform
+        xs = [a * x + b * y + c for x in (box[0], box[2]) for y in (box[1], box[3])]
+        ys = [d * x + e * y + f for x in (box[0], box[2]) for y in (box[1], box[3])]
+        return min(xs), min(ys), max(xs), max(ys)
+        
+    def flatten(self, mag_file: MagFile, transform: Tuple[int, int, int, int, int, int], path: str) -> None:
+        for name, labels in mag_file.labels.items():
+            for label in labels:
+                self.labels.append((name if name.endswith("!") else f"{path}{name}", label.layer, self.transform_box(transform, label.box)))
+        for use in mag_file.uses:
+            child = self.read(use.cell_name)
+            xlo, xhi, xsep, ylo, yhi, ysep = use.array
+            for i in range(abs(xhi - xlo) + 1):
+                for j in range(abs(yhi - ylo) + 1):
+                    if (xlo, xhi, ylo, yhi) == (0, 0, 0, 0):
+                        child_transform = self.compose(transform, use.transform)
+                        name = use.instance_name
+                    else:
+                        child_transform = self.compose(transform, self.compose(use.transform, (1, 0, i * xsep, 0, 1, j * ysep)))
+                        name = f"{use.instance_name}[{i},{j}]"
+                    if len(child.uses) > 0:
+                        self.flatten(child, child_transform, f"{path}{name}/")
+                    elif child.bounding_box is not None:
+                        self.instances.append(Layout.Instance(use.cell_name, f"{path}{name}", child_transform, child.bounding_box))
+                        
+    def get_cell(self, cell_name: str) -> Optional[Footprint]:
+        if cell_name not in self.cells:
+            try:
+                self.cells[cell_name] = Footprint(cell_name)
+            except CharacterizationError as error:
+                log.warning(f"Cannot check the ports of cell '{cell_name}': {error}")
+                return None
+        return self.cells[cell_name]
+    
+    def report(self, problem: str, descriptions: List[str]) -> None:
+        if len(descriptions) == 0:
+            return
+        shown = descriptions[:10]
+        if len(descriptions) > len(shown):
+            shown.append(f"and {len(descriptions) - len(shown)} more")
+        log.warning(f"{len(descriptions)} {problem} in {self.filename}:\n" + "\n".join(f"\t{description}" for description in shown))
+        
+    def check(self) -> None:
+        with tracer.span("Layout.check"):
+            start = datetime.now()
+            if len(self.instances) == 0:
+                log.warning(f"{self.filename} places no cells")
+                return
+            boxes = self.boxes
+            llx, lly, urx, ury = boxes.T
+            widths, heights = urx - llx, ury - lly
+            position: Callable[[int], str] = lambda i: f"{self.instances[i].path} ({self.instances[i].cell_name}) at ({llx[i] / self.scale}, {lly[i] / self.scale})"
+            index = Layout.GridIndex(boxes, int(np.median(widths)), int(heights.max()))
+        
+            # Instances sharing a bottom edge form a row, which ends at its rightmost instance
+            rows, row_of = np.unique(lly, return_inverse=True)
+            row_ends = np.full(len(rows), np.iinfo(np.int64).min)
+            np.maximum.at(row_ends, row_of, urx)
+            first, second = index.pairs()
+            overlapping = (llx[first] < urx[second]) & (llx[second] < urx[first]) & (lly[first] < ury[second]) & (lly[second] < ury[first])
+            overlaps = [f"{position(i)} overlaps {position(j)}" for i, j in zip(first[overlapping], second[overlapping])]
+            abutted = urx == row_ends[row_of]
+            for left, right in ((first, second), (second, first)):
+                abutted[left[(urx[left] == llx[right]) & (lly[left] == lly[right])]] = True
+            gaps = [f"{position(i)} does not abut the next cell in its row" for i in np.flatnonzero(~abutted).tolist()]
+            self.report("overlapping cells", overlaps)
+            self.report("gaps between cells", gaps)
+        
+            row_height = max(
+                (cell.height for cell in (self.get_cell(name) for name in set(instance.cell_name for instance in self.instances)) if cell is not None),
+                default=heights.max() / self.scale,
+            )
+            self.report(
+                f"cells not {row_height} µm tall",
+                [f"{position(i)} is {heights[i] / self.scale} µm tall" for i in np.flatnonzero(heights != round(row_height * self.scale)).tolist()],
+            )
+            self.report(
+                f"rows not on the {row_height} µm row grid",
+                [f"Row at y = {y / self.scale} µm" for y in rows if y % round(row_height * self.scale) != 0],
+            )
+            self.report(
+                "cells not on the 0.66 µm grid",
+                [position(i) for i in np.flatnonzero(llx % self.pitch != 0).tolist()],
+            )
+        
+            # The vertical ports of every cell must also land on the grid wherever the cell is placed
+            misaligned: List[str] = []
+            cell_names = np.array([instance.cell_name for instance in self.instances])
+            transforms = self.transforms
+            for cell_name in np.unique(cell_names):
+                cell = self.get_cell(str(cell_name))
+                if cell is None:
+                    continue
+                placed = np.flatnonzero(cell_names == cell_name)
+                a, b, c = transforms[placed, 0], transforms[placed, 1], transforms[placed, 2]
+                for port in cell.ports:
+                    off_grid = np.zeros(len(placed), dtype=bool)
+                    for port_position in port.positions:
+                        if port_position.y == 0 or port_position.y == cell.height:
+                            off_grid |= (a * round(port_position.x * self.scale) + b * round(port_position.y * self.scale) + c) % self.pitch != 0
+                    misaligned += [f"Port {port.name} of {position(i)}" for i in placed[off_grid]]
+            self.report("vertical ports not on the 0.66 µm grid", misaligned)
+        
+            if "error_s" in self.mag_file.rects:
+                log.warning(f"{self.filename} has {len(self.mag_file.rects['error_s']) // 4} design rule error areas")
+        
+            width = (urx.max() - llx.min()) / self.scale
+            height = (ury.max() - lly.min()) / self.scale
+            for row, y in enumerate(rows):
+                in_row = row_of == row
+                log.info(f"Row at y = {y / self.scale} µm: {in_row.sum()} cells, {round(100 * widths[in_row].sum() / self.scale / width, 1)}% utilized")
+            cell_area = float((widths * heights).sum()) / self.scale**2
+            log.info(f"{len(self.instances)} cells in {len(rows)} rows, {round(width, 2)} x {round(height, 2)} µm")
+            log.info(f"Total area {round(width * height, 2)} µm², of which cells {round(cell_area, 2)} µm² ({round(100 * cell_area / (width * height), 1)}% utilized)")
+            log.info(f"Checked {self.filename} in {round((datetime.now() - start).total_seconds() * 1000, 1)} ms")
+
+
+# Static timing of a placed layout from the characterized delay tables. Every port label of every
+# placed cell is a pin, and pins are on the same net if they belong to the same port of a cell, sit
+# on the same spot of the same layer (where cells abut) or lie under labels of the same name in the
+# layout. Arrival times are then propagated through the nets a topological level at a time
+class StaticTiming:
+    # Flip-flops launch from their clock and capture at their other inputs
+    registers = {"rdtype": "Clock", "scandtype": "Clock", "scanreg": "Clock"}
+    # Critical paths listed in the report
+    paths = 10
+    
+    def __init__(self, layout: Layout) -> None:
+        self.layout = layout
+        with tracer.span("StaticTiming.build", file=layout.filename):
+            self.build()
+        
+    @staticmethod
+    def components(count: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        # Connected components by hooking the root of each edge's larger label onto its smaller one
+        # and then jumping pointers until every node points at its root, repeated until no edge
+        # joins two components
+        labels = np.arange(count)
+        while True:
+            low = np.minimum(labels[first], labels[second])
+            previous = labels.copy()
+            np.minimum.at(labels, labels[first], low)
+            np.minimum.at(labels, labels[second], low)
+            while True:
+                jumped = labels[labels]
+                if (jumped == labels).all():
+                    break
+                labels = jumped
+            if (labels == previous).all():
+                return labels
+            
+    @staticmethod
+    def neighbours(*keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Pairs of items that are next to each other once sorted and have the same keys
+        order = np.lexsort(keys[::-1])
+        same = np.logical_and.reduce([key[order[1:]] == key[order[:-1]] for key in keys])
+        return order[:-1][same], order[1:][same]
+        
+    def build(self) -> None:
+        layout = self.layout
+        instances = layout.instances
+        cell_names = np.array([instance.cell_name for instance in instances])
+        self.cells: Dict[str, Footprint] = {}
+        for cell_name in np.unique(cell_names):
+            cell = layout.get_cell(str(cell_name))
+            if cell is not None:
+                self.cells[str(cell_name)] = cell
+        # The signal ports of each cell, numbered per instance from port_offsets
+        cell_ports = {name: [port for port in cell.ports if port.direction != "Power"] for name, cell in self.cells.items()}
+        counts = np.array([len(cell_ports.get(instance.cell_name, [])) for instance in instances], dtype=np.int64)
+        port_offsets = np.cumsum(counts) - counts
+        num_ports = int(counts.sum())
+        layers: Dict[str, int] = {}
+        pin_boxes: List[np.ndarray] = []
+        pin_layers: List[np.ndarray] = []
+        pin_ports: List[np.ndarray] = []
+        # Input pins by the cell and port they are on, for their capacitances
+        self.pin_types: List[Tuple[Footprint, Port]] = []
+        # Arcs by their input and output port, for their delay tables
+        self.arc_types: List[Tuple[Port, Port]] = []
+        sink_nets: List[np.ndarray] = []
+        sink_types: List[np.ndarray] = []
+        arc_sources: List[np.ndarray] = []
+        arc_targets: List[np.ndarray] = []
+        arc_type_ids: List[np.ndarray] = []
+        arc_ports: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        endpoint_ports: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for cell_name, ports in cell_ports.items():
+            cell = self.cells[cell_name]
+            placed = np.flatnonzero(cell_names == cell_name)
+            a, b, c, d, e, f = (layout.transforms[placed, i][:, None] for i in range(6))
+            for j, port in enumerate(ports):
+                labels = cell.magic_data.labels[port.name]
+                boxes = np.array([label.box for label in labels], dtype=np.int64)
+                xs = [a * boxes[:, x] + b * boxes[:, y] + c for x in (0, 2) for y in (1, 3)]
+                ys = [d * boxes[:, x] + e * boxes[:, y] + f for x in (0, 2) for y in (1, 3)]
+                pin_boxes.append(np.stack([np.minimum.reduce(xs), np.minimum.reduce(ys), np.maximum.reduce(xs), np.maximum.reduce(ys)], axis=2).reshape(-1, 4))
+                pin_layers.append(np.repeat([[layers.setdefault(label.layer, len(layers)) for label in labels]], len(placed), axis=0).ravel())
+                pin_ports.append(np.repeat(port_offsets[placed] + j, len(labels)))
+            register_clock = self.registers.get(Cell.base_name(cell_name))
+            types: Dict[str, int] = {}
+            for j, port in enumerate(ports):
+                if port.direction != "Input":
+                    continue
+                types[port.name] = len(self.pin_types)
+                self.pin_types.append((cell, port))
+                sink_nets.append(port_offsets[placed] + j)
+                sink_types.append(np.full(len(placed), types[port.name]))
+                if register_clock is not None and port.name != register_clock:
+                    endpoint_ports.append((port_offsets[placed] + j, placed, np.full(len(placed), j)))
+            for input_port, output_port in cell.arcs():
+                if register_clock is not None and input_port.name != register_clock:
+                    continue
+                # Only the arcs whose output was measured to switch, at any corner
+                if not any(arc.related_port == input_port.name for results in output_port.results.values() for arc in results.arcs):
+                    continue
+                arc_sources.append(port_offsets[placed] + ports.index(input_port))
+                arc_targets.append(port_offsets[placed] + ports.index(output_port))
+                arc_type_ids.append(np.full(len(placed), len(self.arc_types)))
+                self.arc_types.append((input_port, output_port))
+                arc_ports.append((placed, np.full(len(placed), ports.index(input_port)), np.full(len(placed), ports.index(output_port))))
+        concatenate: Callable[[List[np.ndarray]], np.ndarray] = lambda arrays: np.concatenate(arrays) if len(arrays) > 0 else np.zeros(0, dtype=np.int64)
+        boxes = np.concatenate(pin_boxes) if len(pin_boxes) > 0 else np.zeros((0, 4), dtype=np.int64)
+        pin_layer, pin_port = concatenate(pin_layers), concatenate(pin_ports)
+        num_pins = len(pin_port)
+        # Labels in the layouts themselves, which join every pin they touch on their layer to the
+        # other labels of the same name
+        label_names = [name for name, _, _ in layout.labels]
+        label_layers = np.array([layers.get(layer, -1) for _, layer, _ in layout.labels], dtype=np.int64)
+        label_boxes = np.array([box for _, _, box in layout.labels], dtype=np.int64).reshape(-1, 4)
+        # Sorting on two keys of packed coordinates is far faster than on five, and layouts are
+        # nowhere near 2^24 internal units across
+        offsets = boxes - boxes.min(axis=0) if num_pins > 0 else boxes
+        if num_pins == 0 or offsets.max() < 1 << 24:
+            box_keys = ((pin_layer << 48) | (offsets[:, 0] << 24) | offsets[:, 1], (offsets[:, 2] << 24) | offsets[:, 3])
+        else:
+            box_keys = (pin_layer, *offsets.T)
+        same_port, same_box = self.neighbours(pin_port), self.neighbours(*box_keys)
+        edges_first, edges_second = [same_port[0], same_box[0]], [same_port[1], same_box[1]]
+        for i, (layer, box) in enumerate(zip(label_layers, label_boxes)):
+            touching = np.flatnonzero((pin_layer == layer) & (boxes[:, 0] <= box[2]) & (box[0] <= boxes[:, 2]) & (boxes[:, 1] <= box[3]) & (box[1] <= boxes[:, 3]))
+            edges_first.append(touching)
+            edges_second.append(np.full(len(touching), num_pins + i))
+        _, label_ids = np.unique(np.array(label_names, dtype=str), return_inverse=True) if len(label_names) > 0 else (None, np.zeros(0, dtype=np.int64))
+        same_name = self.neighbours(label_ids)
+        edges_first.append(num_pins + same_name[0])
+        edges_second.append(num_pins + same_name[1])
+        nodes = self.components(num_pins + len(label_names), concatenate(edges_first), concatenate(edges_second))
+        # Every port of every instance is on one net, numbered from 0
+        port_nodes = np.zeros(num_ports, dtype=np.int64)
+        port_nodes[pin_port] = nodes[:num_pins]
+        _, self.port_nets = np.unique(port_nodes, return_inverse=True)
+        self.num_nets = int(self.port_nets.max()) + 1 if num_ports > 0 else 0
+        self.sink_nets = self.port_nets[concatenate(sink_nets)]
+        self.sink_types = concatenate(sink_types)
+        self.arc_sources = self.port_nets[concatenate(arc_sources)]
+        self.arc_targets = self.port_nets[concatenate(arc_targets)]
+        self.arc_type_ids = concatenate(arc_type_ids)
+        self.arc_instances = concatenate([placed for placed, _, _ in arc_ports])
+        self.arc_inputs = concatenate([inputs for _, inputs, _ in arc_ports])
+        self.arc_outputs = concatenate([outputs for _, _, outputs in arc_ports])
+        self.cell_ports = cell_ports
+        # Paths end at register inputs, found by their net, and at nets that drive nothing
+        self.end_instances = np.full(self.num_nets, -1)
+        self.end_ports = np.full(self.num_nets, -1)
+        register_nets = self.port_nets[concatenate([ports for ports, _, _ in endpoint_ports])]
+        self.end_instances[register_nets] = concatenate([placed for _, placed, _ in endpoint_ports])
+        self.end_ports[register_nets] = concatenate([indices for _, _, indices in endpoint_ports])
+        driven = np.zeros(self.num_nets, dtype=bool)
+        driven[self.arc_targets] = True
+        driven[self.sink_nets] = False
+        self.endpoint_nets = np.union1d(register_nets, np.flatnonzero(driven))
+        
+    # Rise and fall delays [ps] of each arc type at every load of the grid, with the loads its output
+    # did not switch at interpolated from the others, and the capacitance [fF] of each input pin type
+    def tables(self, corner: Corner) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        grid = np.array(Cell.load_capacitances)
+        rise = np.full((len(self.arc_types), len(grid)), np.nan)
+        fall = np.full((len(self.arc_types), len(grid)), np.nan)
+        for i, (input_port, output_port) in enumerate(self.arc_types):
+            for arc in output_port.results[corner.name].arcs:
+                if arc.related_port == input_port.name:
+                    rise[i] = np.interp(grid, arc.load_capacitances, arc.rise_delays)
+                    fall[i] = np.interp(grid, arc.load_capacitances, arc.fall_delays)
+        capacitances = np.zeros(len(self.pin_types))
+        for i, (_, port) in enumerate(self.pin_types):
+            capacitance = port.results[corner.name].capacitance
+            if isinstance(capacitance, float):
+                capacitances[i] = capacitance
+        return rise, fall, capacitances
+    
+    def analyze(self, corner: Corner) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        with tracer.span("StaticTiming.analyze", file=self.layout.filename, corner=corner.name):
+            rise, fall, capacitances = self.tables(corner)
+            grid = np.array(Cell.load_capacitances)
+            # Every arc's delay is looked up at once, from the total input capacitance on its output
+            # net, interpolating linearly between the loads of the grid and beyond its heaviest
+            loads = np.bincount(self.sink_nets, weights=capacitances[self.sink_types], minlength=self.num_nets)
+            arc_loads = np.maximum(loads[self.arc_targets], grid[0])
+            upper = np.clip(np.searchsorted(grid, arc_loads), 1, len(grid) - 1)
+            fraction = (arc_loads - grid[upper - 1]) / (grid[upper] - grid[upper - 1])
+            types = self.arc_type_ids
+            rise_delays = rise[types, upper - 1] + fraction * (rise[types, upper] - rise[types, upper - 1])
+            fall_delays = fall[types, upper - 1] + fraction * (fall[types, upper] - fall[types, upper - 1])
+            timed = np.flatnonzero(~np.isnan(rise_delays) & ~np.isnan(fall_delays))
+            self.untimed = len(self.arc_type_ids) - len(timed)
+            # Arcs by source net, so each level can pick out the arcs leaving it
+            timed = timed[np.argsort(self.arc_sources[timed], kind="stable")]
+            sources = self.arc_sources[timed]
+            starts = np.searchsorted(sources, np.arange(self.num_nets))
+            ends = np.searchsorted(sources, np.arange(self.num_nets), side="right")
+            pending = np.bincount(self.arc_targets[timed], minlength=self.num_nets)
+            # Nets driven by nothing that was timed arrive at 0
+            rise_arrivals = np.zeros(self.num_nets)
+            fall_arrivals = np.zeros(self.num_nets)
+            # The arc that set the later of each net's arrivals
+            predecessors = np.full(self.num_nets, -1)
+            frontier = np.flatnonzero(pending == 0)
+            self.levels = 0
+            while len(frontier) > 0:
+                counts = ends[frontier] - starts[frontier]
+                arcs = timed[np.repeat(starts[frontier] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+                if len(arcs) == 0:
+                    break
+                targets = self.arc_targets[arcs]
+                sources = self.arc_sources[arcs]
+                latest = np.maximum(rise_arrivals[sources], fall_arrivals[sources])
+                # The arcs are non-unate, so either input edge can cause either output edge
+                np.maximum.at(rise_arrivals, targets, latest + rise_delays[arcs])
+                np.maximum.at(fall_arrivals, targets, latest + fall_delays[arcs])
+                setting = latest + np.maximum(rise_delays[arcs], fall_delays[arcs]) == np.maximum(rise_arrivals[targets], fall_arrivals[targets])
+                predecessors[targets[setting]] = arcs[setting]
+                np.subtract.at(pending, targets, 1)
+                frontier = np.unique(targets[pending[targets] == 0])
+                self.levels += 1
+            self.looped = int((pending > 0).sum())
+            self.rise_delays, self.fall_delays = rise_delays, fall_delays
+            return rise_arrivals, fall_arrivals, predecessors, loads
+    
+    def pin(self, instance: int, port: int) -> str:
+        instance_data = self.layout.instances[instance]
+        return f"{instance_data.path}/{self.cell_ports[instance_data.cell_name][port].name} ({instance_data.cell_name})"
+    
+    def path(self, net: int, predecessors: np.ndarray, arrivals: np.ndarray) -> List[str]:
+        steps: List[str] = []
+        while predecessors[net] >= 0:
+            arc = int(predecessors[net])
+            delay = max(self.rise_delays[arc], self.fall_delays[arc])
+            steps.append(
+                f"{self.pin(self.arc_instances[arc], self.arc_inputs[arc])} to {self.cell_ports[self.layout.instances[int(self.arc_instances[arc])].cell_name][int(self.arc_outputs[arc])].name}: "
+                f"{round(float(delay), 2)} ps, arriving at {round(float(arrivals[net]), 2)} ps"
+            )
+            net = int(self.arc_sources[arc])
+        return steps[::-1]
+    
+    def report(self, corner: Corner, at: str = "") -> None:
+        start = time.perf_counter()
+        rise_arrivals, fall_arrivals, predecessors, _ = self.analyze(corner)
+        arrivals = np.maximum(rise_arrivals, fall_arrivals)
+        filename = self.layout.filename
+        # Arcs whose cells failed to characterize at this corner are expected, and only counted
+        if self.untimed > 0:
+            log.info(f"{self.untimed} arcs in {filename}{at} have no characterized delays and were not timed")
+        if self.looped > 0:
+            log.warning(f"{self.looped} nets in {filename}{at} are on combinational loops and were not timed")
+        endpoints = self.endpoint_nets[np.argsort(-arrivals[self.endpoint_nets], kind="stable")]
+        endpoints = endpoints[arrivals[endpoints] > 0]
+        elapsed = round((time.perf_counter() - start) * 1000, 1)
+        log.info(f"Timed {len(self.arc_type_ids) - self.untimed} arcs through {self.num_nets} nets of {len(self.layout.instances)} cells{at} in {self.levels} levels in {elapsed} ms")
+        if len(endpoints) == 0:
+            log.info(f"{filename} has no timed paths{at}")
+            return
+        worst = endpoints[0]
+        log.info(f"Critical path of {filename}{at}, {round(float(arrivals[worst]), 2)} ps:\n" + "\n".join(f"\t{step}" for step in self.path(worst, predecessors, arrivals)))
+        # Each path ends at the register input it is captured at, or else the output that drives nothing
+        registered = self.end_instances[endpoints] >= 0
+        end_instances = np.where(registered, self.end_instances[endpoints], self.arc_instances[predecessors[endpoints]])
+        end_ports = np.where(registered, self.end_ports[endpoints], self.arc_outputs[predecessors[endpoints]])
+        describe: Callable[[int], str] = lambda i: f"{round(float(arrivals[endpoints[i]]), 2)} ps to {self.pin(end_instances[i], end_ports[i])}"
+        log.info(f"Worst paths of {filename}{at}:\n" + "\n".join(f"\t{describe(i)}" for i in range(min(self.paths, len(endpoints)))))
+        # The worst path ending in each row
+        rows, row_of = np.unique(self.layout.boxes[end_instances, 1], return_inverse=True)
+        for row, y in enumerate(rows):
+            log.info(f"Row at y = {y / Layout.scale} µm{at}: worst path {describe(int(np.flatnonzero(row_of == row)[0]))}")
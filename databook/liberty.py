@@ -0,0 +1,146 @@
+import os
+from typing import List, Optional, Set
+
+from .log import log
+from .spice import Corner, corners
+from .cell import Cell, Port
+
+
+# Writes the characterized cells as a Liberty library with NLDM delay and transition tables
+# indexed by input transition and output load
+class Liberty:
+    input_slews = [0.05, 0.1, 0.25, 0.5, 1.0]
+    directions = {
+        "Input": "input",
+        "Output": "output",
+        "Inout": "inout",
+    }
+    
+    def __init__(self, cells: List[Cell], characterization_corners: Optional[List[Corner]] = None) -> None:
+        self.cells = cells
+        self.corners = characterization_corners if characterization_corners is not None else [corners["nominal"]]
+        
+    @staticmethod
+    def values(table: List[List[float]]) -> str:
+        return ", \\\n".join(f"\t\t\t\t\t\"{', '.join(str(value) for value in row)}\"" for row in table)
+        
+    # Whether the output rises, falls or does either when the input rises, over every level of the
+    # other inputs. Without a logic function it could be either
+    @staticmethod
+    def timing_sense(cell: Cell, input_name: str, output_port: Port) -> str:
+        function = cell.get_logic_function(output_port, Cell.logic_functions)
+        if function is None:
+            return "non_unate"
+        others = [port.name for port in cell.input_ports if port.name != input_name]
+        changes: Set[int] = set()
+        for k in range(2 ** len(others)):
+            levels = {name: (k >> j) & 1 for j, name in enumerate(others)}
+            changes.add(Cell.evaluate(function, {**levels, input_name: 1}) - Cell.evaluate(function, {**levels, input_name: 0}))
+        if -1 not in changes and 1 in changes:
+            return "positive_unate"
+        if 1 not in changes and -1 in changes:
+            return "negative_unate"
+        return "non_unate"
+        
+    # A library per corner, named after it if there are several (FILE.lib becomes FILE_slow.lib).
+    # Sequential cells would need ff groups and clocked arcs, so they are left out
+    def write(self, filename: str) -> None:
+        cells = sorted(self.cells, key=lambda cell: cell.name)
+        sequential = [cell.name for cell in cells if Cell.base_name(cell.name) in Cell.sequential]
+        if len(sequential) > 0:
+            log.warning(f"Leaving sequential cells out of the Liberty library: {', '.join(sequential)}")
+        cells = [cell for cell in cells if cell.name not in sequential]
+        for corner in self.corners:
+            if len(self.corners) == 1:
+                self.write_corner(filename, "tsmc180", corner, cells)
+            else:
+                stem, extension = os.path.splitext(filename)
+                self.write_corner(f"{stem}_{corner.name}{extension}", f"tsmc180_{corner.name}", corner, cells)
+        
+    def write_corner(self, filename: str, name: str, corner: Corner, cells: List[Cell]) -> None:
+        # The stimulus ramps from 0 to 100% in each input slew, so its 10-90% transition is 80% of it
+        transitions = [round(input_slew * 0.8, 5) for input_slew in sorted(set(self.input_slews) | {Cell.input_slew})]
+        lines = [
+            f"library ({name}) {{",
+            "\tdelay_model : table_lookup;",
+            "\ttime_unit : \"1ns\";",
+            "\tvoltage_unit : \"1V\";",
+            "\tcurrent_unit : \"1mA\";",
+            "\tpulling_resistance_unit : \"1kohm\";",
+            "\tcapacitive_load_unit (1, ff);",
+            "\tnom_process : 1;",
+            f"\tnom_temperature : {corner.temperature:g};",
+            f"\tnom_voltage : {corner.voltage:g};",
+            f"\tvoltage_map (VDD, {corner.voltage:g});",
+            "\tvoltage_map (VSS, 0);",
+            "\tinput_threshold_pct_rise : 50;",
+            "\tinput_threshold_pct_fall : 50;",
+            "\toutput_threshold_pct_rise : 50;",
+            "\toutput_threshold_pct_fall : 50;",
+            "\tslew_lower_threshold_pct_rise : 10;",
+            "\tslew_lower_threshold_pct_fall : 10;",
+            "\tslew_upper_threshold_pct_rise : 90;",
+            "\tslew_upper_threshold_pct_fall : 90;",
+            "\tlu_table_template (delay_template) {",
+            "\t\tvariable_1 : input_net_transition;",
+            "\t\tvariable_2 : total_output_net_capacitance;",
+            f"\t\tindex_1 (\"{', '.join(str(transition) for transition in transitions)}\");",
+            f"\t\tindex_2 (\"{', '.join(str(load_capacitance) for load_capacitance in Cell.load_capacitances)}\");",
+            "\t}",
+        ]
+        for cell in cells:
+            lines += self.cell(cell, corner)
+        lines.append("}")
+        with open(filename, "w") as file:
+            file.write("\n".join(lines) + "\n")
+            
+    def cell(self, cell: Cell, corner: Corner) -> List[str]:
+        lines = [
+            f"\tcell ({cell.name}) {{",
+            f"\t\tarea : {cell.area};",
+        ]
+        for port in cell.ports:
+            if port.direction == "Power":
+                lines += [
+                    f"\t\tpg_pin (\"{port.name}\") {{",
+                    f"\t\t\tvoltage_name : {'VDD' if port.name.startswith('Vdd') else 'VSS'};",
+                    f"\t\t\tpg_type : {'primary_power' if port.name.startswith('Vdd') else 'primary_ground'};",
+                    "\t\t}",
+                ]
+                continue
+            if port.direction not in self.directions:
+                continue
+            lines.append(f"\t\tpin ({port.name}) {{")
+            lines.append(f"\t\t\tdirection : {self.directions[port.direction]};")
+            results = port.results[corner.name]
+            if isinstance(results.capacitance, float):
+                lines.append(f"\t\t\tcapacitance : {results.capacitance};")
+            function = cell.get_logic_function(port, Cell.logic_functions)
+            if function is not None:
+                lines.append(f"\t\t\tfunction : \"{function}\";")
+            three_state = cell.get_logic_function(port, Cell.three_state_functions)
+            if three_state is not None:
+                lines.append(f"\t\t\tthree_state : \"{three_state}\";")
+            for timing in results.timings:
+                lines += [
+                    "\t\t\ttiming () {",
+                    f"\t\t\t\trelated_pin : \"{timing.related_port}\";",
+                    f"\t\t\t\ttiming_sense : {self.timing_sense(cell, timing.related_port, port)};",
+                ]
+                for name, table in (
+                    ("cell_rise", timing.cell_rise),
+                    ("cell_fall", timing.cell_fall),
+                    ("rise_transition", timing.rise_transition),
+                    ("fall_transition", timing.fall_transition),
+                ):
+                    lines += [
+                        f"\t\t\t\t{name} (delay_template) {{",
+                        "\t\t\t\t\tvalues ( \\",
+                        self.values(table) + " \\",
+                        "\t\t\t\t\t);",
+                        "\t\t\t\t}",
+                    ]
+                lines.append("\t\t\t}")
+            lines.append("\t\t}")
+        lines.append("\t}")
+        return lines
@@ -0,0 +1,192 @@
+from typing import List, Dict, Tuple
+from datetime import datetime
+import numpy as np
+
+from .log import log, tracer
+from .magic import Coordinate, MagFile, library
+from .cell import Cell
+
+
+# Checks the geometry of every cell in the library before anything is extracted or simulated. The
+# rectangles and labels of all the cells go into flat arrays tagged with their cell and layer, so
+# each check is a few array operations over the whole library rather than a loop over cells
+class Lint:
+    scale = 50
+    pitch = 33
+    rails = ("Vdd!", "GND!")
+    well = "nwell"
+    # Layers that must lie inside the n-well, and layers that must stay out of it
+    well_layers = ("pdiffusion", "pdiffcontact", "ptransistor", "nsubstratetap", "nohmic")
+    substrate_layers = ("ndiffusion", "ndiffcontact", "ntransistor", "psubstratetap", "pohmic")
+    # End of row cells are not a whole number of pitches wide
+    unaligned_cells = ("rightend",)
+    
+    def __init__(self, cell_names: List[str]) -> None:
+        self.errors: Dict[str, List[str]] = {}
+        self.mag_files: Dict[str, MagFile] = {}
+        for cell_name in cell_names:
+            try:
+                mag_file = MagFile(library.path(cell_name))
+            except (OSError, ValueError, IndexError) as error:
+                self.error(cell_name, f"Cannot be read: {error}")
+                continue
+            if mag_file.bounding_box is None:
+                self.error(cell_name, "Layout is empty")
+                continue
+            self.mag_files[cell_name] = mag_file
+        self.cell_names = sorted(self.mag_files)
+        self.layers = sorted(
+            {layer for mag_file in self.mag_files.values() for layer in mag_file.rects}
+            | {label.layer for mag_file in self.mag_files.values() for labels in mag_file.labels.values() for label in labels}
+        )
+        layer_index = {layer: i for i, layer in enumerate(self.layers)}
+        
+        self.bounding_boxes = np.array([self.mag_files[cell_name].bounding_box for cell_name in self.cell_names], dtype=np.int64).reshape(-1, 4)
+        rects = [
+            (i, layer_index[layer], np.frombuffer(boxes, dtype=np.int32))
+            for i, cell_name in enumerate(self.cell_names)
+            for layer, boxes in self.mag_files[cell_name].rects.items()
+        ]
+        self.rects = np.concatenate([boxes for _, _, boxes in rects] + [np.zeros(0, dtype=np.int32)]).astype(np.int64).reshape(-1, 4)
+        counts = [len(boxes) // 4 for _, _, boxes in rects]
+        self.rect_cells = np.repeat(np.array([i for i, _, _ in rects], dtype=np.int64), counts)
+        self.rect_layers = np.repeat(np.array([layer for _, layer, _ in rects], dtype=np.int64), counts)
+        labels = [
+            (i, label)
+            for i, cell_name in enumerate(self.cell_names)
+            for labels_by_name in self.mag_files[cell_name].labels.values()
+            for label in labels_by_name
+        ]
+        self.labels = np.array([label.box for _, label in labels], dtype=np.int64).reshape(-1, 4)
+        self.label_cells = np.array([i for i, _ in labels], dtype=np.int64)
+        self.label_layers = np.array([layer_index[label.layer] for _, label in labels], dtype=np.int64)
+        self.label_names = np.array([label.name for _, label in labels], dtype=str)
+        
+    def error(self, cell_name: str, problem: str) -> None:
+        self.errors.setdefault(cell_name, []).append(problem)
+        
+    # Indices (i, j) of every pair of entries with keys[i] == other_keys[j]
+    @staticmethod
+    def matches(keys: np.ndarray, other_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(other_keys, kind="stable")
+        sorted_keys = other_keys[order]
+        starts = np.searchsorted(sorted_keys, keys, "left")
+        counts = np.searchsorted(sorted_keys, keys, "right") - starts
+        offsets: np.ndarray = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(np.arange(len(keys)), counts), order[np.repeat(starts, counts) + offsets]
+    
+    # Whether box is covered by the union of boxes, testing the middle of every piece the edges of
+    # the boxes cut it into
+    @staticmethod
+    def covered(box: np.ndarray, boxes: np.ndarray) -> bool:
+        xs = np.unique(np.clip(np.concatenate([box[[0, 2]], boxes[:, [0, 2]].ravel()]), box[0], box[2]))
+        ys = np.unique(np.clip(np.concatenate([box[[1, 3]], boxes[:, [1, 3]].ravel()]), box[1], box[3]))
+        x, y = np.meshgrid((xs[:-1] + xs[1:]) / 2, (ys[:-1] + ys[1:]) / 2)
+        inside = (boxes[:, 0, None, None] <= x) & (x <= boxes[:, 2, None, None]) & (boxes[:, 1, None, None] <= y) & (y <= boxes[:, 3, None, None])
+        return bool(inside.any(axis=0).all())
+        
+    def check(self) -> None:
+        with tracer.span("Lint.check"):
+            start = datetime.now()
+            if len(self.cell_names) > 0:
+                self.check_size()
+                self.check_ports()
+                self.check_rails()
+                self.check_labels()
+                self.check_wells()
+            log.info(f"Linted {len(self.mag_files)} cells in {round((datetime.now() - start).total_seconds() * 1000, 1)} ms")
+        
+    def report(self) -> None:
+        for cell_name in sorted(self.errors):
+            log.warning(f"Cell '{cell_name}' failed lint:\n" + "\n".join(f"\t{problem}" for problem in self.errors[cell_name]))
+        
+    def check_size(self) -> None:
+        llx, lly, urx, ury = self.bounding_boxes.T
+        widths, heights = urx - llx, ury - lly
+        unaligned = np.isin([Cell.base_name(cell_name) for cell_name in self.cell_names], self.unaligned_cells)
+        for i in np.flatnonzero((widths % self.pitch != 0) & ~unaligned):
+            log.warning(f"Cell '{self.cell_names[i]}' width {round(widths[i] / self.scale, 2)} µm is not aligned to 0.66 µm grid")
+        tallest_cell_height = round(heights.max() / self.scale, 2)
+        log.info(f"Tallest cell height is {tallest_cell_height} µm")
+        for i in np.flatnonzero(heights != heights.max()):
+            log.warning(f"Cell '{self.cell_names[i]}' has height {round(heights[i] / self.scale, 2)} µm, expected {tallest_cell_height} µm")
+            
+    # Ports on the top or bottom edge are reached by vertical wires, so they must be on the grid
+    def check_ports(self) -> None:
+        lly, ury = self.bounding_boxes[self.label_cells, 1], self.bounding_boxes[self.label_cells, 3]
+        x, y = self.labels[:, 0], self.labels[:, 1]
+        for i in np.flatnonzero(((y == lly) | (y == ury)) & (x % self.pitch != 0)):
+            position = Coordinate(float(x[i]), float(y[i] - lly[i])) / self.scale
+            log.warning(f"Vertical port {self.label_names[i]} at {position} in cell '{self.cell_names[self.label_cells[i]]}' is not aligned to 0.66 µm grid")
+            
+    # The supply rails of abutting cells join, so wherever a cell labels a rail on its left or right
+    # edge it must be at the same height as in the rest of the library
+    def check_rails(self) -> None:
+        llx, lly, urx, ury = self.bounding_boxes[self.label_cells].T
+        x0, y0, x1, y1 = self.labels.T
+        on_edge = (x0 == x1) & ((x0 == llx) | (x0 == urx))
+        for rail in self.rails:
+            labelled = np.zeros(len(self.cell_names), dtype=bool)
+            labelled[self.label_cells[self.label_names == rail]] = True
+            for i in np.flatnonzero(~labelled):
+                self.error(self.cell_names[i], f"No {rail} rail")
+            edge_labels = np.flatnonzero(on_edge & (self.label_names == rail))
+            if len(edge_labels) == 0:
+                continue
+            offsets = np.stack([y0 - lly, y1 - lly, ury - y0, ury - y1], axis=1)[edge_labels]
+            # Rails are placed from the nearer of the bottom and top edges
+            offsets = np.where((offsets[:, 0] <= offsets[:, 2])[:, None], offsets[:, :2], offsets[:, 2:])
+            positions, counts = np.unique(offsets, axis=0, return_counts=True)
+            expected = positions[counts.argmax()]
+            misplaced = (offsets != expected).any(axis=1)
+            for label, offset in zip(edge_labels[misplaced], offsets[misplaced]):
+                side = "left" if x0[label] == llx[label] else "right"
+                self.error(
+                    self.cell_names[self.label_cells[label]],
+                    f"{rail} rail on the {side} edge spans y = {y0[label] / self.scale} to {y1[label] / self.scale} µm, "
+                    f"{tuple(float(value) / self.scale for value in offset)} µm from the edge instead of {tuple(float(value) / self.scale for value in expected)} µm",
+                )
+                    
+    # A label only names a net if it touches a shape on its layer
+    def check_labels(self) -> None:
+        keys = self.label_cells * len(self.layers) + self.label_layers
+        label, rect = self.matches(keys, self.rect_cells * len(self.layers) + self.rect_layers)
+        a, b = self.labels[label], self.rects[rect]
+        touching = (a[:, 0] <= b[:, 2]) & (b[:, 0] <= a[:, 2]) & (a[:, 1] <= b[:, 3]) & (b[:, 1] <= a[:, 3])
+        on_layer = np.zeros(len(self.labels), dtype=bool)
+        on_layer[label[touching]] = True
+        for i in np.flatnonzero(~on_layer):
+            x0, y0, x1, y1 = self.labels[i] / self.scale
+            self.error(
+                self.cell_names[int(self.label_cells[i])],
+                f"Label {self.label_names[i]} at ({x0}, {y0}) to ({x1}, {y1}) µm is not on {self.layers[self.label_layers[i]]}",
+            )
+            
+    def check_wells(self) -> None:
+        if self.well not in self.layers:
+            wells = np.zeros(len(self.rects), dtype=bool)
+        else:
+            wells = self.rect_layers == self.layers.index(self.well)
+        well_boxes, well_cells = self.rects[wells], self.rect_cells[wells]
+        for layers, inside in ((self.well_layers, True), (self.substrate_layers, False)):
+            selected = np.flatnonzero(np.isin(self.rect_layers, [self.layers.index(layer) for layer in layers if layer in self.layers]))
+            shape, well = self.matches(self.rect_cells[selected], well_cells)
+            a, b = self.rects[selected[shape]], well_boxes[well]
+            if inside:
+                within = (b[:, 0] <= a[:, 0]) & (a[:, 2] <= b[:, 2]) & (b[:, 1] <= a[:, 1]) & (a[:, 3] <= b[:, 3])
+                # Shapes not inside any one well rectangle may still be covered by several
+                bad = np.ones(len(selected), dtype=bool)
+                bad[shape[within]] = False
+                for i in np.flatnonzero(bad):
+                    bad[i] = not self.covered(self.rects[selected[i]], well_boxes[well_cells == self.rect_cells[selected[i]]])
+            else:
+                overlapping = (a[:, 0] < b[:, 2]) & (b[:, 0] < a[:, 2]) & (a[:, 1] < b[:, 3]) & (b[:, 1] < a[:, 3])
+                bad = np.zeros(len(selected), dtype=bool)
+                bad[shape[overlapping]] = True
+            for i in np.flatnonzero(bad):
+                x0, y0, x1, y1 = self.rects[selected[i]] / self.scale
+                where = "outside" if inside else "inside"
+                self.error(
+                    self.cell_names[self.rect_cells[selected[i]]],
+                    f"{self.layers[self.rect_layers[selected[i]]]} at ({x0}, {y0}) to ({x1}, {y1}) µm is {where} the {self.well}",
+                )
@@ -0,0 +1,273 @@
+import os, sys, threading, json, time, queue, atexit
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Union, Any, Generator, NoReturn, Optional
+from datetime import datetime
+import numpy as np
+
+from .errors import FatalError
+
+
+# Workers only put records on a queue, and a single writer thread formats them, prints them and
+# appends them to the log files. The files are flushed every flush_interval seconds and on exit
+# rather than after every line, and a message from one thread is never interleaved with another's
+class Log:
+    colours = {
+        "red": "\033[0;31m",
+        "green": "\033[0;32m",
+        "yellow": "\033[0;33m",
+        "blue": "\033[0;34m",
+        "cyan": "\033[0;36m",
+        "reset": "\033[0m",
+    }
+    flush_interval = 0.5
+    
+        
+    class LogFiles:
+        
+        
+        class LogFile:
+            def __init__(self, filename: str) -> None:
+                self.filename = filename
+                if os.path.exists(filename):
+                    os.remove(filename)
+                self.file = open(filename, "w")
+                os.chmod(filename, 0o666)
+                
+            def write(self, message: str) -> None:
+                self.file.write(message + "\n")
+                
+            def flush(self) -> None:
+                self.file.flush()
+                
+            def close(self) -> None:
+                os.chmod(self.filename, 0o444)
+                self.file.close()
+        
+        
+        def __init__(self, directory: str) -> None:
+            self.directory = directory
+            os.makedirs(directory, exist_ok=True)
+            os.chmod(directory, 0o777)
+            self.all = self.LogFile(os.path.join(directory, "all.log"))
+            self.info = self.LogFile(os.path.join(directory, "info.log"))
+            self.warnings = self.LogFile(os.path.join(directory, "warnings.log"))
+            self.errors = self.LogFile(os.path.join(directory, "errors.log"))
+            
+        def flush(self) -> None:
+            self.all.flush()
+            self.info.flush()
+            self.warnings.flush()
+            self.errors.flush()
+            
+        def close(self) -> None:
+            self.all.close()
+            self.info.close()
+            self.warnings.close()
+            self.errors.close()
+            os.chmod(self.directory, 0o555)
+            
+    
+    # A message as logged: when, its colour and line on the console and in all.log, and the level
+    # file and message for that file, if any
+    Record = Tuple[float, str, str, Optional[str], Optional[str]]
+            
+
+    def __init__(self, timestamp: bool, directory: str = "logs") -> None:
+        self.timestamp = timestamp
+        self.directory = directory
+        self.log_files: Optional[Log.LogFiles] = None
+        self.warnings = 0
+        self.lock = threading.Lock()
+        self.queue: "queue.SimpleQueue[Union[Log.Record, threading.Event, None]]" = queue.SimpleQueue()
+        self.closed = False
+        # The whole timestamp only changes once a second
+        self.second = -1
+        self.second_prefix = ""
+        self.writer: Optional[threading.Thread] = None
+        
+    # The log files and the writer are only created by the first message, so importing the package
+    # creates nothing, and the directory can still be changed until then
+    def start(self) -> None:
+        with self.lock:
+            if self.writer is not None or self.closed:
+                return
+            self.log_files = self.LogFiles(self.directory)
+            self.writer = threading.Thread(target=self.write, args=(self.log_files,), name="log", daemon=True)
+            self.writer.start()
+        
+    def close(self) -> None:
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        if self.writer is None or self.log_files is None:
+            return
+        self.queue.put(None)
+        self.writer.join()
+        self.log_files.close()
+        
+    # Waits until everything logged so far has been written out
+    def flush(self) -> None:
+        if self.writer is None:
+            return
+        flushed = threading.Event()
+        self.queue.put(flushed)
+        if self.writer.is_alive():
+            flushed.wait()
+    
+    def log(self, message: str, colour: str = "reset", level: Optional[str] = None, level_message: Any = None) -> None:
+        if self.writer is None:
+            self.start()
+        self.queue.put((time.time(), colour, message, level, None if level is None else str(level_message)))
+        
+    def format_time(self, seconds: float) -> str:
+        if int(seconds) != self.second:
+            self.second = int(seconds)
+            self.second_prefix = datetime.fromtimestamp(self.second).strftime("%d/%m/%y %H:%M:%S")
+        return f"[{self.second_prefix}.{int(seconds % 1 * 100):02d}] "
+    
+    def write(self, log_files: "Log.LogFiles") -> None:
+        last_flush = time.monotonic()
+        closing = False
+        while not closing:
+            try:
+                records = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                records = []
+            while True:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            console: List[str] = []
+            flushed: List[threading.Event] = []
+            for record in records:
+                if record is None:
+                    closing = True
+                elif isinstance(record, threading.Event):
+                    flushed.append(record)
+                else:
+                    seconds, colour, message, level, level_message = record
+                    if self.timestamp:
+                        message = self.format_time(seconds) + message
+                    console.append(self.colours[colour] + message + self.colours["reset"])
+                    log_files.all.write(message)
+                    if level is not None and level_message is not None:
+                        getattr(log_files, level).write(level_message)
+            if len(console) > 0:
+                sys.stdout.write("\n".join(console) + "\n")
+                sys.stdout.flush()
+            if closing or len(flushed) > 0 or time.monotonic() - last_flush >= self.flush_interval:
+                log_files.flush()
+                last_flush = time.monotonic()
+            for event in flushed:
+                event.set()
+
+    def error(self, message: Any) -> NoReturn:
+        self.log(f"[ERROR] {message}", "red", "errors", message)
+        raise FatalError(str(message))
+
+    def warning(self, message: Any) -> None:
+        with self.lock:
+            self.warnings += 1
+        self.log(f"[WARN]  {message}", "yellow", "warnings", message)
+        
+    def info(self, message: Any) -> None:
+        self.log(f"[INFO]  {message}", "cyan", "info", message)
+        
+    # Exit status of the run
+    def result(self) -> int:
+        if self.warnings > 0:
+            self.log(f"[FAIL]  Script finished with {self.warnings} warnings", "red")
+            status = 1
+        else:
+            self.log(f"[PASS]  Script completed successfully", "green")
+            status = 0
+        self.flush()
+        return status
+
+
+log = Log(timestamp=True)
+# Registered on import so that it runs after everything registered later, which may still log
+atexit.register(log.close)
+
+
+# Times each stage of a run as a span, cheaply enough to leave on: a span is one tuple appended to a
+# list and nothing is formatted until the trace is written. Spans inherit the attributes (cell, arc,
+# loads) of the spans they are nested in on the same thread
+class Tracer:
+    def __init__(self) -> None:
+        self.start = time.perf_counter_ns()
+        # Name, start and end [ns], thread, nesting depth and attributes
+        self.spans: List[Tuple[str, int, int, int, int, Dict[str, Any]]] = []
+        self.threads: Dict[int, str] = {}
+        self.local = threading.local()
+        
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Generator[None, None, None]:
+        parent: Dict[str, Any] = getattr(self.local, "attributes", {})
+        depth: int = getattr(self.local, "depth", 0)
+        self.local.attributes = {**parent, **attributes}
+        self.local.depth = depth + 1
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            thread = threading.get_ident()
+            if thread not in self.threads:
+                self.threads[thread] = threading.current_thread().name
+            self.spans.append((name, start, end, thread, depth, self.local.attributes))
+            self.local.attributes = parent
+            self.local.depth = depth
+            
+    # Forgets the spans so far, so that a long running process only keeps those of its current run
+    def clear(self) -> None:
+        self.start = time.perf_counter_ns()
+        self.spans = []
+        
+    # Chrome trace event format, which chrome://tracing and Perfetto both open
+    def write(self, filename: str) -> None:
+        thread_ids = {thread: i for i, thread in enumerate(self.threads)}
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread_ids[thread], "args": {"name": name}}
+            for thread, name in self.threads.items()
+        ]
+        events += [
+            {
+                "name": name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": (start - self.start) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": thread_ids[thread],
+                "args": attributes,
+            }
+            for name, start, end, thread, _, attributes in sorted(list(self.spans), key=lambda span: span[1])
+        ]
+        with open(f"{filename}.tmp", "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        os.replace(f"{filename}.tmp", filename)
+        
+    def summarize(self, slowest_cells: int = 5) -> None:
+        spans = list(self.spans)
+        names = sorted({span[0] for span in spans})
+        durations = np.array([span[2] - span[1] for span in spans], dtype=np.float64) / 1e6
+        span_names = np.array([span[0] for span in spans], dtype=str)
+        lines = [f"{'Stage':<32}{'Count':>8}{'Total [ms]':>14}{'p50 [ms]':>12}{'p95 [ms]':>12}"]
+        for name in sorted(names, key=lambda name: -durations[span_names == name].sum()):
+            stage = durations[span_names == name]
+            lines.append(f"{name:<32}{len(stage):>8}{stage.sum():>14.1f}{np.percentile(stage, 50):>12.1f}{np.percentile(stage, 95):>12.1f}")
+        log.info("Time spent in each stage:\n" + "\n".join(f"\t{line}" for line in lines))
+        # Only outermost spans count towards a cell, so nested stages are not counted twice
+        cells: Dict[str, float] = {}
+        for (_, _, _, _, depth, attributes), duration in zip(spans, durations):
+            if depth == 0 and "cell" in attributes:
+                cells[attributes["cell"]] = cells.get(attributes["cell"], 0.0) + float(duration)
+        if len(cells) > 0:
+            slowest = sorted(cells.items(), key=lambda cell: -cell[1])[:slowest_cells]
+            log.info("Slowest cells:\n" + "\n".join(f"\t{name:<32}{duration:>14.1f} ms" for name, duration in slowest))
+
+
+tracer = Tracer()
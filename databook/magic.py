@@ -0,0 +1,211 @@
+import os, hashlib, fnmatch
+from array import array
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+
+from .errors import CharacterizationError, ToolError
+from .log import log, tracer
+from .tools import run_command, workspace
+
+
+# The directory the cells are read from and which of them to work on: every cell, or only those
+# matching one of the patterns, which are names or globs such as nand*
+class Library:
+    # Places every cell in rows, so it is a layout rather than a cell
+    layout = "all"
+    
+    def __init__(self, directory: str = ".", patterns: Optional[List[str]] = None) -> None:
+        self.directory = directory
+        self.patterns = patterns
+        
+    def path(self, cell_name: str) -> str:
+        return os.path.join(self.directory, f"{cell_name}.mag")
+    
+    def selects(self, cell_name: str) -> bool:
+        if cell_name == self.layout:
+            return False
+        return self.patterns is None or any(fnmatch.fnmatchcase(cell_name, pattern) for pattern in self.patterns)
+    
+    def names(self) -> List[str]:
+        return [filename[:-4] for filename in sorted(os.listdir(self.directory)) if filename.endswith(".mag")]
+        
+    def cells(self) -> List[str]:
+        return [name for name in self.names() if self.selects(name)]
+    
+    # Patterns that match no cell, which are most likely misspelt
+    def unmatched(self) -> List[str]:
+        names = [name for name in self.names() if name != self.layout]
+        return [pattern for pattern in self.patterns or [] if len(fnmatch.filter(names, pattern)) == 0]
+
+
+library = Library()
+
+
+# Runs Magic once for the whole library, extracting every cell from a single generated script
+# instead of starting Magic (and loading the tech file) per cell. Should that run fail, each cell
+# it did not extract is run again on its own, so a cell Magic cannot read only fails itself
+class Magic:
+    command = ["magic", "-dnull", "-noconsole", "-T", "tsmc180"]
+    
+    def __init__(self) -> None:
+        self.cells: List[str] = []
+        self.extracted: Dict[str, str] = {}
+        
+    def add(self, cell_name: str) -> None:
+        self.cells.append(cell_name)
+        
+    @staticmethod
+    def script(cell_names: List[str]) -> str:
+        # Otherwise Magic writes each .ext file next to its .mag file, in the cell directory
+        script = "extract do local\n"
+        for cell_name in cell_names:
+            script += f"load {os.path.abspath(os.path.join(library.directory, cell_name))}\n"
+            script += "extract\n"
+        script += "quit -noprompt\n"
+        return script
+        
+    def run(self) -> None:
+        if len(self.cells) == 0:
+            return
+        directory = workspace.directory("magic")
+        try:
+            self.extract(directory, self.cells)
+        except ToolError as error:
+            log.info(f"Extracting the cells magic did not get to one at a time, after: {error}")
+        self.extracted = self.find(directory, self.cells)
+        
+    # The .ext file of the cell, extracting it on its own if the run for every cell did not
+    def get_extracted(self, cell_name: str) -> str:
+        if cell_name in self.extracted:
+            return self.extracted[cell_name]
+        directory = workspace.directory("magic", cell_name)
+        self.extract(directory, [cell_name], f"Failed to extract cell '{cell_name}'")
+        extracted = self.find(directory, [cell_name])
+        if cell_name not in extracted:
+            raise CharacterizationError(f"Failed to extract cell '{cell_name}'")
+        return extracted[cell_name]
+        
+    def extract(self, directory: str, cell_names: List[str], error_message: str = "Failed to run magic") -> None:
+        with open(f"{directory}/magic.tcl", "w") as script_file:
+            script_file.write(self.script(cell_names))
+        run_command(self.command, error_message, cwd=directory, stdin=f"{directory}/magic.tcl")
+        
+    @staticmethod
+    def find(directory: str, cell_names: List[str]) -> Dict[str, str]:
+        return {cell_name: f"{directory}/{cell_name}.ext" for cell_name in cell_names if os.path.exists(f"{directory}/{cell_name}.ext")}
+
+
+class Coordinate:
+    def __init__(
+        self,
+        x: float,
+        y: float,
+    ) -> None:
+        self.x = x
+        self.y = y
+
+    def __truediv__(self, other: float) -> "Coordinate":
+        return Coordinate(self.x / other, self.y / other)
+    
+    def __str__(self) -> str:
+        return f"({self.x}, {self.y})"
+
+
+# Reads a Magic .mag file in a single pass, keeping the rectangles of each layer as flat
+# (llx, lly, urx, ury) integer arrays, the labels indexed by name and the bounding box of the cell
+class MagFile:
+    ignored_layers = ("checkpaint",)
+    
+    
+    class Label:
+        def __init__(self, name: str, layer: str, box: Tuple[int, int, int, int], position: int) -> None:
+            self.name = name
+            self.layer = layer
+            self.box = box
+            self.position = position
+    
+    
+    class Use:
+        def __init__(self, cell_name: str, instance_name: str) -> None:
+            self.cell_name = cell_name
+            self.instance_name = instance_name
+            self.timestamp = 0
+            self.transform: Tuple[int, int, int, int, int, int] = (1, 0, 0, 0, 1, 0)
+            self.box: Tuple[int, int, int, int] = (0, 0, 0, 0)
+            self.array: Tuple[int, int, int, int, int, int] = (0, 0, 0, 0, 0, 0)
+            
+        def get_bounding_box(self) -> Tuple[int, int, int, int]:
+            a, b, c, d, e, f = self.transform
+            llx, lly, urx, ury = self.box
+            xlo, xhi, xsep, ylo, yhi, ysep = self.array
+            llx, urx = llx + min(0, (xhi - xlo) * xsep), urx + max(0, (xhi - xlo) * xsep)
+            lly, ury = lly + min(0, (yhi - ylo) * ysep), ury + max(0, (yhi - ylo) * ysep)
+            xs = [a * x + b * y + c for x in (llx, urx) for y in (lly, ury)]
+            ys = [d * x + e * y + f for x in (llx, urx) for y in (lly, ury)]
+            return min(xs), min(ys), max(xs), max(ys)
+    
+    
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.tech = ""
+        self.timestamp = 0
+        self.rects: Dict[str, array[int]] = {}
+        self.labels: Dict[str, List[MagFile.Label]] = {}
+        self.uses: List[MagFile.Use] = []
+        self.digest = ""
+        self.bounding_box: Optional[Tuple[int, int, int, int]] = None
+        self.parse()
+        
+    def parse(self) -> None:
+        with tracer.span("MagFile.parse", file=self.filename):
+            digest = hashlib.sha256()
+            layer = ""
+            use: Optional[MagFile.Use] = None
+            boxes = array("i")
+            with open(self.filename, "r") as magic_file:
+                text = magic_file.read()
+                digest.update(text.encode())
+                for line in text.splitlines():
+                    words = line.split()
+                    if len(words) == 0:
+                        continue
+                    keyword = words[0]
+                    if keyword == "rect":
+                        if layer not in self.ignored_layers:
+                            self.rects.setdefault(layer, array("i")).extend((int(words[1]), int(words[2]), int(words[3]), int(words[4])))
+                    elif keyword == "rlabel":
+                        box = (int(words[2]), int(words[3]), int(words[4]), int(words[5]))
+                        boxes.extend(box)
+                        self.labels.setdefault(words[-1], []).append(MagFile.Label(words[-1], words[1], box, int(words[6])))
+                    elif keyword == "<<":
+                        layer = words[1]
+                        continue
+                    elif keyword == "use":
+                        use = MagFile.Use(words[1], words[2] if len(words) > 2 else words[1])
+                        self.uses.append(use)
+                        continue
+                    elif keyword == "timestamp":
+                        if use is None:
+                            self.timestamp = int(words[1])
+                        else:
+                            use.timestamp = int(words[1])
+                        continue
+                    elif keyword == "transform" and use is not None:
+                        use.transform = (int(words[1]), int(words[2]), int(words[3]), int(words[4]), int(words[5]), int(words[6]))
+                        continue
+                    elif keyword == "array" and use is not None:
+                        use.array = (int(words[1]), int(words[2]), int(words[3]), int(words[4]), int(words[5]), int(words[6]))
+                        continue
+                    elif keyword == "box" and use is not None:
+                        use.box = (int(words[1]), int(words[2]), int(words[3]), int(words[4]))
+                        boxes.extend(use.get_bounding_box())
+                    elif keyword == "tech":
+                        self.tech = words[1]
+            self.digest = digest.hexdigest()
+            # Every shape, label and use counts towards the bounding box
+            all_boxes = np.concatenate([np.frombuffer(rects, dtype=np.int32) for rects in (*self.rects.values(), boxes)]).reshape(-1, 4)
+            if len(all_boxes) > 0:
+                self.bounding_box = (int(all_boxes[:, 0].min()), int(all_boxes[:, 1].min()), int(all_boxes[:, 2].max()), int(all_boxes[:, 3].max()))
+            
+    def get_size(self) -> int:
+        return sum(len(rects) // 4 for rects in self.rects.values()) + sum(len(labels) for labels in self.labels.values()) + len(self.uses)
@@ -0,0 +1,237 @@
+import os, threading, heapq, shutil, hashlib, json
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Callable, Iterable, IO, Optional
+from datetime import datetime
+
+from .errors import FatalError, ToolError
+from .log import log
+from .tools import runner
+
+
+class Job:
+    def __init__(
+        self,
+        name: str,
+        function: Callable[[], Any],
+        dependencies: Iterable["Job"],
+        cost: float,
+        on_failure: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        self.name = name
+        self.function = function
+        self.dependencies = list(dependencies)
+        self.dependants: List[Job] = []
+        self.cost = cost
+        self.priority = cost
+        self.on_failure = on_failure
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        for dependency in self.dependencies:
+            dependency.dependants.append(self)
+
+
+# Runs each job once all of its dependencies have finished, starting the job with the longest
+# chain of work behind it first so the slowest simulations are never left until the end. A job that
+# raises fails along with everything depending on it, after up to `retries` reruns if a tool failed
+class Scheduler:
+    def __init__(self, jobs: int, retries: int = 0) -> None:
+        self.max_workers = max(jobs, 1)
+        self.retries = retries
+        self.jobs: List[Job] = []
+
+    def add(
+        self,
+        name: str,
+        function: Callable[[], Any],
+        dependencies: Iterable[Job] = (),
+        cost: float = 1.0,
+        on_failure: Optional[Callable[[Exception], None]] = None,
+    ) -> Job:
+        job = Job(name, function, dependencies, cost, on_failure)
+        self.jobs.append(job)
+        return job
+    
+    def fail(self, job: Job, error: Exception) -> None:
+        failed = [job]
+        while len(failed) > 0:
+            job = failed.pop()
+            if job.error is not None:
+                continue
+            job.error = error
+            if job.on_failure is not None:
+                job.on_failure(error)
+            failed += job.dependants
+
+    def run(self) -> None:
+        runner.reset()
+        # Dependencies are always added before their dependants
+        for job in reversed(self.jobs):
+            job.priority = job.cost + max((dependant.priority for dependant in job.dependants), default=0.0)
+        remaining = {job: len(job.dependencies) for job in self.jobs}
+        ready = [(-job.priority, index, job) for index, job in enumerate(self.jobs) if remaining[job] == 0]
+        heapq.heapify(ready)
+        indices = {job: index for index, job in enumerate(self.jobs)}
+        running: Dict[Future[Any], Job] = {}
+        attempts = {job: 0 for job in self.jobs}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while ready or running:
+                    while ready and len(running) < self.max_workers:
+                        _, _, job = heapq.heappop(ready)
+                        attempts[job] += 1
+                        running[executor.submit(job.function)] = job
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        try:
+                            job.result = future.result()
+                        except ToolError as error:
+                            if attempts[job] > self.retries:
+                                self.fail(job, error)
+                                continue
+                            log.info(f"Retrying {job.name} ({attempts[job]} of {self.retries}) after: {error}")
+                            heapq.heappush(ready, (-job.priority, indices[job], job))
+                            continue
+                        except FatalError:
+                            raise
+                        except Exception as error:
+                            self.fail(job, error)
+                            continue
+                        for dependant in job.dependants:
+                            remaining[dependant] -= 1
+                            if remaining[dependant] == 0:
+                                heapq.heappush(ready, (-dependant.priority, indices[dependant], dependant))
+            except BaseException:
+                # Kill the running tools too, otherwise leaving the pool would wait for them to finish
+                for future in running:
+                    future.cancel()
+                runner.cancel()
+                raise
+
+
+# Per-cell results stored under a hash of everything that can change them, evicting the least
+# recently used entries once the cache grows past its size limit
+class Cache:
+    # Increase whenever the stored results or the HTML rendered from them change
+    version = 9
+    model_file = "/opt/cad/designkits/ecs/hspice/tsmc180.mod"
+    tools = ["check_magic_leaf_cell", "magic", "ext2sp", "hspice", "ngspice"]
+    
+    def __init__(
+        self,
+        directory: str = ".cache",
+        max_size: int = 100 * 1024 * 1024,
+        enabled: bool = True,
+        refresh: Iterable[str] = (),
+    ) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.enabled = enabled
+        self.refresh = set(refresh)
+        self.lock = threading.Lock()
+        self.environment = self.get_environment()
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            
+    def get_environment(self) -> str:
+        environment = hashlib.sha256(f"version: {self.version}\n".encode())
+        if os.path.exists(self.model_file):
+            with open(self.model_file, "rb") as model_file:
+                environment.update(model_file.read())
+        # The tools have no common version flag, so their installed executables stand in for it
+        for tool in self.tools:
+            path = shutil.which(tool)
+            if path is None:
+                environment.update(f"{tool}: missing\n".encode())
+                continue
+            status = os.stat(path)
+            environment.update(f"{tool}: {os.path.realpath(path)} {status.st_size} {status.st_mtime_ns}\n".encode())
+        return environment.hexdigest()
+    
+    def key(self, *parts: str) -> str:
+        key = hashlib.sha256(self.environment.encode())
+        for part in parts:
+            key.update(hashlib.sha256(part.encode()).digest())
+        return key.hexdigest()
+    
+    def load(self, cell_name: str, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled or cell_name in self.refresh:
+            return None
+        path = f"{self.directory}/{key}.json"
+        try:
+            with open(path, "r") as cache_file:
+                data: Dict[str, Any] = json.load(cache_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return data
+    
+    def store(self, key: str, data: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        path = f"{self.directory}/{key}.json"
+        with open(f"{path}.tmp", "w") as cache_file:
+            json.dump(data, cache_file)
+        os.replace(f"{path}.tmp", path)
+        self.evict()
+        
+    def evict(self) -> None:
+        with self.lock:
+            entries = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            size = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if size <= self.max_size:
+                    break
+                size -= entry.stat().st_size
+                os.remove(entry.path)
+
+
+# Append-only record of every cell that finished or failed, one JSON object per line written as
+# soon as the cell is done, so a run that was interrupted or had failures can be resumed without
+# characterizing the finished cells again. Commands that only read the cache keep no journal
+class Journal:
+    def __init__(self, resume: bool = False, filename: str = "journal.jsonl", enabled: bool = True) -> None:
+        self.filename = filename
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.file: Optional[IO[str]] = None
+        if not enabled:
+            return
+        line = "\n"
+        if resume and os.path.exists(self.filename):
+            with open(self.filename, "r") as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Cut short by the end of an interrupted run
+                        continue
+                    self.entries[entry["cell"]] = entry
+        self.file = open(self.filename, "a" if resume else "w")
+        if not line.endswith("\n"):
+            self.file.write("\n")
+            
+    def load(self, cell_name: str, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(cell_name)
+        if entry is None or entry["status"] != "done" or entry["key"] != key:
+            return None
+        results: Dict[str, Any] = entry["results"]
+        return results
+    
+    def record(self, cell_name: str, key: Optional[str], status: str, **fields: Any) -> None:
+        entry = {"cell": cell_name, "key": key, "status": status, "time": datetime.now().isoformat(timespec="seconds"), **fields}
+        line = json.dumps(entry) + "\n"
+        with self.lock:
+            self.entries[cell_name] = entry
+            if self.file is None:
+                return
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
@@ -0,0 +1,536 @@
+import os, re, json, zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import List, Dict, Tuple, Union, Callable, Optional
+import numpy as np
+
+from .errors import CharacterizationError
+from .log import tracer
+from .tools import check_command, run_command, runner
+
+
+# Measurement results of one HSPICE run (.mt*, .ms* or .ma*) with a column per measurement and a row
+# per sweep point, the measurements that failed being masked out
+class Measurements:
+    def __init__(self, names: List[str], values: np.ma.MaskedArray) -> None:
+        self.names = names
+        self.columns = {name: i for i, name in enumerate(self.names)}
+        self.values = values
+        
+    @staticmethod
+    def read(filename: str) -> "Measurements":
+        with tracer.span("Measurements.read"):
+            # HSPICE wraps the measurement names and each row of values over several lines, with
+            # alter# always the last column
+            with open(filename, "r") as measurement_file:
+                lines = measurement_file.readlines()
+            start = next(i for i, line in enumerate(lines) if line.startswith(".TITLE")) + 1
+            tokens = np.array(" ".join(lines[start:]).split())
+            num_columns = int(np.flatnonzero(tokens == "alter#")[0]) + 1
+            values = tokens[num_columns:].reshape(-1, num_columns)
+            failed = values == "failed"
+            return Measurements(
+                [name.lower() for name in tokens[:num_columns]],
+                np.ma.masked_array(np.where(failed, "nan", values).astype(float), mask=failed),
+            )
+        
+    def __len__(self) -> int:
+        return len(self.values)
+        
+    def __getitem__(self, name: str) -> np.ma.MaskedArray:
+        return self.values[:, self.columns[name.lower()]]
+
+
+def write_measurements(filename: str, names: List[str], rows: List[Dict[str, Union[str, float]]]) -> None:
+    wrap: Callable[[List[str]], str] = lambda items: "".join(
+        "".join(f" {item:<16}" for item in items[i:i + 4]) + "\n" for i in range(0, len(items), 4)
+    )
+    with open(filename, "w") as measurement_file:
+        measurement_file.write("$DATA1 SOURCE='HSPICE' VERSION='stand-in'\n.TITLE ''\n")
+        measurement_file.write(wrap(names))
+        for row in rows:
+            measurement_file.write(wrap([value if isinstance(value, str) else f"{value:.4e}" for value in (row[name] for name in names)]))
+
+
+# Probed waveforms of one corner of a deck, with a column per signal holding every row of the sweep
+# one after another and the offset of each row. Voltages are named after their node and currents
+# i(source). Archives are a float32 .npy file per column (float64 for time) that np.load can memory
+# map, so a single signal of a single row can be read without loading the rest
+class Waveforms:
+    def __init__(self, columns: Dict[str, np.ndarray], offsets: np.ndarray, rows: Optional[List[List[float]]] = None) -> None:
+        self.columns = columns
+        self.offsets = offsets
+        # The swept values of each row
+        self.rows = rows or []
+        
+    @staticmethod
+    def column_name(name: str) -> str:
+        name = name.strip().lower()
+        if name.endswith("#branch"):
+            return f"i({name[:-len('#branch')]})"
+        # HSPICE leaves the closing parenthesis off current names
+        if name.startswith("i(") and not name.endswith(")"):
+            return name + ")"
+        match = re.fullmatch(r"v\((.+)\)", name)
+        return name if match is None else match.group(1)
+    
+    @staticmethod
+    def file_name(name: str) -> str:
+        return re.sub(r"\W", "_", name.replace(")", "")) + ".npy"
+        
+    # An ASCII .tr0 (.options POST=2): a header line with the number of signals and sweep parameters
+    # and the format version, the signal types then names then sweep parameter names ending in $&%#,
+    # and fixed width numbers with each sweep row starting with its sweep values and ending in 1e30
+    @staticmethod
+    def read_tr0(filename: str) -> "Waveforms":
+        with open(filename, "r", errors="replace") as waveform_file:
+            text = waveform_file.read()
+        if "$&%#" not in text:
+            raise ValueError(f"{filename} has no waveforms")
+        header, data = text.split("$&%#", 1)
+        num_signals = int(header[0:4]) + int(header[4:8])
+        num_sweeps = int(header[8:12])
+        tokens = header.split()
+        names = [Waveforms.column_name(name) for name in tokens[len(tokens) - num_signals - num_sweeps:len(tokens) - num_sweeps]]
+        width = 13 if header[16:20] == "2001" else 11
+        # The numbers start on the line after the terminator
+        data = data.split("\n", 1)[-1].replace("\n", "").replace("\r", "").rstrip()
+        values = np.frombuffer(data[:len(data) - len(data) % width].encode(), dtype=f"S{width}").astype(float)
+        columns: List[List[np.ndarray]] = [[] for _ in names]
+        offsets = [0]
+        start = 0
+        for end in np.flatnonzero(values >= 1e30):
+            block = values[start + num_sweeps:end]
+            block = block[:len(block) - len(block) % num_signals].reshape(-1, num_signals)
+            for column, values_column in zip(columns, block.T):
+                column.append(values_column)
+            offsets.append(offsets[-1] + len(block))
+            start = end + 1
+        return Waveforms({name: np.concatenate(column) for name, column in zip(names, columns)}, np.array(offsets))
+    
+    # ngspice rawfiles, one per row of the sweep, in ASCII or binary
+    @staticmethod
+    def read_raw(filenames: List[str]) -> "Waveforms":
+        rows: List[Dict[str, np.ndarray]] = []
+        for filename in filenames:
+            with open(filename, "rb") as raw_file:
+                content = raw_file.read()
+            binary = content.find(b"Binary:\n")
+            ascii_values = content.find(b"Values:\n")
+            header = content[:binary if binary >= 0 else ascii_values].decode(errors="replace")
+            variables_match = re.search(r"No\. Variables:\s*(\d+)", header)
+            points_match = re.search(r"No\. Points:\s*(\d+)", header)
+            if variables_match is None or points_match is None:
+                raise ValueError(f"{filename} has no variable or point count")
+            num_variables, num_points = int(variables_match.group(1)), int(points_match.group(1))
+            variables = header.split("Variables:", 2)[-1].split("\n")[1:num_variables + 1]
+            names = [Waveforms.column_name(variable.split()[1]) for variable in variables]
+            if binary >= 0:
+                values = np.frombuffer(content, dtype=np.float64, count=num_points * num_variables, offset=binary + len("Binary:\n"))
+            else:
+                values = np.array(content[ascii_values + len("Values:\n"):].split(), dtype=float).reshape(-1, num_variables + 1)[:, 1:]
+            rows.append(dict(zip(names, values.reshape(num_points, num_variables).T)))
+        names = list(rows[0]) if len(rows) > 0 else []
+        offsets = np.cumsum([0] + [len(row[names[0]]) if len(names) > 0 else 0 for row in rows])
+        return Waveforms({name: np.concatenate([row[name] for row in rows]) for name in names}, offsets)
+    
+    def row(self, k: int) -> Dict[str, np.ndarray]:
+        return {name: column[self.offsets[k]:self.offsets[k + 1]] for name, column in self.columns.items()}
+    
+    @staticmethod
+    def load(directory: str) -> "Waveforms":
+        with open(os.path.join(directory, "index.json"), "r") as index_file:
+            index = json.load(index_file)
+        return Waveforms(
+            {name: np.load(os.path.join(directory, Waveforms.file_name(name)), mmap_mode="r") for name in index["columns"]},
+            np.array(index["offsets"]),
+            index["rows"],
+        )
+    
+    # Adds the rows to the archive in directory, after any rows an earlier run of the same deck put
+    # there (as the runs of an adaptive load sweep do)
+    def save(self, directory: str) -> None:
+        waveforms = self
+        if os.path.exists(os.path.join(directory, "index.json")):
+            previous = Waveforms.load(directory)
+            waveforms = Waveforms(
+                {name: np.concatenate([previous.columns[name], column]) for name, column in self.columns.items() if name in previous.columns},
+                np.concatenate([previous.offsets, previous.offsets[-1] + self.offsets[1:]]),
+                previous.rows + self.rows,
+            )
+        os.makedirs(directory, exist_ok=True)
+        for name, column in waveforms.columns.items():
+            np.save(os.path.join(directory, Waveforms.file_name(name)), np.asarray(column, dtype=np.float64 if name == "time" else np.float32))
+        with open(os.path.join(directory, "index.json"), "w") as index_file:
+            json.dump({"columns": list(waveforms.columns), "offsets": waveforms.offsets.tolist(), "rows": waveforms.rows}, index_file)
+
+
+# Runs the deck written to {directory}/{deck_name}.sp and leaves its measurements next to it in
+# HSPICE's .mt0 format, whichever simulator produced them
+class Simulator(ABC):
+    name = ""
+    # Whether the simulator can run the OPTIMIZE sweeps that measure input capacitance
+    supports_optimization = True
+    # Whether the simulator writes the waveforms of probed signals
+    supports_waveforms = True
+    
+    @abstractmethod
+    def simulate(self, directory: str, deck_name: str, error_message: str) -> None:
+        ...
+    
+    @abstractmethod
+    def read_waveforms(self, directory: str, deck_name: str, index: int) -> Waveforms:
+        ...
+    
+    # What an .alter statement redefines: the temperature, a parameter or the model library
+    @staticmethod
+    def redefines(line: str) -> Optional[Tuple[str, ...]]:
+        tokens = line.lower().split()
+        if tokens[:1] == [".temp"]:
+            return (".temp",)
+        if tokens[:1] in ([".lib"], [".include"]) and len(tokens) > 1 and tokens[1].strip("'\"") == Corner.model_file:
+            return (".lib",)
+        match = re.fullmatch(r"\.param\s+(\w+)\s*=\s*\S+", line.strip(), re.IGNORECASE)
+        if match is not None:
+            return (".param", match.group(1).lower())
+        return None
+    
+    # For simulators without .alter: the deck of each corner, with the statements after its .alter
+    # in place of the ones they redefine
+    @staticmethod
+    def split_alters(lines: List[str]) -> List[List[str]]:
+        blocks: List[List[str]] = [[]]
+        for line in lines:
+            if line.lower().startswith(".alter"):
+                blocks.append([])
+            elif line.strip().lower() != ".end":
+                blocks[-1].append(line)
+        decks = [blocks[0] + [".end"]]
+        for block in blocks[1:]:
+            statements = {Simulator.redefines(line): line for line in block if Simulator.redefines(line) is not None}
+            deck: List[str] = []
+            for line in blocks[0]:
+                key = Simulator.redefines(line)
+                deck.append(statements.pop(key) if key in statements else line)
+            decks.append(deck + list(statements.values()) + [line for line in block if Simulator.redefines(line) is None] + [".end"])
+        return decks
+
+
+class HSpice(Simulator):
+    name = "hspice"
+    
+    def simulate(self, directory: str, deck_name: str, error_message: str) -> None:
+        run_command(["hspice", f"{deck_name}.sp"], error_message, cwd=directory, log_filename=f"{directory}/{deck_name}.lis")
+        
+    def read_waveforms(self, directory: str, deck_name: str, index: int) -> Waveforms:
+        return Waveforms.read_tr0(f"{directory}/{deck_name}.tr{index}")
+
+
+# ngspice has no .data sweeps, so every row of the sweep is run as its own deck (concurrently) with
+# the swept parameters set by .param, and the measurements printed to each listing become one row
+class NgSpice(Simulator):
+    name = "ngspice"
+    supports_optimization = False
+    ignored_lines = (".options post", ".options probe")
+    
+    def simulate(self, directory: str, deck_name: str, error_message: str) -> None:
+        with open(f"{directory}/{deck_name}.sp", "r") as spice_file:
+            lines = spice_file.read().splitlines()
+        if any("optimize=" in line.lower() for line in lines):
+            raise CharacterizationError(f"{error_message}. Reason:\nngspice cannot run HSPICE optimization sweeps")
+        # Every row of every corner is started before any is read
+        corners = [self.submit(directory, f"{deck_name}_{index}", deck) for index, deck in enumerate(self.split_alters(lines))]
+        for index, (columns, rows, names, temperature, futures) in enumerate(corners):
+            measurements: List[Dict[str, Union[str, float]]] = []
+            for i, (row, (log_filename, future)) in enumerate(zip(rows, futures)):
+                check_command(future, log_filename, error_message)
+                measurement: Dict[str, Union[str, float]] = {column: float(value) for column, value in zip(columns, row)}
+                # Measurements that never triggered are reported as errors rather than printed
+                measurement.update({name: "failed" for name in names})
+                with open(f"{directory}/{deck_name}_{index}_{i}.lis", "r", errors="replace") as listing_file:
+                    for line in listing_file:
+                        match = re.match(r"\s*(\w+)\s*=\s*([-+\d.eE]+)", line)
+                        if match and match.group(1).lower() in names:
+                            measurement[match.group(1).lower()] = float(match.group(2))
+                measurement["temper"] = temperature
+                measurement["alter#"] = float(index + 1)
+                measurements.append(measurement)
+            write_measurements(f"{directory}/{deck_name}.mt{index}", columns + names + ["temper", "alter#"], measurements)
+            
+    def submit(self, directory: str, deck_name: str, lines: List[str]) -> Tuple[List[str], List[List[str]], List[str], float, List[Tuple[str, "Future[int]"]]]:
+        columns: List[str] = []
+        rows: List[List[str]] = [[]]
+        body: List[str] = []
+        temperature = 25.0
+        line_iterator = iter(lines)
+        for line in line_iterator:
+            tokens = line.lower().split()
+            if tokens[:1] == [".data"]:
+                columns = tokens[2:]
+                rows = [row.split() for row in iter(line_iterator.__next__, ".enddata") if row.strip()]
+            elif line.lower().startswith(self.ignored_lines):
+                continue
+            elif tokens[:1] == [".probe"]:
+                # ngspice names the current through a source after its branch
+                body.append(".save " + " ".join(re.sub(r"^i\((\w+)\)$", r"\1#branch", token) for token in tokens[2:]))
+            elif tokens[:1] == [".tran"]:
+                body.append(re.sub(r"\s+sweep\b.*$", "", line, flags=re.IGNORECASE))
+            else:
+                if tokens[:1] == [".temp"]:
+                    temperature = float(tokens[1])
+                body.append(line)
+        body = [line for line in body if not any(re.match(rf"\.param\s+{column}\s*=", line, re.IGNORECASE) for column in columns)]
+        names = [line.split()[2].lower() for line in body if line.lower().startswith((".measure", ".meas "))]
+        futures: List[Tuple[str, Future[int]]] = []
+        for i, row in enumerate(rows):
+            # The first line of a deck is its title
+            parameters = [f".param {column}={value}" for column, value in zip(columns, row)]
+            with open(f"{directory}/{deck_name}_{i}.sp", "w") as spice_file:
+                spice_file.write("\n".join(body[:1] + parameters + body[1:]) + "\n")
+            command = ["ngspice", "-b", "-o", f"{deck_name}_{i}.lis", f"{deck_name}_{i}.sp"]
+            if any(line.startswith(".save") for line in body):
+                command[2:2] = ["-r", f"{deck_name}_{i}.raw"]
+            futures.append((f"{directory}/{deck_name}_{i}.log", runner.submit(command, directory, f"{directory}/{deck_name}_{i}.log")))
+        return columns, rows, names, temperature, futures
+    
+    def read_waveforms(self, directory: str, deck_name: str, index: int) -> Waveforms:
+        filenames = [entry.name for entry in os.scandir(directory) if re.fullmatch(rf"{re.escape(deck_name)}_{index}_\d+\.raw", entry.name)]
+        return Waveforms.read_raw([f"{directory}/{filename}" for filename in sorted(filenames, key=lambda filename: int(filename.split("_")[-1][:-4]))])
+
+
+# Deterministic stand-in that runs no process at all: each delay is made up from a hash of the cell,
+# its nodes and edges plus the load on the target node, scaled for the process, temperature and
+# supply of the corner, and roughly one arc in seven fails to switch, so the whole flow can run
+# without simulator licenses. tools/hspice runs the same model behind the hspice command line
+class FakeSimulator(Simulator):
+    name = "fake"
+    supports_waveforms = False
+    # How much slower each process section is than typical
+    processes = {"tt": 1.0, "ss": 1.25, "ff": 0.8}
+    
+    @staticmethod
+    def hash(*parts: str) -> float:
+        return zlib.crc32("/".join(parts).encode()) / 2**32
+    
+    # A number, a parameter or a quoted expression of parameters, evaluated without any builtins
+    def number(self, token: str, parameters: Dict[str, float]) -> float:
+        expression = token.strip("'{}").lower()
+        try:
+            return spice_number(expression)
+        except ValueError:
+            pass
+        try:
+            return float(eval(expression, {"__builtins__": {}}, dict(parameters)))
+        except (NameError, SyntaxError, TypeError, ZeroDivisionError):
+            return 0.0
+    
+    def simulate(self, directory: str, deck_name: str, error_message: str) -> None:
+        with open(f"{directory}/{deck_name}.sp", "r") as spice_file:
+            lines = spice_file.read().splitlines()
+        for index, deck in enumerate(self.split_alters(lines)):
+            self.simulate_corner(f"{directory}/{deck_name}.mt{index}", deck_name, deck, index)
+            
+    def read_waveforms(self, directory: str, deck_name: str, index: int) -> Waveforms:
+        raise CharacterizationError(f"The {self.name} simulator writes no waveforms")
+        
+    def simulate_corner(self, filename: str, deck_name: str, lines: List[str], index: int) -> None:
+        parameters: Dict[str, float] = {"vd": 1.8}
+        temperature = 25.0
+        process = "tt"
+        columns: List[str] = []
+        rows: List[List[str]] = [[]]
+        loads: Dict[str, str] = {}
+        measures: List[List[str]] = []
+        cell_name = deck_name
+        slew = "0.25ns"
+        in_subckt = False
+        line_iterator = iter(lines)
+        for line in line_iterator:
+            tokens = line.split()
+            keyword = tokens[0].lower() if tokens else ""
+            if keyword == ".subckt":
+                cell_name = tokens[1]
+                in_subckt = True
+            elif keyword == ".ends":
+                in_subckt = False
+            elif in_subckt or keyword == "":
+                continue
+            elif keyword == ".param":
+                for name, value in re.findall(r"(\w+)\s*=\s*('[^']*'|\S+)", line[6:]):
+                    parameters[name.lower()] = self.number(value, parameters)
+            elif keyword == ".temp":
+                temperature = float(tokens[1])
+            elif keyword == ".lib" and len(tokens) > 2:
+                process = tokens[2].lower()
+            elif keyword == ".data":
+                columns = [column.lower() for column in tokens[2:]]
+                rows = [row.split() for row in iter(line_iterator.__next__, ".enddata") if row.strip()]
+            elif keyword.startswith("c"):
+                loads[tokens[1]] = tokens[3]
+            elif keyword.startswith("v") and "pulse(" in line.lower():
+                pulse = re.search(r"pulse\(([^)]*)\)", line, re.IGNORECASE)
+                if pulse is not None:
+                    slew = pulse.group(1).split()[3]
+            elif keyword in (".measure", ".meas"):
+                measures.append(tokens)
+        optimize = any("optimize=" in line.lower() for line in lines)
+        names = [measure[2].lower() for measure in measures]
+        if optimize:
+            names.insert(1, "cload")
+        measurements: List[Dict[str, Union[str, float]]] = []
+        for row in rows:
+            row_parameters = dict(parameters)
+            measurement: Dict[str, Union[str, float]] = {}
+            for column, value in zip(columns, row):
+                row_parameters[column] = measurement[column] = self.number(value, row_parameters)
+            input_slew = self.number(slew, row_parameters)
+            factor = self.processes.get(process, 1.0) * (1 + (temperature - 25) * 0.002) * (1.8 / row_parameters["vd"])
+            for measure in measures:
+                name = measure[2].lower()
+                specification = " ".join(measure[3:])
+                expression = re.search(r"param='([^']*)'", specification, re.IGNORECASE)
+                if expression is not None:
+                    try:
+                        measurement[name] = float(eval(expression.group(1).lower(), {"__builtins__": {}}, dict(measurement)))
+                    except TypeError:
+                        measurement[name] = "failed"
+                    continue
+                # Supply charge and current are made up from the cell and the kind of measure alone
+                if re.search(r"\b(integ|avg)\b", specification, re.IGNORECASE):
+                    scale = 1e-14 if "integ" in specification.lower() else 1e-9
+                    measurement[name] = -(0.5 + self.hash(cell_name, name.split("_")[-1])) * scale * factor
+                    continue
+                nodes: List[str] = re.findall(r"v\((\S+?)\)", specification, re.IGNORECASE)
+                if len(nodes) < 2:
+                    measurement[name] = 0.0
+                    continue
+                trigger, target = nodes[:2]
+                load = self.number(loads[target], row_parameters) * 1e15 if target in loads else 0.0
+                if trigger == target:
+                    measurement[name] = (10 + 0.08 * load) * 1e-12 * factor + 0.5 * input_slew
+                elif self.hash(cell_name, trigger, target) < 0.15:
+                    measurement[name] = "failed"
+                else:
+                    edges = re.findall(r"(rise|fall)\s*=", specification, re.IGNORECASE)
+                    delay = (5 + 60 * self.hash(cell_name, trigger, target, *edges)) * 1e-12
+                    if self.hash(cell_name, trigger, target, *edges, "neg") < 0.2:
+                        delay = -delay
+                    measurement[name] = (delay + 3e-12 * load) * factor + 0.2 * input_slew
+            if optimize:
+                measurement["cload"] = (0.5 + 4 * self.hash(cell_name, *(measure[2] for measure in measures))) * 1e-15
+            measurement["temper"] = temperature
+            measurement["alter#"] = float(index + 1)
+            measurements.append(measurement)
+        write_measurements(filename, [column for column in columns if column not in names] + names + ["temper", "alter#"], measurements)
+
+
+simulators: Dict[str, Callable[[], Simulator]] = {
+    "hspice": HSpice,
+    "ngspice": NgSpice,
+    "fake": FakeSimulator,
+}
+
+
+def spice_number(token: str) -> float:
+    match = re.fullmatch(r"([-+]?[\d.]+(?:e[-+]?\d+)?)(meg|[fpnumkg])?[a-z]*", token.strip("'").lower())
+    if match is None:
+        raise ValueError(f"'{token}' is not a number")
+    return float(match.group(1)) * {"f": 1e-15, "p": 1e-12, "n": 1e-9, "u": 1e-6, "m": 1e-3, "k": 1e3, "meg": 1e6, "g": 1e9}.get(match.group(2) or "", 1)
+
+
+def spice_time(seconds: float) -> str:
+    for suffix, scale in (("ns", 1e-9), ("ps", 1e-12)):
+        if seconds >= scale:
+            return f"{round(seconds / scale, 3):g}{suffix}"
+    return f"{round(seconds / 1e-15, 3):g}fs"
+
+
+# Transient analysis of a deck [s]: the input switches at `delay` and back after `width`, with the
+# simulation running to `stop` in steps of `step`
+class Stimulus:
+    def __init__(
+        self,
+        step: float,
+        delay: float,
+        width: float,
+        stop: float,
+    ) -> None:
+        self.step = step
+        self.delay = delay
+        self.width = width
+        self.stop = stop
+        
+    def pulse(self, slew: str) -> str:
+        return f"PULSE(0 vd {spice_time(self.delay)} {slew} {slew} {spice_time(self.width)} 1s)"
+    
+    def transient(self) -> str:
+        return f".tran {spice_time(self.step)} {spice_time(self.stop)}"
+
+
+# How exactly cells are characterized. Signoff runs every deck in 1 fs steps over 30 ns; fast scales
+# the stimulus to an estimate of the cell's delay, steps a thousand times per settling window and
+# lets the optimizer stop early on the input capacitance
+class Tier:
+    def __init__(
+        self,
+        name: str,
+        scaled: bool,
+        optimizer: str,
+    ) -> None:
+        self.name = name
+        self.scaled = scaled
+        self.optimizer = optimizer
+        
+    def stimulus(self, estimated_delay: float) -> Stimulus:
+        if not self.scaled:
+            return Stimulus(1e-15, 10e-9, 10e-9, 30e-9)
+        # Long enough for the output to settle after each edge, even if the estimate is off
+        window = 4 * estimated_delay
+        return Stimulus(window / 1000, window, window, 3 * window)
+
+
+tiers = {
+    "signoff": Tier("signoff", False, ".model OPT1 opt"),
+    "fast": Tier("fast", True, ".model OPT1 opt relin=0.01 relout=0.01 itropt=10"),
+}
+
+
+# Process, voltage and temperature to characterize the cells at. The process is a section of the
+# model library, or None for the models the file defines outside any section
+class Corner:
+    model_file = "/opt/cad/designkits/ecs/hspice/tsmc180.mod"
+    
+    def __init__(
+        self,
+        name: str,
+        section: Optional[str],
+        temperature: float,
+        voltage: float,
+    ) -> None:
+        self.name = name
+        self.section = section
+        self.temperature = temperature
+        self.voltage = voltage
+        
+    def statements(self) -> str:
+        spice = f".include {self.model_file}\n" if self.section is None else f".lib '{self.model_file}' {self.section}\n"
+        spice += f".temp {self.temperature:g}\n"
+        spice += f".param vd={self.voltage:g}V\n"
+        return spice
+    
+    # The first corner is the deck itself and HSPICE runs it again for each of the others, with the
+    # statements after their .alter in place of the ones they redefine, writing .mt0, .mt1, ...
+    @staticmethod
+    def alters(corners: List["Corner"]) -> str:
+        return "".join(f".alter {corner.name}\n{corner.statements()}" for corner in corners[1:])
+    
+    def __str__(self) -> str:
+        return f"{self.name}: {self.section or 'default'} process, {self.temperature:g} °C, {self.voltage:g} V"
+
+
+corners = {
+    "nominal": Corner("nominal", None, 25, 1.8),
+    "typical": Corner("typical", "tt", 25, 1.8),
+    "slow": Corner("slow", "ss", 125, 1.62),
+    "fast": Corner("fast", "ff", -40, 1.98),
+}
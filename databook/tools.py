@@ -0,0 +1,158 @@
+import os, signal, subprocess, threading, asyncio, shutil, atexit, tempfile
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Set, Optional
+
+from .errors import ToolError
+from .log import log, tracer
+
+
+# Runs external tools on an asyncio event loop in a background thread, so any number of jobs can
+# wait on their processes at once while only `limit` of them run. Each process writes its output
+# straight to its own log file and is killed if it runs for longer than `timeout` seconds
+class Runner:
+    class Cancelled(Exception):
+        pass
+    
+    
+    def __init__(self, limit: int = os.cpu_count() or 1, timeout: Optional[float] = None) -> None:
+        self.limit = limit
+        self.timeout = timeout
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.processes: Set[asyncio.subprocess.Process] = set()
+        self.cancelled = False
+        self.lock = threading.Lock()
+        
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.semaphore = asyncio.Semaphore(max(self.limit, 1))
+                threading.Thread(target=self.loop.run_forever, name="runner", daemon=True).start()
+        return self.loop
+    
+    def submit(self, command: List[str], cwd: Optional[str], log_filename: str, stdin: Optional[str] = None) -> "Future[int]":
+        return asyncio.run_coroutine_threadsafe(self.execute(command, cwd, log_filename, stdin), self.start())
+    
+    async def execute(self, command: List[str], cwd: Optional[str], log_filename: str, stdin: Optional[str]) -> int:
+        async with self.semaphore:
+            if self.cancelled:
+                raise self.Cancelled()
+            with open(log_filename, "wb") as log_file, open(stdin or os.devnull, "rb") as stdin_file:
+                process = await asyncio.create_subprocess_exec(*command, cwd=cwd, stdin=stdin_file, stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
+                self.processes.add(process)
+                try:
+                    return await asyncio.wait_for(process.wait(), self.timeout)
+                except TimeoutError:
+                    self.kill_process(process)
+                    await process.wait()
+                    raise
+                finally:
+                    self.processes.discard(process)
+                    if self.cancelled:
+                        raise self.Cancelled()
+                    
+    # Called by each run of the scheduler, since the previous one may have been cancelled (in watch
+    # mode, say) and every job of it has finished by then
+    def reset(self) -> None:
+        self.cancelled = False
+        
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.kill)
+            
+    def kill(self) -> None:
+        for process in self.processes:
+            self.kill_process(process)
+            
+    @staticmethod
+    def kill_process(process: asyncio.subprocess.Process) -> None:
+        # Tools are often wrapper scripts, so kill everything they started as well
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+runner = Runner()
+
+
+def check_command(future: "Future[int]", log_filename: str, error_message: str = "Default error message", warn_only: bool = False) -> None:
+    try:
+        if future.result() == 0:
+            return
+        with open(log_filename, "r", errors="replace") as log_file:
+            output = "".join(deque(log_file, 20)).strip()
+    except TimeoutError:
+        output = f"Timed out after {runner.timeout} seconds"
+    except OSError as _:
+        output = str(_)
+    if not warn_only:
+        raise ToolError(f"{error_message}. Reason:\n{output}")
+    log.warning(f"{error_message}. Reason:\n{output}")
+
+
+def run_command(
+    command: List[str],
+    error_message: str = "Default error message",
+    warn_only: bool = False,
+    cwd: Optional[str] = None,
+    stdin: Optional[str] = None,
+    log_filename: Optional[str] = None,
+) -> None:
+    if log_filename is None:
+        log_filename = os.path.join(cwd or ".", f"{os.path.basename(command[0])}.log")
+    with tracer.span(os.path.basename(command[0])):
+        check_command(runner.submit(command, cwd, log_filename, stdin), log_filename, error_message, warn_only)
+
+
+# Every intermediate file of a run is written to its own directory, on tmpfs where there is one, so
+# nothing is written next to the cells (often on a network disk) and several runs can share a
+# directory. The jobs of a cell each get a subdirectory that is removed as soon as they are done,
+# and the whole workspace once the run is over, unless the files are kept for debugging
+class Workspace:
+    def __init__(self, base_directory: Optional[str] = None, keep: bool = False) -> None:
+        self.base_directory = base_directory
+        self.keep = keep
+        self.root: Optional[str] = None
+        self.lock = threading.Lock()
+        
+    @staticmethod
+    def default_base_directory() -> str:
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+            return "/dev/shm"
+        return tempfile.gettempdir()
+        
+    def directory(self, *path: str) -> str:
+        with self.lock:
+            if self.root is None:
+                base_directory = self.base_directory or self.default_base_directory()
+                os.makedirs(base_directory, exist_ok=True)
+                self.root = tempfile.mkdtemp(prefix="characterize-", dir=base_directory)
+            directory = os.path.join(self.root, *path)
+        os.makedirs(directory, exist_ok=True)
+        return directory
+    
+    def remove(self, *path: str) -> None:
+        if self.keep or self.root is None:
+            return
+        shutil.rmtree(os.path.join(self.root, *path), ignore_errors=True)
+        
+    def close(self) -> None:
+        with self.lock:
+            root, self.root = self.root, None
+        if root is None:
+            return
+        if self.keep:
+            log.info(f"Kept the intermediate files in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+workspace = Workspace()
+
+
+# Before the log is closed, and also when the run is interrupted, as tmpfs is memory
+atexit.register(workspace.close)
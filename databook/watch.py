@@ -0,0 +1,82 @@
+import os, time, select, struct, ctypes, ctypes.util
+from typing import Dict, Set, Optional
+
+
+# Waits for .mag files in a directory to change, through inotify where the C library has it and by
+# polling modification times anywhere else. Changes are debounced: they are only reported once none
+# have arrived for `debounce` seconds, since saving in Magic can touch a file several times
+class Watcher:
+    # From <sys/inotify.h>
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_DELETE = 0x200
+    event_header = struct.Struct("iIII")
+    
+    def __init__(self, directory: str = ".", debounce: float = 0.5, poll_interval: float = 1.0) -> None:
+        self.directory = directory
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.modified = self.scan()
+        self.fd = self.start_inotify()
+        self.method = "inotify" if self.fd is not None else "polling"
+        
+    def start_inotify(self) -> Optional[int]:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(self.directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            
+    # Modification time of every .mag file
+    def scan(self) -> Dict[str, int]:
+        return {entry.name[:-4]: entry.stat().st_mtime_ns for entry in os.scandir(self.directory) if entry.name.endswith(".mag")}
+    
+    def read_events(self) -> Set[str]:
+        assert self.fd is not None
+        names: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = self.event_header.unpack_from(data, offset)
+                offset += self.event_header.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if name.endswith(".mag"):
+                    names.add(name[:-4])
+                    
+    def poll(self) -> Set[str]:
+        modified = self.scan()
+        names = {name for name in modified.keys() | self.modified.keys() if modified.get(name) != self.modified.get(name)}
+        self.modified = modified
+        return names
+        
+    # Blocks until some .mag files have changed and then stopped changing, returning their names
+    def wait(self) -> Set[str]:
+        changed: Set[str] = set()
+        while True:
+            if self.fd is not None:
+                readable, _, _ = select.select([self.fd], [], [], self.debounce if changed else None)
+                names: Set[str] = self.read_events() if readable else set()
+            else:
+                time.sleep(self.debounce if changed else self.poll_interval)
+                names = self.poll()
+            if len(names) == 0 and len(changed) > 0:
+                return changed
+            changed |= names
@@ -0,0 +1,25 @@
+import os, shutil
+from pathlib import Path
+import pytest
+
+from databook import library, log
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# The log files of the tests go to a directory of their own instead of logs/ in the repository
+@pytest.fixture(autouse=True, scope="session")
+def log_directory(tmp_path_factory: pytest.TempPathFactory) -> None:
+    log.directory = str(tmp_path_factory.mktemp("logs"))
+
+
+# A cell directory holding a copy of every cell of the repository, which tests are free to change
+@pytest.fixture
+def cell_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    directory = str(tmp_path / "cells")
+    os.makedirs(directory)
+    for filename in os.listdir(repository):
+        if filename.endswith(".mag"):
+            shutil.copy(os.path.join(repository, filename), directory)
+    monkeypatch.setattr(library, "directory", directory)
+    return directory
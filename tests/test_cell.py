@@ -0,0 +1,103 @@
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pytest
+
+from databook import Cell, FakeSimulator, Footprint, Measurements
+
+
+def delay_cell(tolerance: float) -> Cell:
+    cell = Cell("nand2", simulator=FakeSimulator(), tolerance=tolerance)
+    # The fake simulator never reads the netlist the decks include
+    cell.netlist_filename = "nand2.inc"
+    return cell
+
+
+def assert_same(measurements: List[Measurements], expected: List[Measurements]) -> None:
+    assert len(measurements) == len(expected)
+    for corner_measurements, corner_expected in zip(measurements, expected):
+        assert corner_measurements.names == corner_expected.names
+        np.testing.assert_array_equal(np.ma.getmaskarray(corner_measurements.values), np.ma.getmaskarray(corner_expected.values))
+        np.testing.assert_allclose(corner_measurements.values.filled(0.0), corner_expected.values.filled(0.0))
+
+
+def test_footprint_reads_the_layout_alone(cell_directory: str) -> None:
+    footprint = Footprint("nand2")
+    assert (footprint.width, footprint.height) == (5.94, 26.78)
+    assert [port.name for port in footprint.input_ports] == ["A", "B"]
+    assert [port.name for port in footprint.output_ports] == ["Y"]
+    assert [(input_port.name, output_port.name) for input_port, output_port in footprint.arcs()] == [("A", "Y"), ("B", "Y")]
+
+
+def test_sweep_simulates_every_load_without_tolerance(cell_directory: str, tmp_path: Path) -> None:
+    cell = delay_cell(-1.0)
+    input_port = cell.input_ports[0]
+    measurements = cell.sweep_loads(input_port, str(tmp_path), -1.0)
+    assert cell.simulated_loads[input_port.name] == cell.load_capacitances
+    assert_same(measurements, cell.run_propagation_delays(input_port, str(tmp_path), cell.load_capacitances))
+
+
+def test_sweep_bisects_until_the_middle_load_is_predicted(cell_directory: str, tmp_path: Path) -> None:
+    cell = delay_cell(1e6)
+    input_port = cell.input_ports[0]
+    measurements = cell.sweep_loads(input_port, str(tmp_path), 1e6)
+    loads = cell.load_capacitances
+    # The ends, then the middle load that checks the line between them
+    assert cell.simulated_loads[input_port.name] == [loads[0], loads[2], loads[4]]
+    full = cell.run_propagation_delays(input_port, str(tmp_path), loads)
+    for k in (0, 2, 4):
+        # Rows are ordered by input slew then load capacitance
+        rows = [j * len(loads) + k for j in range(len(cell.input_slews))]
+        assert_same([Measurements(m.names, m.values[rows]) for m in measurements], [Measurements(m.names, m.values[rows]) for m in full])
+
+
+def test_prediction_error_only_counts_the_given_columns(cell_directory: str) -> None:
+    cell = delay_cell(1.0)
+    loads = cell.load_capacitances
+    # One corner and input slew; a delay [s] linear in the load and a current [A] that is not
+    rows = {k: np.ma.masked_array([[[3e-12 * loads[k], 1e-6 * k * k]]]) for k in (0, 1, 2)}
+    assert cell.prediction_error(rows, 0, 1, 2, [0]) == pytest.approx(0.0, abs=1e-9)
+    assert cell.prediction_error(rows, 0, 1, 2, [0, 1]) > 1.0
+
+
+def test_leakage_holds_the_other_inputs_where_the_input_switches_the_output(cell_directory: str) -> None:
+    cell = Cell("nand2", simulator=FakeSimulator())
+    states = [(input_port.name, levels) for input_port, levels in cell.leakage_states()]
+    assert states == [
+        ("A", {"B": 1, "A": 0}),
+        ("A", {"B": 1, "A": 1}),
+        ("B", {"A": 1, "B": 0}),
+        ("B", {"A": 1, "B": 1}),
+    ]
+
+
+def test_leakage_is_not_measured_without_a_logic_function(cell_directory: str) -> None:
+    cell = Cell("rdtype", simulator=FakeSimulator())
+    assert cell.leakage_states() == []
+    assert all(cell.side_levels(input_port) is None for input_port in cell.input_ports)
+
+
+def test_delay_deck_holds_the_other_inputs_at_the_leakage_levels(cell_directory: str) -> None:
+    cell = delay_cell(-1.0)
+    deck = cell.propagation_delay_deck(cell.input_ports[0], cell.netlist_filename)
+    assert "VB B GND 1*vd\n" in deck
+    assert "0.5*vd\n" not in deck
+
+
+def test_leakage_is_the_quiescent_current_before_each_edge(cell_directory: str) -> None:
+    cell = delay_cell(-1.0)
+    corner = cell.corners[0]
+    # Two output instances by two loads, the second instance failing at the first load
+    values = np.ma.masked_invalid([[-1e-9, -3e-9, np.nan, -5e-9], [-3e-9, -5e-9, -5e-9, -7e-9]])
+    measurements = Measurements(["low_current0", "high_current0", "low_current1", "high_current1"], values)
+    leakages = cell.get_leakages(corner, measurements, 2, slice(0, 2))
+    np.testing.assert_allclose(leakages, [corner.voltage * 3e-9, corner.voltage * 5e-9])
+
+
+@pytest.mark.parametrize("function, levels, expected", [
+    ("!A", {"A": 0}, 1),
+    ("!(A&B)", {"A": 1, "B": 1}, 0),
+    ("(A^B^Cin)", {"A": 1, "B": 1, "Cin": 1}, 1),
+])
+def test_evaluate(function: str, levels: Dict[str, int], expected: int) -> None:
+    assert Cell.evaluate(function, levels) == expected
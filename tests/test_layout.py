@@ -0,0 +1,106 @@
+import os
+from typing import Dict, List, Set, Tuple
+import numpy as np
+import pytest
+
+from databook import Footprint, Layout, Port, StaticTiming, corners
+
+
+# Two inverters side by side, the output of the first joined to the input of the second by a pair
+# of labels of the same name
+chain = """magic
+tech tsmc180
+timestamp 1701694120
+<< labels >>
+rlabel metal2 99 1339 113 1339 5 n1
+rlabel metal2 165 1339 179 1339 5 n1
+use inv inv_0
+timestamp 1701694120
+transform 1 0 0 0 1 0
+box 0 0 132 1339
+use inv inv_1
+timestamp 1701694120
+transform 1 0 132 0 1 0
+box 0 0 132 1339
+<< end >>
+"""
+
+
+def touching_pairs(boxes: np.ndarray) -> Set[Tuple[int, int]]:
+    return {
+        (i, j)
+        for i in range(len(boxes))
+        for j in range(i + 1, len(boxes))
+        if boxes[i, 0] <= boxes[j, 2] and boxes[j, 0] <= boxes[i, 2] and boxes[i, 1] <= boxes[j, 3] and boxes[j, 1] <= boxes[i, 3]
+    }
+
+
+def test_grid_index_pairs_every_touching_box_once() -> None:
+    generator = np.random.default_rng(1)
+    origins = generator.integers(0, 1000, size=(200, 2))
+    boxes = np.concatenate([origins, origins + generator.integers(1, 60, size=(200, 2))], axis=1)
+    first, second = Layout.GridIndex(boxes, 40, 40).pairs()
+    pairs = {(int(i), int(j)) for i, j in zip(first, second)}
+    assert (first < second).all() and len(pairs) == len(first)
+    assert touching_pairs(boxes) <= pairs
+
+
+def test_grid_index_pairs_abutting_boxes_only() -> None:
+    boxes = np.array([[0, 0, 10, 10], [10, 0, 20, 10], [500, 500, 510, 510]])
+    first, second = Layout.GridIndex(boxes, 10, 10).pairs()
+    assert (first.tolist(), second.tolist()) == ([0], [1])
+    first, second = Layout.GridIndex(boxes[:1], 10, 10).pairs()
+    assert len(first) == len(second) == 0
+
+
+@pytest.fixture
+def layout_path(cell_directory: str) -> str:
+    path = os.path.join(cell_directory, "chain.mag")
+    with open(path, "w") as mag_file:
+        mag_file.write(chain)
+    return path
+
+
+def test_layout_flattens_instances(layout_path: str) -> None:
+    layout = Layout(layout_path)
+    assert [instance.path for instance in layout.instances] == ["inv_0", "inv_1"]
+    assert layout.boxes.tolist() == [[0, 0, 132, 1339], [132, 0, 264, 1339]]
+    layout.check()
+    assert isinstance(layout.get_cell("inv"), Footprint)
+
+
+def characterize(footprint: Footprint, capacitance: float, rise: List[float], fall: List[float]) -> None:
+    ports: Dict[str, Port] = {port.name: port for port in footprint.ports}
+    ports["A"].results["nominal"].capacitance = capacitance
+    loads = [0.01, 0.1, 1, 10, 50]
+    ports["Y"].results["nominal"].arcs = [Port.Arc("A", loads, rise, fall)]
+
+
+def test_static_timing_propagates_through_the_chain(layout_path: str) -> None:
+    inverter = Footprint("inv")
+    # Delays [ps] of 10 + 10 per fF when rising and twice that when falling
+    characterize(inverter, 1.0, [10.1, 11, 20, 110, 510], [20.2, 22, 40, 220, 1020])
+    timing = StaticTiming(Layout(layout_path, {"inv": inverter}))
+    rise, fall, predecessors, loads = timing.analyze(corners["nominal"])
+    first, second = timing.arc_sources
+    end = timing.arc_targets[1]
+    # The scan and test ports of abutting cells make nets of their own, which no arc drives
+    assert timing.arc_targets[0] == second and len({first, second, end}) == 3
+    assert loads[second] == pytest.approx(1.0)
+    # Each arc is timed from the later of its input's arrivals, at the load on its output
+    assert (rise[first], fall[first]) == (0.0, 0.0)
+    assert (rise[second], fall[second]) == pytest.approx((20.0, 40.0))
+    assert (rise[end], fall[end]) == pytest.approx((50.1, 60.2))
+    assert timing.levels == 2 and timing.untimed == 0 and timing.looped == 0
+    assert timing.path(int(end), predecessors, np.maximum(rise, fall)) == [
+        "inv_0/A (inv) to Y: 40.0 ps, arriving at 40.0 ps",
+        "inv_1/A (inv) to Y: 20.2 ps, arriving at 60.2 ps",
+    ]
+
+
+def test_arcs_that_never_switched_are_not_timed(layout_path: str) -> None:
+    inverter = Footprint("inv")
+    timing = StaticTiming(Layout(layout_path, {"inv": inverter}))
+    assert len(timing.arc_types) == 0
+    rise, fall, _, _ = timing.analyze(corners["nominal"])
+    assert not rise.any() and not fall.any()
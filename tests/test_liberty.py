@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from databook import Cell, FakeSimulator, Liberty
+
+
+@pytest.mark.parametrize("cell_name, input_name, output_name, sense", [
+    ("nand2", "A", "Y", "negative_unate"),
+    ("buffer", "A", "Y", "positive_unate"),
+    ("mux2", "S", "Y", "non_unate"),
+    ("fulladder", "Cin", "Cout", "positive_unate"),
+    ("fulladder", "Cin", "S", "non_unate"),
+])
+def test_timing_sense_follows_the_logic_function(cell_directory: str, cell_name: str, input_name: str, output_name: str, sense: str) -> None:
+    cell = Cell(cell_name, simulator=FakeSimulator())
+    output_port = next(port for port in cell.output_ports if port.name == output_name)
+    assert Liberty.timing_sense(cell, input_name, output_port) == sense
+
+
+def test_sequential_cells_are_left_out(cell_directory: str, tmp_path: Path) -> None:
+    cells = [Cell(name, simulator=FakeSimulator()) for name in ("rdtype", "inv")]
+    Liberty(cells).write(str(tmp_path / "cells.lib"))
+    text = (tmp_path / "cells.lib").read_text()
+    assert "cell (inv)" in text
+    assert "cell (rdtype)" not in text
@@ -0,0 +1,53 @@
+import os
+
+from databook import Lint
+
+
+def edit(directory: str, cell_name: str, old: str, new: str) -> None:
+    path = os.path.join(directory, f"{cell_name}.mag")
+    with open(path, "r") as mag_file:
+        text = mag_file.read()
+    assert old in text
+    with open(path, "w") as mag_file:
+        mag_file.write(text.replace(old, new))
+
+
+def lint(*cell_names: str) -> Lint:
+    checks = Lint(list(cell_names))
+    checks.check()
+    return checks
+
+
+def test_library_cells_pass(cell_directory: str) -> None:
+    assert lint("inv", "nand2", "buffer").errors == {}
+
+
+def test_missing_rail(cell_directory: str) -> None:
+    edit(cell_directory, "inv", "rlabel metal1 0 15 0 55 3 GND!\nrlabel metal1 132 15 132 55 7 GND!\n", "")
+    assert lint("inv", "nand2").errors == {"inv": ["No GND! rail"]}
+
+
+def test_misplaced_rail(cell_directory: str) -> None:
+    edit(cell_directory, "inv", "rlabel metal1 132 1284 132 1324 7 Vdd!", "rlabel metal1 132 1280 132 1320 7 Vdd!")
+    errors = lint("inv", "nand2", "buffer").errors
+    assert list(errors) == ["inv"]
+    assert errors["inv"][0].startswith("Vdd! rail on the right edge spans y = 25.6 to 26.4 µm")
+
+
+def test_label_off_its_layer(cell_directory: str) -> None:
+    edit(cell_directory, "inv", "rlabel metal2 99 0 113 0 1 Y", "rlabel metal1 99 0 113 0 1 Y")
+    assert lint("inv").errors == {"inv": ["Label Y at (1.98, 0.0) to (2.26, 0.0) µm is not on metal1"]}
+
+
+def test_diffusion_outside_the_well(cell_directory: str) -> None:
+    edit(cell_directory, "inv", "<< pdiffusion >>\n", "<< pdiffusion >>\nrect 80 100 95 200\n")
+    assert lint("inv").errors == {"inv": ["pdiffusion at (1.6, 2.0) to (1.9, 4.0) µm is outside the nwell"]}
+
+
+def test_unreadable_and_empty_cells(cell_directory: str) -> None:
+    with open(os.path.join(cell_directory, "empty.mag"), "w") as mag_file:
+        mag_file.write("magic\ntech tsmc180\n<< end >>\n")
+    checks = lint("inv", "empty", "missing")
+    assert checks.errors["empty"] == ["Layout is empty"]
+    assert checks.errors["missing"][0].startswith("Cannot be read:")
+    assert checks.cell_names == ["inv"]
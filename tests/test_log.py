@@ -0,0 +1,16 @@
+import json
+from pathlib import Path
+
+from databook.log import Tracer
+
+
+def test_clearing_the_tracer_forgets_the_spans_written(tmp_path: Path) -> None:
+    tracer = Tracer()
+    with tracer.span("first", cell="nand2"):
+        pass
+    tracer.clear()
+    with tracer.span("second", cell="inv"):
+        pass
+    tracer.write(str(tmp_path / "trace.json"))
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [event["name"] for event in events if event["ph"] == "X"] == ["second"]
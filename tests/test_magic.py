@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from databook import Magic
+from databook.errors import ToolError
+from databook.tools import workspace
+
+tools = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools")
+
+
+# Extracts with the stand-in Magic in tools/, which fails on a cell without a .mag file
+@pytest.fixture
+def magic(cell_directory: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Magic:
+    monkeypatch.setenv("PATH", tools + os.pathsep + os.environ["PATH"])
+    monkeypatch.setattr(workspace, "base_directory", str(tmp_path / "workspace"))
+    monkeypatch.setattr(workspace, "root", None)
+    return Magic()
+
+
+def test_a_cell_magic_fails_on_only_fails_itself(magic: Magic) -> None:
+    for cell_name in ("inv", "missing", "nand2"):
+        magic.add(cell_name)
+    magic.run()
+    # The run for every cell stopped at the missing one
+    assert list(magic.extracted) == ["inv"]
+    assert os.path.exists(magic.get_extracted("nand2"))
+    with pytest.raises(ToolError):
+        magic.get_extracted("missing")
+
+
+def test_every_cell_is_extracted_in_one_run(magic: Magic) -> None:
+    for cell_name in ("inv", "nand2"):
+        magic.add(cell_name)
+    magic.run()
+    assert sorted(magic.extracted) == ["inv", "nand2"]
+    assert all(os.path.dirname(path) == os.path.dirname(magic.extracted["inv"]) for path in magic.extracted.values())
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import Dict, Tuple
+import pytest
+
+from databook import Netlist
+from databook.spice import spice_number
+
+
+def capacitors(netlist: Netlist) -> Dict[Tuple[str, ...], float]:
+    return {tuple(element.nodes): spice_number(element.rest[0]) * 1e15 for element in netlist.elements if element.name[0] == "C"}
+
+
+def test_read_joins_continuation_lines_and_skips_statements(tmp_path: Path) -> None:
+    filename = tmp_path / "inv.spice"
+    filename.write_text("* inv\n.option scale=0.01u\nM0 Y A GND GND nfet\n+ w=10 l=2\nC0 Y GND 1fF\n")
+    netlist = Netlist.read(str(filename))
+    assert [str(element) for element in netlist.elements] == ["M0 Y A GND GND nfet w=10 l=2", "C0 Y GND 1fF"]
+    assert netlist.nodes() == {"Y", "A", "GND"}
+
+
+def test_small_resistors_are_shorted_onto_the_port() -> None:
+    netlist = Netlist([
+        Netlist.Element("R0", ["a1", "A"], ["5"]),
+        Netlist.Element("M0", ["Y", "a1", "GND", "GND"], ["nfet"]),
+    ])
+    reduced = netlist.reduce(Netlist.Reduction(capacitance=0.0, resistance=10.0), ["A", "Y"])
+    assert [str(element) for element in reduced.elements] == ["M0 Y A GND GND nfet"]
+
+
+def test_large_resistors_are_kept() -> None:
+    netlist = Netlist([Netlist.Element("R0", ["a1", "A"], ["50"])])
+    reduced = netlist.reduce(Netlist.Reduction(capacitance=0.0, resistance=10.0), ["A", "Y"])
+    assert [str(element) for element in reduced.elements] == ["R0 a1 A 50"]
+
+
+def test_two_ports_are_never_merged() -> None:
+    netlist = Netlist([
+        Netlist.Element("R0", ["A", "Y"], ["1"]),
+        Netlist.Element("R1", ["Y", "Vdd"], ["1"]),
+    ])
+    reduced = netlist.reduce(Netlist.Reduction(capacitance=0.0, resistance=10.0), ["A", "Y"])
+    assert [str(element) for element in reduced.elements] == ["R0 A Y 1", "R1 Y Vdd 1"]
+
+
+def test_capacitors_are_summed_and_small_couplings_grounded() -> None:
+    netlist = Netlist([
+        Netlist.Element("C0", ["Y", "n1"], ["0.5fF"]),
+        Netlist.Element("C1", ["n1", "Y"], ["0.25fF"]),
+        Netlist.Element("C2", ["A", "Vdd"], ["2fF"]),
+        Netlist.Element("C3", ["A", "GND"], ["1fF"]),
+        Netlist.Element("C4", ["A", "Y"], ["0.01fF"]),
+        Netlist.Element("C5", ["Vdd", "GND"], ["3fF"]),
+    ])
+    reduced = netlist.reduce(Netlist.Reduction(capacitance=0.1, resistance=0.0), ["A", "Y"])
+    assert capacitors(reduced) == pytest.approx({
+        ("A", "GND"): 3.01,
+        ("Y", "GND"): 0.01,
+        ("Y", "n1"): 0.75,
+    })
+
+
+def test_reduce_keeps_a_netlist_without_reductions() -> None:
+    netlist = Netlist([
+        Netlist.Element("M0", ["Y", "A", "GND", "GND"], ["nfet"]),
+        Netlist.Element("R0", ["Y", "y1"], ["100"]),
+    ])
+    reduced = netlist.reduce(Netlist.Reduction(capacitance=0.0, resistance=0.0), ["A", "Y"])
+    assert [str(element) for element in reduced.elements] == ["M0 Y A GND GND nfet", "R0 Y y1 100"]
@@ -0,0 +1,137 @@
+import json, os, time
+from pathlib import Path
+from typing import Callable, List
+import pytest
+
+from databook import Cache, FatalError, Journal, Scheduler, ToolError
+
+
+# Raises a ToolError the first `failures` times it is called
+def flaky(failures: int, calls: List[int]) -> Callable[[], str]:
+    def function() -> str:
+        calls.append(len(calls))
+        if len(calls) <= failures:
+            raise ToolError("hspice timed out")
+        return "done"
+    return function
+
+
+def test_tool_errors_are_retried() -> None:
+    calls: List[int] = []
+    scheduler = Scheduler(1, retries=2)
+    job = scheduler.add("inv/delay", flaky(2, calls))
+    scheduler.run()
+    assert job.result == "done" and job.error is None
+    assert len(calls) == 3
+
+
+def test_a_failure_fails_the_dependants_once_retries_run_out() -> None:
+    calls: List[int] = []
+    failures: List[str] = []
+    scheduler = Scheduler(2, retries=1)
+    extract = scheduler.add("inv/extract", flaky(2, calls), on_failure=lambda error: failures.append("extract"))
+    simulate = scheduler.add("inv/delay", lambda: "simulated", [extract], on_failure=lambda error: failures.append("delay"))
+    other = scheduler.add("nand2/delay", lambda: "simulated")
+    scheduler.run()
+    assert len(calls) == 2
+    assert isinstance(extract.error, ToolError) and simulate.error is extract.error
+    assert simulate.result is None and other.result == "simulated"
+    assert sorted(failures) == ["delay", "extract"]
+
+
+def test_other_errors_are_not_retried() -> None:
+    calls: List[int] = []
+    def function() -> None:
+        calls.append(0)
+        raise ValueError("bad deck")
+    scheduler = Scheduler(1, retries=3)
+    job = scheduler.add("inv/delay", function)
+    scheduler.run()
+    assert isinstance(job.error, ValueError) and len(calls) == 1
+
+
+def test_fatal_errors_stop_the_run() -> None:
+    def function() -> None:
+        raise FatalError()
+    scheduler = Scheduler(1)
+    scheduler.add("inv/delay", function)
+    with pytest.raises(FatalError):
+        scheduler.run()
+
+
+def test_longest_chain_of_work_starts_first() -> None:
+    order: List[str] = []
+    scheduler = Scheduler(1)
+    short = scheduler.add("short", lambda: order.append("short"), cost=5.0)
+    start = scheduler.add("start", lambda: order.append("start"), cost=1.0)
+    scheduler.add("end", lambda: order.append("end"), [start], cost=10.0)
+    scheduler.add("last", lambda: order.append("last"), [short], cost=1.0)
+    scheduler.run()
+    assert order == ["start", "end", "short", "last"]
+
+
+def test_cache_key_depends_on_every_part_in_order(tmp_path: Path) -> None:
+    cache = Cache(str(tmp_path))
+    assert cache.key("inv", "deck") == cache.key("inv", "deck")
+    assert cache.key("inv", "deck") != cache.key("deck", "inv")
+    assert cache.key("inv", "deck") != cache.key("invdeck")
+
+
+def test_cache_loads_what_was_stored_unless_refreshed(tmp_path: Path) -> None:
+    cache = Cache(str(tmp_path))
+    key = cache.key("inv")
+    assert cache.load("inv", key) is None
+    cache.store(key, {"area": 1.5})
+    assert cache.load("inv", key) == {"area": 1.5}
+    assert Cache(str(tmp_path), refresh=["inv"]).load("inv", key) is None
+    assert Cache(str(tmp_path), enabled=False).load("inv", key) is None
+
+
+def test_cache_evicts_the_least_recently_used_entries(tmp_path: Path) -> None:
+    entry = {"results": "x" * 100}
+    size = len(json.dumps(entry))
+    cache = Cache(str(tmp_path), max_size=3 * size)
+    keys = [cache.key(name) for name in ("and2", "inv", "nand2")]
+    for age, key in enumerate(keys):
+        cache.store(key, entry)
+        # Older entries have older modification times, however coarse the file system's clock
+        past = time.time() - 100 + age
+        os.utime(tmp_path / f"{key}.json", (past, past))
+    # Loading an entry makes it the most recently used
+    assert cache.load("and2", keys[0]) == entry
+    cache.store(cache.key("xor"), entry)
+    assert cache.load("inv", keys[1]) is None
+    assert cache.load("and2", keys[0]) == entry
+    assert cache.load("nand2", keys[2]) == entry
+
+
+def test_journal_resumes_the_finished_cells(tmp_path: Path) -> None:
+    filename = str(tmp_path / "journal.jsonl")
+    journal = Journal(filename=filename)
+    journal.record("inv", "key", "done", results={"area": 1.5})
+    journal.record("nand2", "key", "failed", error="hspice failed")
+    journal.close()
+    # A line cut short by an interrupted run is skipped
+    with open(filename, "a") as journal_file:
+        journal_file.write('{"cell": "xor", "key": "key", "sta')
+    resumed = Journal(resume=True, filename=filename)
+    assert resumed.load("inv", "key") == {"area": 1.5}
+    assert resumed.load("inv", "other key") is None
+    assert resumed.load("nand2", "key") is None
+    assert resumed.load("xor", "key") is None
+    resumed.record("xor", "key", "done", results={})
+    resumed.close()
+    resumed = Journal(resume=True, filename=filename)
+    assert resumed.load("xor", "key") == {}
+    resumed.close()
+
+
+def test_journal_starts_afresh_without_resume(tmp_path: Path) -> None:
+    filename = str(tmp_path / "journal.jsonl")
+    journal = Journal(filename=filename)
+    journal.record("inv", "key", "done", results={})
+    journal.close()
+    Journal(filename=filename).close()
+    resumed = Journal(resume=True, filename=filename)
+    assert resumed.load("inv", "key") is None
+    resumed.close()
@@ -0,0 +1,48 @@
+from pathlib import Path
+import numpy as np
+import pytest
+
+from databook import FakeSimulator, Measurements, Simulator
+from databook.spice import spice_number
+
+
+def test_read_unwraps_rows_and_masks_failed_measurements(tmp_path: Path) -> None:
+    filename = tmp_path / "inv.mt0"
+    filename.write_text(
+        "$DATA1 SOURCE='HSPICE' VERSION='P-2019.06'\n"
+        ".TITLE ''\n"
+        " cload            tdRise           tdFall           temper\n"
+        " alter#\n"
+        " 1.0000e-15       2.5000e-11       failed           25.0000\n"
+        " 1.0000\n"
+        " 1.0000e-14       failed           3.5000e-11       25.0000\n"
+        " 1.0000\n"
+    )
+    measurements = Measurements.read(str(filename))
+    assert measurements.names == ["cload", "tdrise", "tdfall", "temper", "alter#"]
+    assert len(measurements) == 2
+    np.testing.assert_allclose(measurements["CLOAD"], [1e-15, 1e-14])
+    assert measurements["tdrise"].mask.tolist() == [False, True]
+    assert measurements["tdfall"].mask.tolist() == [True, False]
+    assert measurements["tdrise"][0] == pytest.approx(2.5e-11)
+    assert measurements["tdfall"][1] == pytest.approx(3.5e-11)
+
+
+def test_spice_number_suffixes() -> None:
+    assert spice_number("10fF") == pytest.approx(10e-15)
+    assert spice_number("1.5meg") == pytest.approx(1.5e6)
+    assert spice_number("'2.5e-3'") == pytest.approx(2.5e-3)
+    with pytest.raises(ValueError):
+        spice_number("vd*0.5")
+
+
+def test_simulator_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Simulator()  # type: ignore[abstract]
+
+
+def test_fake_simulator_evaluates_expressions_without_builtins() -> None:
+    simulator = FakeSimulator()
+    assert simulator.number("'vd*0.5'", {"vd": 1.8}) == pytest.approx(0.9)
+    assert simulator.number("{vd}", {"vd": 1.8}) == pytest.approx(1.8)
+    assert simulator.number("'__import__(\"os\")'", {}) == 0.0
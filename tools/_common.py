@@ -0,0 +1,24 @@
+# Helpers shared by the stand-in tools, and by bench/bench.py, which lays out libraries the same way
+import os, time
+from typing import List, Tuple
+
+
+def wait(tool: str) -> None:
+    # Seconds to take, to stand in for the real tool's runtime
+    time.sleep(float(os.environ.get(f"STAND_IN_LATENCY_{tool.upper()}", os.environ.get("STAND_IN_LATENCY", "0"))))
+
+
+# Extent of the cell's rectangles, boxes and labels [lambda], from its .mag file
+def get_bounding_box(filename: str) -> Tuple[int, int, int, int]:
+    xs: List[int] = []
+    ys: List[int] = []
+    with open(filename, "r") as magic_file:
+        for line in magic_file:
+            words = line.split()
+            if len(words) >= 5 and words[0] in ("rect", "box"):
+                xs += [int(words[1]), int(words[3])]
+                ys += [int(words[2]), int(words[4])]
+            elif len(words) >= 6 and words[0] == "rlabel":
+                xs += [int(words[2]), int(words[4])]
+                ys += [int(words[3]), int(words[5])]
+    return min(xs), min(ys), max(xs), max(ys)